@@ -1,13 +1,28 @@
 from django_filters.rest_framework import CharFilter, FilterSet
 
+from titles import registry
 from titles.models import Title
 
 
 class TitleFilter(FilterSet):
     name = CharFilter(field_name='name', lookup_expr='icontains')
-    category = CharFilter(field_name='category__slug')
-    genre = CharFilter(field_name='genre__slug')
+    category = CharFilter(method='filter_category')
+    genre = CharFilter(method='filter_genre')
 
     class Meta:
         model = Title
         fields = ('name', 'category', 'genre', 'year',)
+
+    def filter_category(self, queryset, name, value):
+        """Фильтр по category_id из справочника, без соединения таблиц."""
+        category = registry.categories.get(value)
+        if category is None:
+            return queryset.none()
+        return queryset.filter(category_id=category.id)
+
+    def filter_genre(self, queryset, name, value):
+        """Фильтр по связующей таблице, без соединения с таблицей жанров."""
+        genre = registry.genres.get(value)
+        if genre is None:
+            return queryset.none()
+        return queryset.filter(genre=genre.id)
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.representations import (get_titles_for_rendering,
+                                 refresh_title_representations, render_title)
+from titles.models import Title, TitleRepresentation
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверка готовых JSON представлений произведений с данными в базе'
+    )
+
+    def add_arguments(self, parser):
+        """Определение аргументов для команды."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество произведений за один проход',
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Пересчитать отличающиеся представления',
+        )
+
+    def handle(self, *args, **options):
+        """Основная процедура."""
+        title_ids = list(Title.objects.order_by('pk').values_list(
+            'pk', flat=True,
+        ))
+        batch_size = options['batch_size']
+        broken = []
+        for start in range(0, len(title_ids), batch_size):
+            broken += self._check_batch(title_ids[start:start + batch_size])
+        orphans = TitleRepresentation.objects.exclude(
+            title__in=Title.objects.values('pk'),
+        )
+        orphans_count = orphans.count()
+
+        self.stdout.write(
+            f'Произведений: {len(title_ids)}, '
+            f'расхождений: {len(broken)}, '
+            f'лишних представлений: {orphans_count}'
+        )
+        if options['fix']:
+            for start in range(0, len(broken), batch_size):
+                refresh_title_representations(broken[start:start + batch_size])
+            orphans.delete()
+            self.stdout.write(self.style.SUCCESS('Представления обновлены'))
+        elif broken or orphans_count:
+            raise CommandError(
+                'Представления расходятся с данными; запустите с --fix.'
+            )
+
+    def _check_batch(self, title_ids):
+        """
+        id произведений, представление которых устарело. Отсутствующие
+        представления не ошибка: они создаются при первом чтении.
+        """
+        stored = dict(
+            TitleRepresentation.objects.filter(
+                pk__in=title_ids,
+            ).values_list('pk', 'content')
+        )
+        return [
+            title.pk
+            for title in get_titles_for_rendering(title_ids)
+            if title.pk in stored and stored[title.pk] != render_title(title)
+        ]
@@ -0,0 +1,71 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def replicate(source, targets):
+    """
+    Копирование основной базы SQLite в файлы реплик через backup API.
+    Копия записывается в одной транзакции, поэтому читатели реплики видят
+    либо старое, либо новое состояние целиком.
+    """
+    with sqlite3.connect(source) as primary:
+        for target in targets:
+            replica = sqlite3.connect(target)
+            try:
+                primary.backup(replica)
+            finally:
+                replica.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирование основной базы SQLite в реплики для чтения '
+        '(замена репликации для локальной разработки)'
+    )
+
+    def add_arguments(self, parser):
+        """Определение аргументов для команды."""
+        parser.add_argument(
+            '--source',
+            default=str(settings.DATABASES['default']['NAME']),
+            help='Файл основной базы',
+        )
+        parser.add_argument(
+            '--target',
+            action='append',
+            dest='targets',
+            help='Файл реплики; по умолчанию все DATABASE_REPLICAS',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза между копированиями, в секундах',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Скопировать базу один раз и завершить работу',
+        )
+
+    def handle(self, *args, **options):
+        """Основная процедура."""
+        targets = options['targets'] or settings.DATABASE_REPLICAS
+        if not targets:
+            raise CommandError('Реплики не заданы (DATABASE_REPLICAS).')
+
+        try:
+            while True:
+                replicate(options['source'], targets)
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Реплики обновлены: {len(targets)}'
+        ))
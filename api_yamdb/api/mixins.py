@@ -0,0 +1,227 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.http.response import HttpResponseBase
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from api_yamdb.routers import (enable_replica_reads, is_primary_sticky,
+                               mark_primary_sticky, reset_replica_reads)
+from api_yamdb.single_flight import get_or_compute
+from api_yamdb.write_queue import WriteQueueTimeout, serialized_write
+from .representations import (FRAGMENTS, get_ordered_fragments,
+                              render_with_fragments)
+
+
+class WriteQueueBusy(APIException):
+    status_code = 503
+    default_detail = 'Сервер перегружен запросами на запись, повторите позже.'
+    default_code = 'write_queue_busy'
+
+
+class SerializedWriteMixin:
+    """
+    Создание, изменение и удаление объектов через очередь на запись.
+    Проверка данных выполняется внутри очереди, поэтому проверки вида
+    «такого объекта ещё нет» не обгоняют параллельные вставки.
+    """
+
+    def _serialized(self, method, *args, **kwargs):
+        try:
+            with serialized_write():
+                return method(*args, **kwargs)
+        except WriteQueueTimeout:
+            raise WriteQueueBusy
+
+    def create(self, request, *args, **kwargs):
+        return self._serialized(super().create, request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        return self._serialized(super().update, request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        return self._serialized(super().destroy, request, *args, **kwargs)
+
+
+def reads_own_writes(request):
+    """
+    Пользователь недавно изменил данные и должен читать их из основной
+    базы, минуя реплики и кеш ответов.
+    """
+    return bool(
+        settings.DATABASE_REPLICA_ALIASES
+        and request.user.is_authenticated
+        and is_primary_sticky(request.user.id)
+    )
+
+
+class ReplicaReadMixin:
+    """
+    Запросы на чтение выполняются на репликах базы данных.
+    Пользователь, недавно изменивший данные, читает из основной базы,
+    поэтому сразу видит свои изменения.
+    """
+
+    _replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and settings.DATABASE_REPLICA_ALIASES
+            and not reads_own_writes(request)
+        ):
+            self._replica_token = enable_replica_reads()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if self._replica_token is not None:
+            reset_replica_reads(self._replica_token)
+            self._replica_token = None
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            mark_primary_sticky(request.user.id)
+        return response
+
+
+class AsyncReadsMixin:
+    """
+    Под ASGI запросы на чтение выполняются в пуле потоков
+    (см. api_yamdb.handlers.ThreadPoolReadsMixin).
+    """
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        view = super().as_view(*args, **kwargs)
+        view.async_reads = True
+        return view
+
+
+def _get_generation_key(namespace):
+    return f'response_generation:{namespace}'
+
+
+def get_cache_generation(namespace):
+    """Поколение кеша ответов: меняется при каждом изменении данных."""
+    cache = caches[settings.RESPONSE_CACHE['CACHE']]
+    key = _get_generation_key(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate_cached_responses(*namespaces):
+    """Сбросить закешированные ответы; прежние ключи больше не читаются."""
+    caches[settings.RESPONSE_CACHE['CACHE']].set_many(
+        {
+            _get_generation_key(namespace): time.time_ns()
+            for namespace in namespaces
+        },
+        None,
+    )
+
+
+class CachedReadMixin:
+    """
+    Кеширование ответов list и retrieve с защитой от одновременного
+    пересчёта (api_yamdb.single_flight). Ключ включает поколение
+    get_cache_namespaces(), которое сбрасывается сигналами при записи
+    (api/signals.py); изменения в обход сигналов видны через
+    RESPONSE_CACHE['TIMEOUT'] секунд. Пользователь, недавно изменивший
+    данные, читает из основной базы мимо кеша: кеш мог заполниться
+    с отстающей реплики.
+    """
+
+    def get_cache_namespaces(self):
+        """Пространства имён ключей; по умолчанию — basename роутера."""
+        return (self.basename,)
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(super().retrieve, request, *args, **kwargs)
+
+    def _cached(self, method, request, *args, **kwargs):
+        config = settings.RESPONSE_CACHE
+        if not config['ENABLED'] or reads_own_writes(request):
+            return method(request, *args, **kwargs)
+        generations = ':'.join(
+            str(get_cache_generation(namespace))
+            for namespace in self.get_cache_namespaces()
+        )
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        data = get_or_compute(
+            f'response:{generations}:{path}',
+            lambda: self._get_cacheable(method(request, *args, **kwargs)),
+            timeout=config['TIMEOUT'],
+            stale_timeout=config['STALE_TIMEOUT'],
+            lock_timeout=config['LOCK_TIMEOUT'],
+            beta=config['BETA'],
+            cache_alias=config['CACHE'],
+        )
+        if isinstance(data, HttpResponseBase):
+            return data
+        return Response(data)
+
+    @staticmethod
+    def _get_cacheable(response):
+        # Ответ DRF кешируется данными, готовый HttpResponse — целиком.
+        if isinstance(response, Response):
+            return response.data
+        return response
+
+
+class MaterializedTitlesMixin:
+    """
+    Списки и карточки произведений собираются из готовых JSON фрагментов
+    (titles.models.TitleRepresentation) без сериализации и подсчёта
+    рейтинга. Сортировка по рейтингу идёт обычным путём.
+    """
+
+    def _use_representations(self, request):
+        return (
+            settings.MATERIALIZED_TITLES
+            and 'rating' not in request.query_params.get('ordering', '')
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self._use_representations(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(
+            self.queryset.all()
+        ).values_list('pk', flat=True)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            fragments = get_ordered_fragments(list(queryset))
+            return self._json_response(
+                '[' + ','.join(fragments) + ']'
+            )
+        payload = self.get_paginated_response(FRAGMENTS).data
+        return self._json_response(
+            render_with_fragments(payload, get_ordered_fragments(list(page)))
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self._use_representations(request):
+            return super().retrieve(request, *args, **kwargs)
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        fragments = get_ordered_fragments([int(pk)]) if pk.isdigit() else []
+        if not fragments:
+            raise NotFound
+        return self._json_response(fragments[0])
+
+    @staticmethod
+    def _json_response(content):
+        return HttpResponse(content, content_type='application/json')
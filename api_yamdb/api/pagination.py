@@ -0,0 +1,34 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class UsernameCursorPagination(CursorPagination):
+    ordering = 'username'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class UserPagination(PageNumberPagination):
+    """
+    Постраничный вывод пользователей.
+    По умолчанию — по номеру страницы. Если в запросе передан параметр
+    `cursor` (для первой страницы — пустой: `?cursor=`), используется
+    курсорная пагинация: она не считает общее количество записей и не
+    пропускает строки через OFFSET, поэтому не замедляется на больших
+    таблицах.
+    """
+    cursor_pagination_class = UsernameCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor_param = self.cursor_pagination_class.cursor_query_param
+        if cursor_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view,
+            )
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,110 @@
+import json
+
+from django.db import transaction
+from django.db.models import Avg
+from rest_framework.renderers import JSONRenderer
+
+from api_yamdb.routers import replica_reads_enabled
+from titles.models import Title, TitleRepresentation
+from .serializers import TitleGETSerializer
+
+FRAGMENTS = object()
+
+
+def get_titles_for_rendering(title_ids):
+    return Title.objects.filter(pk__in=title_ids).annotate(
+        rating=Avg('reviews__score')
+    ).select_related('category').prefetch_related('genre')
+
+
+def render_title(title):
+    """JSON произведения в том же виде, что и ответ API."""
+    return JSONRenderer().render(TitleGETSerializer(title).data).decode()
+
+
+def render_titles(title_ids):
+    return {
+        title.pk: render_title(title)
+        for title in get_titles_for_rendering(title_ids)
+    }
+
+
+def delete_title_representations(title_ids, batch_size=500):
+    """
+    Удалить представления изменённых произведений в текущей транзакции;
+    они будут пересчитаны при следующем чтении.
+    """
+    title_ids = list(title_ids)
+    for start in range(0, len(title_ids), batch_size):
+        TitleRepresentation.objects.filter(
+            pk__in=title_ids[start:start + batch_size],
+        ).delete()
+
+
+def clear_title_representations():
+    """Удалить все представления одним запросом (после массовой загрузки)."""
+    TitleRepresentation.objects.all().delete()
+
+
+def refresh_title_representations(title_ids):
+    """
+    Пересчитать представления произведений; возвращает их по id.
+    Удаление старых строк первым запросом берёт блокировку записи, поэтому
+    параллельное изменение не может зафиксироваться между чтением данных
+    и записью представлений.
+    """
+    with transaction.atomic():
+        TitleRepresentation.objects.filter(pk__in=title_ids).delete()
+        contents = render_titles(title_ids)
+        TitleRepresentation.objects.bulk_create((
+            TitleRepresentation(title_id=pk, content=content)
+            for pk, content in contents.items()
+        ), ignore_conflicts=True)
+    return contents
+
+
+def get_title_fragments(title_ids):
+    """
+    Представления произведений {id: JSON}. Отсутствующие (после изменения
+    или массовой загрузки) создаются на месте; при чтении с реплики они
+    только собираются, без записи. id несуществующих произведений
+    в результат не попадают.
+    """
+    contents = dict(
+        TitleRepresentation.objects.filter(
+            pk__in=title_ids,
+        ).values_list('pk', 'content')
+    )
+    missing = [pk for pk in title_ids if pk not in contents]
+    if missing and replica_reads_enabled():
+        contents.update(render_titles(missing))
+    elif missing:
+        # Запрос несуществующих id не должен начинать транзакцию записи.
+        existing = list(Title.objects.filter(pk__in=missing).values_list(
+            'pk', flat=True,
+        ))
+        if existing:
+            contents.update(refresh_title_representations(existing))
+    return contents
+
+
+def get_ordered_fragments(title_ids):
+    """Представления произведений в порядке title_ids."""
+    contents = get_title_fragments(title_ids)
+    return [contents[pk] for pk in title_ids if pk in contents]
+
+
+def render_with_fragments(payload, fragments):
+    """
+    JSON объекта payload, в котором значение FRAGMENTS заменено списком
+    готовых фрагментов. Формат совпадает с JSONRenderer.
+    """
+    items = []
+    for key, value in payload.items():
+        if value is FRAGMENTS:
+            rendered = '[' + ','.join(fragments) + ']'
+        else:
+            rendered = json.dumps(value, ensure_ascii=False,
+                                  separators=(',', ':'))
+        items.append(f'{json.dumps(key, ensure_ascii=False)}:{rendered}')
+    return '{' + ','.join(items) + '}'
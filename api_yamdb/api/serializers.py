@@ -1,37 +1,20 @@
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.core.validators import RegexValidator
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 
 from api_yamdb import constants
 from api.validators import validate_year
 from reviews.models import Comment, Review
+from titles import registry
 from titles.models import Category, Genre, Title
 from users.models import User
+from users.outbox import (CONFIRMATION_SUBJECT, build_confirmation_message,
+                          enqueue_email, send_now)
+from users.serializers import UsernameEmailFieldsMixin
 
 
-class SignUpSerializer(serializers.Serializer):
-    email = serializers.EmailField(
-        required=True,
-        max_length=constants.LIMIT_EMAIL
-    )
-    username = serializers.CharField(
-        required=True,
-        max_length=constants.LIMIT_USERNAME,
-        validators=[RegexValidator(
-            regex=constants.USERNAME_REGEX,
-            message='Недопустимые символы в username!'
-        )],
-    )
-
-    def validate_username(self, value):
-        if value == constants.UNAVAILABLE_USERNAME:
-            raise serializers.ValidationError(
-                f"Нельзя использовать {value} как username!"
-            )
-        return value
+class SignUpSerializer(UsernameEmailFieldsMixin):
 
     def validate(self, data):
         email = data['email']
@@ -51,15 +34,14 @@ class SignUpSerializer(serializers.Serializer):
 
     def create(self, validated_data):
         user, _ = User.objects.get_or_create(**validated_data)
-        confirmation_code = default_token_generator.make_token(user)
-
-        send_mail(
-            subject='Ваш код подтверждения YAmdb!',
-            message=f'Ваш код подтверждения: {confirmation_code}',
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[validated_data['email']],
-            fail_silently=False,
+
+        outgoing = enqueue_email(
+            email=validated_data['email'],
+            subject=CONFIRMATION_SUBJECT,
+            message=build_confirmation_message(user),
         )
+        if not settings.EMAIL_OUTBOX_ASYNC:
+            send_now(outgoing)
         return user
 
 
@@ -95,6 +77,15 @@ class UserSerializer(serializers.ModelSerializer):
         }
 
 
+class BulkUserCreateSerializer(serializers.Serializer):
+    users = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=constants.BULK_USERS_LIMIT,
+    )
+    send_confirmation = serializers.BooleanField(default=False)
+
+
 class UserMeSerializer(UserSerializer):
     class Meta(UserSerializer.Meta):
         extra_kwargs = UserSerializer.Meta.extra_kwargs.copy()
@@ -131,21 +122,61 @@ class TitleGETSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class RegistrySlugRelatedField(serializers.SlugRelatedField):
+    """Поиск объекта по slug в справочнике titles.registry, без запроса."""
+
+    def __init__(self, registry, **kwargs):
+        self.registry = registry
+        kwargs.setdefault('queryset', registry.model.objects.all())
+        super().__init__(slug_field='slug', **kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        instance = self.registry.get_instance(data)
+        if instance is None:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=data)
+        return instance
+
+
+class TitleIdsSerializer(serializers.Serializer):
+    """Список id произведений через запятую: ?ids=1,2,3."""
+    ids = serializers.CharField()
+
+    def validate_ids(self, value):
+        try:
+            ids = [int(pk) for pk in value.split(',') if pk.strip()]
+        except ValueError:
+            raise serializers.ValidationError(
+                'id произведений должны быть целыми числами.'
+            )
+        if any(not 1 <= pk <= constants.MAX_ID for pk in ids):
+            raise serializers.ValidationError(
+                f'id произведений должны быть от 1 до {constants.MAX_ID}.'
+            )
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise serializers.ValidationError('Не указаны id произведений.')
+        if len(ids) > constants.MULTI_GET_TITLES_LIMIT:
+            raise serializers.ValidationError(
+                'Можно запросить не больше '
+                f'{constants.MULTI_GET_TITLES_LIMIT} произведений.'
+            )
+        return ids
+
+
 class TitleSerializer(serializers.ModelSerializer):
     """Сериализатор объектов модели Title."""
 
-    genre = serializers.SlugRelatedField(
-        slug_field='slug',
-        queryset=Genre.objects.all(),
+    genre = RegistrySlugRelatedField(
+        registry=registry.genres,
         many=True,
         required=True,
         allow_empty=False,
         allow_null=False,
     )
-    category = serializers.SlugRelatedField(
-        slug_field='slug',
-        queryset=Category.objects.all(),
-    )
+    category = RegistrySlugRelatedField(registry=registry.categories)
     year = serializers.IntegerField(validators=[validate_year])
 
     class Meta:
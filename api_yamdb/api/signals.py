@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+
+from reviews.models import Review
+from titles.models import Category, Genre, GenreTitle, Title
+from .mixins import invalidate_cached_responses
+from .representations import delete_title_representations
+
+TITLES_NAMESPACE = 'titles'
+# Общее пространство имён всех списков отзывов: сбрасывает их разом.
+REVIEWS_NAMESPACE = 'reviews'
+
+
+def get_reviews_namespace(title_id):
+    return f'reviews:{title_id}'
+
+
+class PendingInvalidation:
+    """
+    Пространства имён кеша ответов, сбрасываемые после фиксации
+    транзакции. Хранится в списке on_commit соединения, поэтому при
+    откате транзакции или точки сохранения отбрасывается вместе с ним.
+    """
+
+    def __init__(self):
+        self.namespaces = set()
+
+    def __call__(self):
+        invalidate_cached_responses(*self.namespaces)
+
+
+def on_titles_changed(title_ids, *namespaces):
+    """
+    Удалить представления произведений в текущей транзакции (они будут
+    пересчитаны при чтении) и после её фиксации сбросить закешированные
+    ответы пространств имён namespaces. Изменения одной транзакции
+    (например, удаление произведения со всеми отзывами) сбрасывают кеш
+    одним вызовом.
+    """
+    if settings.MATERIALIZED_TITLES:
+        delete_title_representations(title_ids)
+    if not namespaces:
+        return
+    connection = transaction.get_connection()
+    savepoint_ids = set(connection.savepoint_ids)
+    for sids, func in connection.run_on_commit:
+        if isinstance(func, PendingInvalidation) and sids == savepoint_ids:
+            func.namespaces.update(namespaces)
+            return
+    pending = PendingInvalidation()
+    pending.namespaces.update(namespaces)
+    transaction.on_commit(pending)
+
+
+def title_changed(sender, instance, **kwargs):
+    on_titles_changed([instance.pk], TITLES_NAMESPACE)
+
+
+def genre_title_changed(sender, instance, **kwargs):
+    on_titles_changed([instance.title_id], TITLES_NAMESPACE)
+
+
+def genres_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        title_ids = pk_set or instance.titles.values_list('pk', flat=True)
+    else:
+        title_ids = [instance.pk]
+    on_titles_changed(title_ids, TITLES_NAMESPACE)
+
+
+def reference_changed(sender, instance, **kwargs):
+    on_titles_changed(
+        instance.titles.values_list('pk', flat=True), TITLES_NAMESPACE,
+    )
+
+
+def reference_deleting(sender, instance, **kwargs):
+    # После удаления связи с произведениями уже не найти.
+    instance._title_ids = list(instance.titles.values_list('pk', flat=True))
+
+
+def reference_deleted(sender, instance, **kwargs):
+    on_titles_changed(getattr(instance, '_title_ids', ()), TITLES_NAMESPACE)
+
+
+def review_changed(sender, instance, **kwargs):
+    # Отзыв меняет рейтинг, который есть и в списках произведений,
+    # поэтому сбрасываются все ответы о произведениях, а из списков
+    # отзывов — только список этого произведения.
+    on_titles_changed(
+        [instance.title_id],
+        TITLES_NAMESPACE,
+        get_reviews_namespace(instance.title_id),
+    )
+
+
+post_save.connect(title_changed, sender=Title)
+post_delete.connect(title_changed, sender=Title)
+post_save.connect(genre_title_changed, sender=GenreTitle)
+post_delete.connect(genre_title_changed, sender=GenreTitle)
+m2m_changed.connect(genres_changed, sender=Title.genre.through)
+for model in (Category, Genre):
+    post_save.connect(reference_changed, sender=model)
+    pre_delete.connect(reference_deleting, sender=model)
+    post_delete.connect(reference_deleted, sender=model)
+post_save.connect(review_changed, sender=Review)
+post_delete.connect(review_changed, sender=Review)
@@ -0,0 +1,148 @@
+import hashlib
+import time
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(ABC, SimpleRateThrottle):
+    """
+    Ограничение частоты запросов по алгоритму token bucket.
+
+    Частота задаётся так же, как у стандартных ограничений DRF
+    (`DEFAULT_THROTTLE_RATES`), например '5/hour': в корзине помещается
+    5 жетонов, и за час она заполняется полностью. Состояние корзины —
+    одна запись в общем кеше `THROTTLE_CACHE`; чтение и списание жетона
+    выполняются в одной транзакции (SQLiteCache.update_many), поэтому
+    лимиты действуют во всех процессах и при одновременных запросах.
+    """
+
+    @abstractmethod
+    def get_ident_value(self, request):
+        """Значение, для которого считается лимит."""
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_value(request)
+        if not ident:
+            return None
+        # Значения из тела запроса могут содержать недопустимые для ключа
+        # кеша символы, поэтому в ключ попадает их хеш.
+        ident = hashlib.md5(ident.encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        return not consume_tokens([self], request, view)
+
+    def get_tokens(self, state, now):
+        """Число жетонов в корзине с учётом пополнения к моменту now."""
+        tokens, updated = state or (self.num_requests, now)
+        return min(
+            self.num_requests,
+            tokens + (now - updated) * self.num_requests / self.duration,
+        )
+
+    def wait(self):
+        return getattr(self, 'wait_time', None)
+
+
+def consume_tokens(throttles, request, view):
+    """
+    Списать по жетону у каждой корзины, только если жетоны есть во всех:
+    запрос, отклонённый одним ограничением, не расходует лимиты других.
+    Возвращает отклонившие запрос ограничения.
+    """
+    buckets = {}
+    for throttle in throttles:
+        if throttle.rate is None:
+            continue
+        throttle.key = throttle.get_cache_key(request, view)
+        if throttle.key is not None:
+            buckets[throttle.key] = throttle
+    if not buckets:
+        return []
+
+    def update(states):
+        now = time.time()
+        tokens = {
+            key: throttle.get_tokens(states.get(key), now)
+            for key, throttle in buckets.items()
+        }
+        denied = []
+        for key, throttle in buckets.items():
+            if tokens[key] < 1:
+                throttle.wait_time = (
+                    (1 - tokens[key]) * throttle.duration
+                    / throttle.num_requests
+                )
+                denied.append(throttle)
+        if denied:
+            return {}, denied
+        return {key: (tokens[key] - 1, now) for key in buckets}, denied
+
+    return caches[settings.THROTTLE_CACHE].update_many(
+        buckets, update,
+        max(throttle.duration for throttle in buckets.values()),
+    )
+
+
+class TokenBucketThrottleMixin:
+    """
+    Проверка всех ограничений представления одной транзакцией:
+    жетоны списываются, только если запрос проходит все ограничения.
+    """
+
+    def check_throttles(self, request):
+        denied = consume_tokens(self.get_throttles(), request, self)
+        if denied:
+            self.throttled(request, max(
+                throttle.wait() for throttle in denied
+            ))
+
+
+class IPThrottle(TokenBucketThrottle):
+    """Лимит по IP адресу клиента."""
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class UsernameThrottle(TokenBucketThrottle):
+    """Лимит по username из тела запроса."""
+
+    def get_ident_value(self, request):
+        username = request.data.get('username')
+        if not isinstance(username, str):
+            return None
+        return username.lower()
+
+
+class EmailThrottle(TokenBucketThrottle):
+    """Лимит по email из тела запроса."""
+
+    def get_ident_value(self, request):
+        email = request.data.get('email')
+        if not isinstance(email, str):
+            return None
+        return email.lower()
+
+
+class SignUpIPThrottle(IPThrottle):
+    scope = 'signup_ip'
+
+
+class SignUpUsernameThrottle(UsernameThrottle):
+    scope = 'signup_username'
+
+
+class SignUpEmailThrottle(EmailThrottle):
+    scope = 'signup_email'
+
+
+class TokenIPThrottle(IPThrottle):
+    scope = 'token_ip'
+
+
+class TokenUsernameThrottle(UsernameThrottle):
+    scope = 'token_username'
@@ -1,6 +1,8 @@
 from http import HTTPStatus
 
+from django.conf import settings
 from django.db.models import Avg
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, pagination, views, viewsets
@@ -9,21 +11,38 @@ from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
 
 from reviews.models import Review
 from titles.models import Category, Genre, Title
+from users.authentication import VersionedJWTAuthentication
 from users.models import User
 from users.permissions import (IsAdmin, IsAdminOrReadOnly,
                                IsAuthorModeratorAdminOrReadOnly)
+from users.provisioning import provision_users
+from users.tokens import RoleAccessToken
 from .filters import TitleFilter
-from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, ReviewSerializer, SignUpSerializer,
-                          TitleGETSerializer, TitleSerializer, TokenSerializer,
+from .mixins import (AsyncReadsMixin, CachedReadMixin,
+                     MaterializedTitlesMixin, ReplicaReadMixin,
+                     SerializedWriteMixin)
+from .pagination import UserPagination
+from .representations import (FRAGMENTS, get_title_fragments,
+                              get_titles_for_rendering, render_with_fragments)
+from .serializers import (BulkUserCreateSerializer, CategorySerializer,
+                          CommentSerializer, GenreSerializer,
+                          ReviewSerializer, SignUpSerializer,
+                          TitleGETSerializer, TitleIdsSerializer,
+                          TitleSerializer, TokenSerializer,
                           UserSerializer, UserMeSerializer)
+from .signals import (REVIEWS_NAMESPACE, TITLES_NAMESPACE,
+                      get_reviews_namespace)
+from .throttles import (SignUpEmailThrottle, SignUpIPThrottle,
+                        SignUpUsernameThrottle, TokenBucketThrottleMixin,
+                        TokenIPThrottle, TokenUsernameThrottle)
 
 
-class CreateListDestroyViewSet(mixins.CreateModelMixin,
+class CreateListDestroyViewSet(AsyncReadsMixin,
+                               ReplicaReadMixin,
+                               mixins.CreateModelMixin,
                                mixins.ListModelMixin,
                                mixins.DestroyModelMixin,
                                viewsets.GenericViewSet):
@@ -44,7 +63,8 @@ class GenreViewSet(CreateListDestroyViewSet):
     serializer_class = GenreSerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(AsyncReadsMixin, ReplicaReadMixin, CachedReadMixin,
+                   MaterializedTitlesMixin, viewsets.ModelViewSet):
     queryset = Title.objects.all()
     permission_classes = (IsAdminOrReadOnly,)
     pagination_class = pagination.LimitOffsetPagination
@@ -62,14 +82,55 @@ class TitleViewSet(viewsets.ModelViewSet):
             rating=Avg('reviews__score')
         ).order_by('name')
 
+    def get_cache_namespaces(self):
+        return (TITLES_NAMESPACE,)
+
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return TitleGETSerializer
         return TitleSerializer
 
-
-class SignUpView(views.APIView):
+    @action(detail=False, methods=['get'], url_path='multi')
+    def multi_get(self, request):
+        """
+        Несколько произведений по списку id в порядке запроса
+        и список id, которых нет.
+        """
+        serializer = TitleIdsSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        if settings.MATERIALIZED_TITLES:
+            contents = get_title_fragments(ids)
+            payload = {
+                'results': FRAGMENTS,
+                'missing': [pk for pk in ids if pk not in contents],
+            }
+            return HttpResponse(
+                render_with_fragments(
+                    payload, [contents[pk] for pk in ids if pk in contents],
+                ),
+                content_type='application/json',
+            )
+
+        titles = {
+            title.pk: title for title in get_titles_for_rendering(ids)
+        }
+        return Response({
+            'results': TitleGETSerializer(
+                [titles[pk] for pk in ids if pk in titles], many=True,
+            ).data,
+            'missing': [pk for pk in ids if pk not in titles],
+        }, status=HTTPStatus.OK)
+
+
+class SignUpView(TokenBucketThrottleMixin, views.APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [
+        SignUpIPThrottle,
+        SignUpUsernameThrottle,
+        SignUpEmailThrottle,
+    ]
 
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
@@ -78,27 +139,32 @@ class SignUpView(views.APIView):
         return Response(serializer.data, status=HTTPStatus.OK)
 
 
-class TokenObtainView(views.APIView):
+class TokenObtainView(TokenBucketThrottleMixin, views.APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [TokenIPThrottle, TokenUsernameThrottle]
 
     def post(self, request):
         serializer = TokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
-        token = str(AccessToken.for_user(user))
+        token = str(RoleAccessToken.for_user(user))
         return Response({'token': token}, status=HTTPStatus.OK)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
+    # Эндпоинтам пользователей нужна актуальная запись из базы данных.
+    authentication_classes = [VersionedJWTAuthentication]
     permission_classes = [IsAdmin]
+    pagination_class = UserPagination
+    ordering = ('username',)
     lookup_field = 'username'
     http_method_names = ['get', 'post', 'patch', 'delete']
 
     def get_queryset(self):
         search = self.request.query_params.get('search')
         if search:
-            return self.queryset.filter(username__icontains=search)
+            return self.queryset.search_username(search)
         return self.queryset
 
     def get_serializer_class(self):
@@ -122,8 +188,22 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.save()
         return Response(serializer.data, status=HTTPStatus.OK)
 
-
-class CommentViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        serializer = BulkUserCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        created, conflicts = provision_users(
+            serializer.validated_data['users'],
+            send_confirmation=serializer.validated_data['send_confirmation'],
+        )
+        return Response({
+            'created': UserSerializer(created, many=True).data,
+            'conflicts': conflicts,
+        }, status=HTTPStatus.OK)
+
+
+class CommentViewSet(AsyncReadsMixin, ReplicaReadMixin,
+                     SerializedWriteMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (IsAuthenticatedOrReadOnly,
                           IsAuthorModeratorAdminOrReadOnly)
@@ -143,7 +223,8 @@ class CommentViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user, review=review)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(AsyncReadsMixin, ReplicaReadMixin, CachedReadMixin,
+                    SerializedWriteMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (
         IsAuthenticatedOrReadOnly,
@@ -154,6 +235,12 @@ class ReviewViewSet(viewsets.ModelViewSet):
     def get_title(self):
         return get_object_or_404(Title, id=self.kwargs.get('title_id'))
 
+    def get_cache_namespaces(self):
+        return (
+            REVIEWS_NAMESPACE,
+            get_reviews_namespace(self.kwargs.get('title_id')),
+        )
+
     def get_queryset(self):
         return self.get_title().reviews.all().order_by('-pub_date')
 
@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite с настройкой каждого нового соединения.
+
+    Дополнительные ключи OPTIONS (совпадают с появившимися в Django 5.1):
+    init_command — SQL команды через `;`, выполняемые сразу после
+    открытия соединения (обычно PRAGMA);
+    transaction_mode — режим BEGIN для transaction.atomic. IMMEDIATE
+    сразу берёт блокировку записи, и ожидание другого писателя
+    подчиняется busy_timeout вместо немедленной ошибки
+    "database is locked" при попытке повысить блокировку.
+    """
+
+    # Начинать транзакции обычным BEGIN независимо от transaction_mode.
+    defer_transactions = False
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.init_commands = [
+            command.strip()
+            for command in kwargs.pop('init_command', '').split(';')
+            if command.strip()
+        ]
+        transaction_mode = kwargs.pop('transaction_mode', None)
+        if (
+            transaction_mode is not None
+            and transaction_mode.upper() not in TRANSACTION_MODES
+        ):
+            raise ImproperlyConfigured(
+                f'settings.DATABASES: transaction_mode должен быть одним из '
+                f'{", ".join(TRANSACTION_MODES)}.'
+            )
+        self.transaction_mode = transaction_mode
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for command in self.init_commands:
+            conn.execute(command)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None or self.defer_transactions:
+            return super()._start_transaction_under_autocommit()
+        self.cursor().execute(f'BEGIN {self.transaction_mode.upper()}')
+
+    @contextmanager
+    def deferred_transactions(self):
+        """
+        Транзакции внутри блока начинаются с BEGIN DEFERRED: долгое
+        чтение не берёт блокировку записи и в режиме WAL не мешает
+        писателям.
+        """
+        defer_transactions = self.defer_transactions
+        self.defer_transactions = True
+        try:
+            yield
+        finally:
+            self.defer_transactions = defer_transactions
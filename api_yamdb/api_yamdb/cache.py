@@ -0,0 +1,479 @@
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from pathlib import Path
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+CREATE_TABLE_SQL = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+)
+CREATE_INDEX_SQL = (
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)'
+)
+
+# Попадания и промахи всех TieredCache процесса. Их меняют потоки с разными
+# экземплярами кеша, поэтому изменения идут под общей блокировкой модуля.
+stats = Counter()
+stats_lock = threading.Lock()
+
+
+def count(name):
+    with stats_lock:
+        stats[name] += 1
+
+
+class SQLiteCache(BaseCache):
+    """
+    Общий для всех процессов сервера кеш в локальном файле SQLite.
+
+    Каждая операция — один запрос по первичному ключу, поэтому стоимость
+    не зависит от числа записей. Просроченные записи удаляются лениво
+    при чтении и изредка пачкой при записи (вероятность задаётся
+    параметром CULL_PROBABILITY в OPTIONS).
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = str(location)
+        options = params.get('OPTIONS', {})
+        self._busy_timeout = options.get('BUSY_TIMEOUT', 5.0)
+        self._cull_probability = options.get('CULL_PROBABILITY', 0.001)
+        self._local = threading.local()
+
+    @property
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self._path,
+                timeout=self._busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(CREATE_TABLE_SQL)
+            connection.execute(CREATE_INDEX_SQL)
+            self._local.connection = connection
+        return connection
+
+    def _expiry(self, timeout):
+        # get_backend_timeout возвращает абсолютное время истечения.
+        return self.get_backend_timeout(timeout)
+
+    def _dumps(self, value):
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        cursor = self._connection.execute(
+            'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires '
+            'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            (key, self._dumps(value), self._expiry(timeout), time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        row = self._connection.execute(
+            'SELECT value, expires FROM cache WHERE key = ?', (key,),
+        ).fetchone()
+        if row is None:
+            return default
+        value, expires = row
+        if expires is not None and expires <= time.time():
+            self._delete(key)
+            return default
+        return pickle.loads(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._connection.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            (key, self._dumps(value), self._expiry(timeout)),
+        )
+        self._maybe_cull()
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        cursor = self._connection.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._expiry(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._delete(key)
+
+    def _delete(self, key):
+        cursor = self._connection.execute(
+            'DELETE FROM cache WHERE key = ?', (key,),
+        )
+        return cursor.rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        row = self._connection.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (self._dumps(value), key),
+            )
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return value
+
+    def update_many(self, keys, update, timeout=DEFAULT_TIMEOUT,
+                    version=None):
+        """
+        Чтение, изменение и запись нескольких ключей в одной транзакции
+        BEGIN IMMEDIATE: другие процессы не могут изменить ключи между
+        чтением и записью. update получает {ключ: значение} найденных
+        записей и возвращает пару (значения для записи, результат).
+        """
+        cache_keys = {self.make_key(key, version=version): key for key in keys}
+        for key in cache_keys:
+            self.validate_key(key)
+        connection = self._connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            rows = connection.execute(
+                'SELECT key, value FROM cache WHERE key IN ({}) '
+                'AND (expires IS NULL OR expires > ?)'.format(
+                    ', '.join('?' * len(cache_keys))
+                ),
+                (*cache_keys, time.time()),
+            ).fetchall()
+            values, result = update({
+                cache_keys[key]: pickle.loads(value) for key, value in rows
+            })
+            expires = self._expiry(timeout)
+            connection.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)',
+                [
+                    (self.make_key(key, version=version), self._dumps(value),
+                     expires)
+                    for key, value in values.items()
+                ],
+            )
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return result
+
+    def clear(self):
+        self._connection.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединения живут в течение всего потока: повторное открытие файла
+        # на каждый запрос стоило бы дороже самих операций с кешем.
+        pass
+
+    def _maybe_cull(self):
+        if random.random() < self._cull_probability:
+            self._connection.execute(
+                'DELETE FROM cache WHERE expires <= ?', (time.time(),),
+            )
+
+
+class LocalTier:
+    """
+    Память процесса для одного TieredCache: LRU, журнал и статистика.
+    Django создаёт экземпляр кеша в каждом потоке, поэтому состояние
+    хранится на уровне модуля и общее для всех потоков процесса.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.seen = None
+        self.next_sync = 0
+        self.stats = Counter()
+
+
+_local_tiers = {}
+_local_tiers_lock = threading.Lock()
+
+
+def get_local_tier(name):
+    with _local_tiers_lock:
+        tier = _local_tiers.get(name)
+        if tier is None:
+            tier = _local_tiers[name] = LocalTier()
+        return tier
+
+
+class TieredCache(BaseCache):
+    """
+    Двухуровневый кеш: LRU в памяти процесса перед общим кешем.
+
+    LOCATION — псевдоним общего кеша в CACHES. Значения сериализуются один
+    раз и хранятся на обоих уровнях в виде байтов; целые числа хранятся
+    в общем кеше как есть, чтобы incr выполнялся там атомарно. В памяти
+    процесса хранятся не больше MAX_ENTRIES значений размером до
+    MAX_VALUE_SIZE байт, каждое не дольше LOCAL_TIMEOUT секунд. Память
+    общая для всех потоков процесса, использующих тот же общий кеш
+    и CHANNEL.
+
+    Изменение и удаление ключа записывается в журнал в общем кеше;
+    процессы читают журнал не чаще раза в SYNC_INTERVAL секунд и удаляют
+    изменённые ключи из своей памяти. Если журнал прочитать не удалось
+    (записи устарели или общий кеш очищен), память процесса очищается
+    целиком.
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+    max_log_fetch = 1000
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = location
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 30)
+        self._max_value_size = options.get('MAX_VALUE_SIZE', 64 * 1024)
+        self._sync_interval = options.get('SYNC_INTERVAL', 0.1)
+        self._log_timeout = options.get('LOG_TIMEOUT', 300)
+        self._channel = options.get('CHANNEL', 'tiered-cache')
+        self._tier = get_local_tier((location, self._channel))
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._sync()
+        tier = self._tier
+        with tier.lock:
+            entry = tier.entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                tier.entries.move_to_end(key)
+                tier.stats['local_hits'] += 1
+                count('local_hits')
+                return pickle.loads(entry[0])
+            if entry is not None:
+                del tier.entries[key]
+            tier.stats['local_misses'] += 1
+            count('local_misses')
+
+        data = self.shared.get(key)
+        with tier.lock:
+            result = 'shared_misses' if data is None else 'shared_hits'
+            tier.stats[result] += 1
+        count(result)
+        if data is None:
+            return default
+        value, data = self._decode(data)
+        self._store_local(key, data)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        timeout = self._get_timeout(timeout)
+        data = pickle.dumps(value, self.pickle_protocol)
+        self.shared.set(key, self._encode(value, data), timeout)
+        self._publish([key])
+        self._store_local(key, data, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        timeout = self._get_timeout(timeout)
+        data = pickle.dumps(value, self.pickle_protocol)
+        if not self.shared.add(key, self._encode(value, data), timeout):
+            return False
+        # Другие процессы могли сохранить в памяти значение, которое уже
+        # истекло в общем кеше.
+        self._publish([key])
+        self._store_local(key, data, timeout)
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        try:
+            value = self.shared.incr(key, delta)
+        except TypeError:
+            raise ValueError(f"Key '{key}' is not an integer") from None
+        self._forget_local([key])
+        self._publish([key])
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self.shared.touch(key, self._get_timeout(timeout))
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._forget_local([key])
+        deleted = self.shared.delete(key)
+        self._publish([key])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_key(key, version=version) for key in keys]
+        self._forget_local(keys)
+        self.shared.delete_many(keys)
+        self._publish(keys)
+
+    def clear(self):
+        self.shared.clear()
+        self._clear_local()
+
+    def close(self, **kwargs):
+        pass
+
+    def stats(self):
+        """Число попаданий и доля попаданий на каждом уровне."""
+        with self._tier.lock:
+            stats = dict(self._tier.stats)
+            entries = len(self._tier.entries)
+        result = {'entries': entries}
+        for tier in ('local', 'shared'):
+            hits = stats.get(f'{tier}_hits', 0)
+            misses = stats.get(f'{tier}_misses', 0)
+            result[tier] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+            }
+        result['evictions'] = stats.get('evictions', 0)
+        result['invalidations'] = stats.get('invalidations', 0)
+        return result
+
+    def _get_timeout(self, timeout):
+        """Время жизни в секундах; None — без ограничения."""
+        if timeout is DEFAULT_TIMEOUT:
+            return self.default_timeout
+        return timeout
+
+    @staticmethod
+    def _encode(value, data):
+        """Значение для общего кеша: int как есть, остальное — байты."""
+        if type(value) is int:
+            return value
+        return data
+
+    def _decode(self, data):
+        """Значение и его байты для памяти процесса."""
+        if isinstance(data, int):
+            return data, pickle.dumps(data, self.pickle_protocol)
+        return pickle.loads(data), data
+
+    def _store_local(self, key, data, timeout=None):
+        ttl = self._local_timeout
+        if timeout is not None:
+            ttl = min(ttl, timeout)
+        tier = self._tier
+        with tier.lock:
+            if ttl <= 0 or len(data) > self._max_value_size:
+                tier.entries.pop(key, None)
+                return
+            tier.entries[key] = (data, time.monotonic() + ttl)
+            tier.entries.move_to_end(key)
+            while len(tier.entries) > self._max_entries:
+                tier.entries.popitem(last=False)
+                tier.stats['evictions'] += 1
+
+    def _forget_local(self, keys):
+        with self._tier.lock:
+            for key in keys:
+                self._tier.entries.pop(key, None)
+
+    def _clear_local(self):
+        with self._tier.lock:
+            self._tier.entries.clear()
+
+    def _log_key(self, name):
+        return f'{self._channel}:{name}'
+
+    def _publish(self, keys):
+        shared = self.shared
+        sequence_key = self._log_key('sequence')
+        # Журнал после очистки общего кеша начинается с текущего времени
+        # в наносекундах, поэтому его номера не совпадают с прежними.
+        shared.add(sequence_key, time.time_ns(), None)
+        try:
+            sequence = shared.incr(sequence_key)
+        except ValueError:
+            # Общий кеш очистили между add и incr.
+            shared.add(sequence_key, time.time_ns(), None)
+            sequence = shared.incr(sequence_key)
+        shared.set(self._log_key(sequence), keys, self._log_timeout)
+
+    def _sync(self):
+        tier = self._tier
+        now = time.monotonic()
+        if now < tier.next_sync or not tier.sync_lock.acquire(False):
+            return
+        try:
+            tier.next_sync = now + self._sync_interval
+            sequence = self.shared.get(self._log_key('sequence'), 0)
+            seen, tier.seen = tier.seen, sequence
+            if seen is not None and sequence != seen:
+                self._apply_log(seen, sequence)
+        finally:
+            tier.sync_lock.release()
+
+    def _apply_log(self, seen, sequence):
+        if sequence < seen or sequence - seen > self.max_log_fetch:
+            self._clear_local()
+            return
+        entries = self.shared.get_many([
+            self._log_key(number) for number in range(seen + 1, sequence + 1)
+        ])
+        if len(entries) < sequence - seen:
+            self._clear_local()
+            return
+        tier = self._tier
+        with tier.lock:
+            for keys in entries.values():
+                for key in keys:
+                    if tier.entries.pop(key, None) is not None:
+                        tier.stats['invalidations'] += 1
@@ -7,3 +7,6 @@ USERNAME_REGEX = r'^[\w.@+-]+\Z'
 UNAVAILABLE_USERNAME = 'me'
 MIN_SCORE = 1
 MAX_SCORE = 10
+BULK_USERS_LIMIT = 5000
+MULTI_GET_TITLES_LIMIT = 100
+MAX_ID = 2 ** 63 - 1
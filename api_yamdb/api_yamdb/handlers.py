@@ -0,0 +1,120 @@
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import close_old_connections
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ThreadPoolReadsMixin:
+    """
+    Параллельное выполнение запросов на чтение под ASGI.
+
+    Синхронные представления Django под ASGI выполняет в одном общем
+    потоке, поэтому запросы одного процесса обрабатываются по очереди.
+    Для представлений с атрибутом async_reads запросы на чтение выполняются
+    в пуле потоков цикла событий, каждый со своим соединением с базой
+    данных; запись по-прежнему идёт через общий поток.
+    """
+
+    def make_view_atomic(self, view):
+        view = super().make_view_atomic(view)
+        if not getattr(view, 'async_reads', False):
+            return view
+        run_in_pool = sync_to_async(
+            self._run_read_view, thread_sensitive=False,
+        )
+        run_in_thread = sync_to_async(view, thread_sensitive=True)
+
+        async def async_view(request, *args, **kwargs):
+            if request.method in READ_METHODS:
+                return await run_in_pool(view, request, *args, **kwargs)
+            return await run_in_thread(request, *args, **kwargs)
+
+        return async_view
+
+    @staticmethod
+    def _run_read_view(view, request, *args, **kwargs):
+        # Соединения потоков пула не закрываются сигналами
+        # request_started/request_finished, поэтому это делается здесь.
+        close_old_connections()
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+            return response
+        finally:
+            close_old_connections()
+
+
+class ThreadPoolReadsHandler(ThreadPoolReadsMixin, BaseHandler):
+    pass
+
+
+class RouteScopedMiddlewareMixin:
+    """
+    Отдельная цепочка middleware для запросов к API.
+
+    Запросы, путь которых начинается с одного из LEAN_MIDDLEWARE_PATHS,
+    проходят только через LEAN_MIDDLEWARE: API аутентифицируется по JWT,
+    и сессии, CSRF, сообщения и защита от clickjacking ему не нужны.
+    Остальные запросы (админка, redoc) обрабатываются полной цепочкой
+    из MIDDLEWARE.
+    """
+
+    lean_handler_class = BaseHandler
+
+    def load_middleware(self, is_async=False):
+        super().load_middleware(is_async)
+        self._lean_paths = tuple(settings.LEAN_MIDDLEWARE_PATHS)
+        self._lean_handler = self.lean_handler_class()
+        full_middleware = settings.MIDDLEWARE
+        # BaseHandler читает список middleware только из настроек, поэтому
+        # на время сборки второй цепочки он подменяется. Это происходит
+        # один раз при запуске процесса, до обработки запросов.
+        settings.MIDDLEWARE = settings.LEAN_MIDDLEWARE
+        try:
+            self._lean_handler.load_middleware(is_async)
+        finally:
+            settings.MIDDLEWARE = full_middleware
+
+    def _get_handler(self, request):
+        if request.path_info.startswith(self._lean_paths):
+            return self._lean_handler
+        return None
+
+    def get_response(self, request):
+        handler = self._get_handler(request)
+        if handler is not None:
+            return handler.get_response(request)
+        return super().get_response(request)
+
+    async def get_response_async(self, request):
+        handler = self._get_handler(request)
+        if handler is not None:
+            return await handler.get_response_async(request)
+        return await super().get_response_async(request)
+
+
+class RouteScopedWSGIHandler(RouteScopedMiddlewareMixin, WSGIHandler):
+    pass
+
+
+def get_wsgi_application():
+    """Аналог django.core.wsgi.get_wsgi_application."""
+    django.setup(set_prefix=False)
+    return RouteScopedWSGIHandler()
+
+
+class RouteScopedASGIHandler(ThreadPoolReadsMixin, RouteScopedMiddlewareMixin,
+                             ASGIHandler):
+    lean_handler_class = ThreadPoolReadsHandler
+
+
+def get_asgi_application():
+    """Аналог django.core.asgi.get_asgi_application."""
+    django.setup(set_prefix=False)
+    return RouteScopedASGIHandler()
@@ -0,0 +1,506 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, PermissionDenied
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from api_yamdb import cache, single_flight
+from api_yamdb.write_queue import get_write_queue
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+QUERY_TIME_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+# Имя → тип, описание и границы корзин гистограммы.
+METRICS = {
+    'yamdb_http_requests_total': (
+        'counter', 'Обработанные запросы', None),
+    'yamdb_http_request_duration_seconds': (
+        'histogram', 'Время обработки запроса', DURATION_BUCKETS),
+    'yamdb_db_queries_per_request': (
+        'histogram', 'SQL запросов на запрос', QUERY_COUNT_BUCKETS),
+    'yamdb_db_query_duration_seconds': (
+        'histogram', 'Время SQL запросов на запрос', QUERY_TIME_BUCKETS),
+    'yamdb_http_requests_in_flight': (
+        'gauge', 'Запросы в обработке', None),
+    'yamdb_cache_requests_total': (
+        'counter', 'Чтения TieredCache по уровням', None),
+    'yamdb_cache_hit_ratio': (
+        'gauge', 'Доля попаданий TieredCache по уровням', None),
+    'yamdb_response_cache_total': (
+        'counter', 'Чтения кеша ответов (single_flight)', None),
+    'yamdb_response_cache_hit_ratio': (
+        'gauge', 'Доля ответов из кеша без пересчёта', None),
+    'yamdb_write_queue_acquired_total': (
+        'counter', 'Транзакции, прошедшие очередь на запись', None),
+    'yamdb_write_queue_timeouts_total': (
+        'counter', 'Таймауты очереди на запись', None),
+    'yamdb_write_queue_wait_seconds_total': (
+        'counter', 'Суммарное ожидание в очереди на запись', None),
+    'yamdb_write_queue_depth': (
+        'gauge', 'Транзакции в очереди на запись', None),
+}
+
+RESPONSE_CACHE_HITS = ('hits', 'stale')
+
+CACHE_RESULTS = {'hits': 'hit', 'misses': 'miss'}
+
+# Сумма счётчиков и гистограмм завершившихся процессов.
+AGGREGATE_FILE = 'aggregate.json'
+LOCK_FILE = '.lock'
+
+
+class MetricsStore:
+    """
+    Метрики процесса со сбросом в файл.
+
+    Запрос меняет только словари в памяти под блокировкой. Не чаще раза
+    в flush_interval секунд состояние процесса записывается в файл
+    <directory>/<pid>-<метка запуска>.json (запись во временный файл
+    и os.replace): процесс, получивший pid завершившегося, пишет в свой
+    файл. /metrics суммирует файлы всех процессов; счётчики и гистограммы
+    завершившихся процессов переносятся в aggregate.json, а их файлы
+    удаляются. Показатели (gauge) учитываются только у работающих.
+    """
+
+    def __init__(self, directory, flush_interval):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._in_flight = 0
+        self._next_flush = 0
+        self._pid = None
+        self._file_name = None
+
+    def _check_process(self):
+        # Дочерний процесс не должен повторно учитывать метрики родителя.
+        if self._pid == os.getpid():
+            return
+        self._counters.clear()
+        self._histograms.clear()
+        self._in_flight = 0
+        self._pid = os.getpid()
+        self._file_name = f'{self._pid}-{uuid.uuid4().hex[:8]}.json'
+
+    def request_started(self):
+        with self._lock:
+            self._check_process()
+            self._in_flight += 1
+
+    def request_finished(self, view, method, status, duration, queries,
+                         query_time):
+        labels = (('view', view), ('method', method))
+        with self._lock:
+            self._in_flight -= 1
+            self._counters[(
+                'yamdb_http_requests_total', labels + (('status', status),),
+            )] += 1
+            self._observe('yamdb_http_request_duration_seconds', labels,
+                          duration)
+            self._observe('yamdb_db_queries_per_request', labels[:1],
+                          queries)
+            self._observe('yamdb_db_query_duration_seconds', labels[:1],
+                          query_time)
+        self.flush()
+
+    def _observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        histogram = self._histograms.get((name, labels))
+        if histogram is None:
+            histogram = self._histograms[(name, labels)] = (
+                [0] * (len(buckets) + 1) + [0.0]
+            )
+        histogram[bisect_left(buckets, value)] += 1
+        histogram[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            self._check_process()
+            return {
+                'pid': os.getpid(),
+                'file_name': self._file_name,
+                'counters': [
+                    [name, labels, value]
+                    for (name, labels), value in self._counters.items()
+                ] + collect_component_counters(),
+                'histograms': [
+                    [name, labels, histogram]
+                    for (name, labels), histogram in self._histograms.items()
+                ],
+                'gauges': [
+                    ['yamdb_http_requests_in_flight', (), self._in_flight],
+                ] + collect_component_gauges(),
+            }
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not force and now < self._next_flush:
+            return
+        self._next_flush = now + self.flush_interval
+        data = self.snapshot()
+        os.makedirs(self.directory, exist_ok=True)
+        write_json_file(self.directory, data['file_name'], data)
+
+    def collect(self):
+        """Сумма метрик всех процессов: словари по (имя, метки)."""
+        self.flush(force=True)
+        counters = defaultdict(float)
+        histograms = {}
+        gauges = defaultdict(float)
+        # Под блокировкой: файл не может исчезнуть, ещё не попав
+        # в aggregate.json, пока он читается.
+        with directory_lock(self.directory):
+            fold_dead_processes(self.directory)
+            aggregate = read_json_file(self.directory, AGGREGATE_FILE)
+            if aggregate is not None:
+                merge(counters, histograms, aggregate)
+            for data in read_process_files(self.directory):
+                merge(counters, histograms, data)
+                if is_alive(data['pid']):
+                    for name, labels, value in data['gauges']:
+                        gauges[(name, to_labels(labels))] += value
+        add_hit_ratios(counters, gauges)
+        return counters, histograms, gauges
+
+
+def merge(counters, histograms, data):
+    """Добавить счётчики и гистограммы файла к суммам."""
+    for name, labels, value in data['counters']:
+        counters[(name, to_labels(labels))] += value
+    for name, labels, values in data['histograms']:
+        key = (name, to_labels(labels))
+        if key in histograms:
+            values = [old + new for old, new in zip(histograms[key], values)]
+        histograms[key] = values
+
+
+@contextmanager
+def directory_lock(directory):
+    """Блокировка каталога метрик между процессами (flock)."""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, LOCK_FILE), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def fold_dead_processes(directory):
+    """
+    Перенести счётчики и гистограммы завершившихся процессов в
+    aggregate.json и удалить их файлы. Вызывается под directory_lock;
+    имена перенесённых файлов хранятся в aggregate.json, пока файлы
+    не удалены, на случай сбоя между записью и удалением.
+    """
+    aggregate = read_json_file(directory, AGGREGATE_FILE) or {
+        'counters': [], 'histograms': [], 'folded': [],
+    }
+    folded = {
+        name for name in aggregate['folded']
+        if os.path.exists(os.path.join(directory, name))
+    }
+    dead = [
+        data for data in read_process_files(directory)
+        if not is_alive(data['pid']) and data['file_name'] not in folded
+    ]
+    if dead or folded != set(aggregate['folded']):
+        counters = defaultdict(float)
+        histograms = {}
+        for data in [aggregate] + dead:
+            merge(counters, histograms, data)
+        folded.update(data['file_name'] for data in dead)
+        write_json_file(directory, AGGREGATE_FILE, {
+            'counters': [
+                [name, labels, value]
+                for (name, labels), value in counters.items()
+            ],
+            'histograms': [
+                [name, labels, values]
+                for (name, labels), values in histograms.items()
+            ],
+            'folded': sorted(folded),
+        })
+    remove_files(directory, folded)
+
+
+def remove_files(directory, names):
+    for name in names:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def write_json_file(directory, name, data):
+    """Запись во временный файл и os.replace: читатели не видят части."""
+    descriptor, path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+    os.replace(path, os.path.join(directory, name))
+
+
+def read_json_file(directory, name):
+    try:
+        with open(os.path.join(directory, name), encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        # Файл удалён или заменён во время чтения.
+        return None
+
+
+def to_labels(labels):
+    return tuple(tuple(pair) for pair in labels)
+
+
+def is_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def read_process_files(directory):
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if not name.endswith('.json') or name == AGGREGATE_FILE:
+            continue
+        data = read_json_file(directory, name)
+        if data is not None:
+            yield data
+
+
+def collect_component_counters():
+    """Счётчики кешей и очереди на запись этого процесса."""
+    counters = []
+    with cache.stats_lock:
+        cache_stats = dict(cache.stats)
+    with single_flight.stats_lock:
+        response_cache_stats = dict(single_flight.stats)
+    for name, value in cache_stats.items():
+        tier, result = name.split('_')
+        counters.append([
+            'yamdb_cache_requests_total',
+            (('tier', tier), ('result', CACHE_RESULTS[result])), value,
+        ])
+    counters += [
+        ['yamdb_response_cache_total', (('result', result),), value]
+        for result, value in response_cache_stats.items()
+    ]
+    write_queue = get_write_queue()
+    if write_queue is not None:
+        stats = write_queue.stats()
+        counters += [
+            ['yamdb_write_queue_acquired_total', (), stats['acquired']],
+            ['yamdb_write_queue_timeouts_total', (), stats['timeouts']],
+            ['yamdb_write_queue_wait_seconds_total', (),
+             stats['wait_seconds_total']],
+        ]
+    return counters
+
+
+def collect_component_gauges():
+    write_queue = get_write_queue()
+    if write_queue is None:
+        return []
+    return [['yamdb_write_queue_depth', (), write_queue.depth]]
+
+
+def add_hit_ratios(counters, gauges):
+    tiers = defaultdict(lambda: defaultdict(float))
+    response_cache = defaultdict(float)
+    for (name, labels), value in counters.items():
+        labels = dict(labels)
+        if name == 'yamdb_cache_requests_total':
+            tiers[labels['tier']][labels['result']] += value
+        elif name == 'yamdb_response_cache_total':
+            response_cache[labels['result']] += value
+    for tier, results in tiers.items():
+        total = results['hit'] + results['miss']
+        gauges[('yamdb_cache_hit_ratio', (('tier', tier),))] = (
+            results['hit'] / total if total else 0.0
+        )
+    total = sum(response_cache.values())
+    if total:
+        gauges[('yamdb_response_cache_hit_ratio', ())] = sum(
+            response_cache[result] for result in RESPONSE_CACHE_HITS
+        ) / total
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\').replace(
+            '"', r'\"',
+        ).replace('\n', r'\n'))
+        for name, value in labels
+    ) + '}'
+
+
+def format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def render_histogram(name, labels, values):
+    buckets = METRICS[name][2]
+    lines = []
+    cumulative = 0
+    for bound, count in zip(buckets + ('+Inf',), values[:-1]):
+        cumulative += count
+        lines.append(f'{name}_bucket'
+                     f'{format_labels(labels + (("le", bound),))} '
+                     f'{cumulative}')
+    lines.append(f'{name}_sum{format_labels(labels)} '
+                 f'{format_number(values[-1])}')
+    lines.append(f'{name}_count{format_labels(labels)} {cumulative}')
+    return lines
+
+
+def render(counters, histograms, gauges):
+    """Текстовый формат Prometheus (exposition format 0.0.4)."""
+    series = defaultdict(list)
+    for (name, labels), value in {**counters, **gauges}.items():
+        series[name].append(
+            f'{name}{format_labels(labels)} {format_number(value)}'
+        )
+    for (name, labels), values in sorted(histograms.items()):
+        series[name] += render_histogram(name, labels, values)
+    lines = []
+    for name, (kind, description, _) in METRICS.items():
+        if name not in series:
+            continue
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines += sorted(series[name]) if kind != 'histogram' else series[name]
+    return '\n'.join(lines) + '\n'
+
+
+_store = None
+
+# Счётчик SQL запросов текущего запроса [число, время]. Переменная
+# контекста переходит в потоки пула, где под ASGI выполняются чтения
+# (api_yamdb.handlers.ThreadPoolReadsMixin), поэтому их запросы тоже
+# учитываются.
+_query_counter = ContextVar('metrics_query_counter', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    counter = _query_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        counter[0] += 1
+        counter[1] += time.perf_counter() - started
+
+
+def install_query_counter(connection, **kwargs):
+    """Обёртка execute_wrapper на соединении, один раз на объект."""
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def get_store():
+    """Хранилище метрик процесса или None, если метрики выключены."""
+    global _store
+    options = settings.METRICS
+    if not options['ENABLED']:
+        return None
+    if _store is None:
+        _store = MetricsStore(options['DIRECTORY'], options['FLUSH_INTERVAL'])
+        atexit.register(_store.flush, force=True)
+        connection_created.connect(
+            install_query_counter, dispatch_uid='metrics_query_counter',
+        )
+    return _store
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.route
+
+
+class MetricsMiddleware:
+    """
+    Метрики запросов: число по представлению, методу и статусу,
+    гистограммы времени обработки, числа и времени SQL запросов,
+    запросы в обработке. SQL запросы считаются обёрткой execute_wrapper,
+    которая ставится на каждое соединение процесса, включая соединения
+    потоков пула ASGI.
+    """
+
+    def __init__(self, get_response):
+        self.store = get_store()
+        if self.store is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Соединения, открытые до включения метрик, сигнал не застал.
+        for connection in connections.all():
+            install_query_counter(connection)
+        queries = [0, 0.0]
+        token = _query_counter.set(queries)
+        self.store.request_started()
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            _query_counter.reset(token)
+            self.store.request_finished(
+                get_view_name(request), request.method, status,
+                time.perf_counter() - started, *queries,
+            )
+
+
+def metrics_view(request):
+    """
+    Метрики всех процессов сервера в формате Prometheus. Доступны только
+    с адресов METRICS['ALLOWED_IPS'].
+    """
+    store = get_store()
+    if store is None:
+        raise Http404
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS['ALLOWED_IPS']:
+        raise PermissionDenied
+    return HttpResponse(render(*store.collect()), content_type=CONTENT_TYPE)
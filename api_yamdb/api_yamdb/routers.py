@@ -0,0 +1,77 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+PRIMARY_DATABASE = 'default'
+
+_use_replicas = ContextVar('use_replicas', default=False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Разрешить чтение с реплик внутри блока."""
+    token = _use_replicas.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replicas.reset(token)
+
+
+def enable_replica_reads():
+    """Разрешить чтение с реплик до вызова reset_replica_reads(token)."""
+    return _use_replicas.set(True)
+
+
+def reset_replica_reads(token):
+    _use_replicas.reset(token)
+
+
+def replica_reads_enabled():
+    return _use_replicas.get()
+
+
+def _get_sticky_key(user_id):
+    return f'primary_sticky:{user_id}'
+
+
+def mark_primary_sticky(user_id):
+    """
+    После записи чтения пользователя READ_YOUR_WRITES_WINDOW секунд идут
+    в основную базу, пока реплики не получат изменения.
+    """
+    caches[settings.REPLICA_STICKY_CACHE].set(
+        _get_sticky_key(user_id), True, settings.READ_YOUR_WRITES_WINDOW,
+    )
+
+
+def is_primary_sticky(user_id):
+    return caches[settings.REPLICA_STICKY_CACHE].get(
+        _get_sticky_key(user_id), False,
+    )
+
+
+class ReplicaRouter:
+    """
+    Запись — всегда в основную базу. Чтение — с одной из реплик
+    DATABASE_REPLICA_ALIASES, но только там, где это явно разрешено
+    (replica_reads); остальной код, включая админку и команды, читает
+    из основной базы.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICA_ALIASES
+        if replicas and _use_replicas.get():
+            return random.choice(replicas)
+        return PRIMARY_DATABASE
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY_DATABASE
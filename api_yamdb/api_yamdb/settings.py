@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from decouple import config
+from decouple import Csv, config
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -31,6 +31,8 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'users.User'
 
 MIDDLEWARE = [
+    'api_yamdb.metrics.MetricsMiddleware',
+    'api_yamdb.traffic.TrafficCaptureMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -40,6 +42,61 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Запросы к API обрабатываются сокращённой цепочкой middleware
+# (см. api_yamdb/handlers.py): сессии, CSRF, сообщения и X-Frame-Options
+# нужны только админке.
+
+LEAN_MIDDLEWARE_PATHS = ('/api/',)
+
+LEAN_MIDDLEWARE = [
+    'api_yamdb.metrics.MetricsMiddleware',
+    'api_yamdb.traffic.TrafficCaptureMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+# Метрики в формате Prometheus на /metrics (см. api_yamdb/metrics.py).
+# Каждый процесс сервера сбрасывает свои метрики в файл в METRICS_DIRECTORY
+# не чаще раза в METRICS_FLUSH_INTERVAL секунд; /metrics суммирует файлы.
+
+METRICS = {
+    'ENABLED': config('METRICS_ENABLED', default=False, cast=bool),
+    'DIRECTORY': config(
+        'METRICS_DIRECTORY', default=str(BASE_DIR / 'metrics')
+    ),
+    'FLUSH_INTERVAL': config(
+        'METRICS_FLUSH_INTERVAL', default=1.0, cast=float
+    ),
+    # Адреса, с которых доступен /metrics.
+    'ALLOWED_IPS': config(
+        'METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=Csv()
+    ),
+}
+
+# Запись запросов для воспроизведения (см. api_yamdb/traffic.py и
+# benchmarks/replay.py). {pid} в пути даёт каждому процессу свой файл;
+# файл ротируется по достижении MAX_BYTES.
+
+TRAFFIC_CAPTURE = {
+    'ENABLED': config('TRAFFIC_CAPTURE_ENABLED', default=False, cast=bool),
+    'PATH': config(
+        'TRAFFIC_CAPTURE_PATH',
+        default=str(BASE_DIR / 'traffic' / 'capture-{pid}.jsonl'),
+    ),
+    'MAX_BYTES': config(
+        'TRAFFIC_CAPTURE_MAX_BYTES', default=10485760, cast=int
+    ),
+    'BACKUP_COUNT': config(
+        'TRAFFIC_CAPTURE_BACKUP_COUNT', default=5, cast=int
+    ),
+    'MAX_BODY_SIZE': config(
+        'TRAFFIC_CAPTURE_MAX_BODY_SIZE', default=16384, cast=int
+    ),
+    'SAMPLE_RATE': config(
+        'TRAFFIC_CAPTURE_SAMPLE_RATE', default=1.0, cast=float
+    ),
+}
+
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
@@ -61,6 +118,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+ASGI_APPLICATION = 'api_yamdb.asgi.application'
+
 # Database
 
 DATABASES = {
@@ -70,10 +129,90 @@ DATABASES = {
     }
 }
 
+# Профиль SQLite для работы под нагрузкой: WAL журнал (читатели не ждут
+# писателя), ожидание блокировки вместо ошибки "database is locked",
+# отображение файла в память и постоянные соединения.
+
+SQLITE_PRODUCTION = config('SQLITE_PRODUCTION', default=False, cast=bool)
+
+SQLITE_PRAGMAS = {
+    'journal_mode': config('SQLITE_JOURNAL_MODE', default='WAL'),
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int),
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=268435456, cast=int),
+    'cache_size': config('SQLITE_CACHE_SIZE', default=-65536, cast=int),
+    'temp_store': config('SQLITE_TEMP_STORE', default='MEMORY'),
+}
+
+if SQLITE_PRODUCTION:
+    DATABASES['default'].update({
+        'ENGINE': 'api_yamdb.backends.sqlite3',
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+        'OPTIONS': {
+            'init_command': ';'.join(
+                f'PRAGMA {name}={value}'
+                for name, value in SQLITE_PRAGMAS.items()
+            ),
+            'transaction_mode': 'IMMEDIATE',
+        },
+    })
+
+# Реплики для чтения: пути к копиям основной базы через запятую.
+# Запросы на чтение из api/views.py уходят на реплики, запись и остальные
+# чтения — в основную базу. После записи чтения пользователя
+# READ_YOUR_WRITES_WINDOW секунд идут в основную базу. Реплики обновляет
+# команда replicate_db.
+
+DATABASE_REPLICAS = config('DATABASE_REPLICAS', default='', cast=Csv())
+
+DATABASE_REPLICA_ALIASES = []
+
+for index, replica_name in enumerate(DATABASE_REPLICAS):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': replica_name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICA_ALIASES.append(alias)
+
+DATABASE_ROUTERS = ['api_yamdb.routers.ReplicaRouter']
+
+READ_YOUR_WRITES_WINDOW = config(
+    'READ_YOUR_WRITES_WINDOW', default=5.0, cast=float
+)
+
+REPLICA_STICKY_CACHE = 'shared'
+
+# Очередь транзакций на запись для отзывов и комментариев
+# (см. api_yamdb/write_queue.py). WRITE_QUEUE_LOCK_FILE включает
+# блокировку между процессами.
+
+WRITE_QUEUE = {
+    'ENABLED': config('WRITE_QUEUE_ENABLED', default=False, cast=bool),
+    'TIMEOUT': config('WRITE_QUEUE_TIMEOUT', default=10.0, cast=float),
+    'LOCK_FILE': config('WRITE_QUEUE_LOCK_FILE', default='') or None,
+}
+
 # Auth model
 
 AUTH_USER_MODEL = 'users.User'
 
+# JWT settings
+# При JWT_STATELESS_AUTH=True запросы на чтение проверяют права по данным
+# из access токена, не загружая пользователя из базы данных.
+
+JWT_STATELESS_AUTH = config('JWT_STATELESS_AUTH', default=True, cast=bool)
+
+JWT_VERIFIED_TOKEN_CACHE_SIZE = config(
+    'JWT_VERIFIED_TOKEN_CACHE_SIZE', default=4096, cast=int
+)
+
+TOKEN_VERSION_CACHE = 'shared'
+TOKEN_VERSION_CACHE_TIMEOUT = config(
+    'TOKEN_VERSION_CACHE_TIMEOUT', default=3600, cast=int
+)
+
 # DRF settings
 
 REST_FRAMEWORK = {
@@ -81,7 +220,9 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication'
+        if JWT_STATELESS_AUTH
+        else 'users.authentication.VersionedJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
@@ -89,8 +230,84 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.OrderingFilter',
     ],
+    'DEFAULT_THROTTLE_RATES': {
+        'signup_ip': config('THROTTLE_SIGNUP_IP', default='30/hour'),
+        'signup_username': config('THROTTLE_SIGNUP_USERNAME', default='5/hour'),
+        'signup_email': config('THROTTLE_SIGNUP_EMAIL', default='5/hour'),
+        'token_ip': config('THROTTLE_TOKEN_IP', default='60/hour'),
+        'token_username': config('THROTTLE_TOKEN_USERNAME', default='10/hour'),
+    },
 }
 
+# Cache
+
+# Кеш по умолчанию — LRU в памяти процесса перед общим кешем
+# (см. api_yamdb.cache.TieredCache): справочники и популярные произведения
+# читаются из памяти, а изменения видны всем процессам.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'api_yamdb.cache.TieredCache',
+        'LOCATION': 'shared',
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config(
+                'CACHE_LOCAL_MAX_ENTRIES', default=10000, cast=int
+            ),
+            'MAX_VALUE_SIZE': config(
+                'CACHE_LOCAL_MAX_VALUE_SIZE', default=65536, cast=int
+            ),
+            'LOCAL_TIMEOUT': config(
+                'CACHE_LOCAL_TIMEOUT', default=30, cast=float
+            ),
+            'SYNC_INTERVAL': config(
+                'CACHE_SYNC_INTERVAL', default=0.1, cast=float
+            ),
+        },
+    },
+    # Общий для всех процессов кеш: лимиты запросов и другие счётчики.
+    'shared': {
+        'BACKEND': 'api_yamdb.cache.SQLiteCache',
+        'LOCATION': config(
+            'SHARED_CACHE_LOCATION', default=str(BASE_DIR / 'cache.sqlite3')
+        ),
+    },
+}
+
+THROTTLE_CACHE = 'shared'
+
+# Кеш ответов для списков и карточек произведений и списков отзывов
+# (см. api/mixins.py: CachedReadMixin). Устаревшее значение отдаётся ещё
+# STALE_TIMEOUT секунд, пока один запрос его пересчитывает.
+
+RESPONSE_CACHE = {
+    'ENABLED': config('RESPONSE_CACHE_ENABLED', default=True, cast=bool),
+    'CACHE': 'default',
+    'TIMEOUT': config('RESPONSE_CACHE_TIMEOUT', default=60, cast=float),
+    'STALE_TIMEOUT': config(
+        'RESPONSE_CACHE_STALE_TIMEOUT', default=30, cast=float
+    ),
+    'LOCK_TIMEOUT': config(
+        'RESPONSE_CACHE_LOCK_TIMEOUT', default=5, cast=float
+    ),
+    'BETA': config('RESPONSE_CACHE_BETA', default=1.0, cast=float),
+}
+
+# Готовые JSON представления произведений (titles.TitleRepresentation),
+# из которых собираются списки и карточки произведений.
+
+MATERIALIZED_TITLES = config('MATERIALIZED_TITLES', default=True, cast=bool)
+
+# Справочники slug → id категорий и жанров в памяти процесса
+# (см. titles/registry.py): версия хранится в кеше, а справочник
+# перечитывается не реже раза в REFERENCE_REGISTRY_MAX_AGE секунд.
+
+REFERENCE_REGISTRY_CACHE = 'default'
+
+REFERENCE_REGISTRY_MAX_AGE = config(
+    'REFERENCE_REGISTRY_MAX_AGE', default=300, cast=float
+)
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -139,3 +356,23 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+
+# Очередь писем с кодами подтверждения.
+# По умолчанию письма отправляет команда send_confirmation_emails,
+# а не обработчик запроса. EMAIL_OUTBOX_ASYNC=False — отправка сразу
+# в обработчике (для разработки и тестов).
+
+EMAIL_OUTBOX_ASYNC = config('EMAIL_OUTBOX_ASYNC', default=True, cast=bool)
+
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=100, cast=int)
+
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+
+EMAIL_OUTBOX_RETRY_DELAY = config('EMAIL_OUTBOX_RETRY_DELAY', default=30, cast=int)
+
+EMAIL_OUTBOX_MAX_RETRY_DELAY = config('EMAIL_OUTBOX_MAX_RETRY_DELAY', default=3600, cast=int)
+
+# Сколько секунд письмо закреплено за отправителем: другие процессы его
+# не берут, а после падения отправителя письмо снова попадает в очередь.
+
+EMAIL_OUTBOX_CLAIM_TIMEOUT = config('EMAIL_OUTBOX_CLAIM_TIMEOUT', default=300, cast=int)
@@ -0,0 +1,104 @@
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.core.cache import caches
+
+stats = Counter()
+stats_lock = threading.Lock()
+
+
+def count(name):
+    with stats_lock:
+        stats[name] += 1
+
+
+def _should_refresh(expires_at, delta, beta, now):
+    """
+    Вероятностное раннее истечение (XFetch): чем ближе срок и чем дольше
+    пересчёт, тем выше вероятность, что запрос пересчитает значение заранее.
+    """
+    return now - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+def get_or_compute(key, compute, timeout, stale_timeout=0, lock_timeout=5.0,
+                   beta=1.0, cache_alias='default', poll_interval=0.01):
+    """
+    Значение из кеша с защитой от одновременного пересчёта.
+
+    Значение пересчитывает только запрос, получивший блокировку ключа
+    (cache.add с таймаутом lock_timeout). Пока оно пересчитывается,
+    остальные запросы получают прежнее значение, если оно устарело
+    не больше чем на stale_timeout секунд, а при его отсутствии ждут
+    нового не дольше lock_timeout секунд и только потом считают сами.
+    """
+    cache = caches[cache_alias]
+    entry = cache.get(key)
+    now = time.time()
+    if entry is not None:
+        value, expires_at, delta = entry
+        if not _should_refresh(expires_at, delta, beta, now):
+            count('hits')
+            return value
+        refreshed = _compute_locked(cache, key, compute, timeout,
+                                    stale_timeout, lock_timeout, expires_at)
+        if refreshed is not None:
+            return refreshed[0]
+        count('stale')
+        return value
+
+    deadline = now + lock_timeout
+    while True:
+        computed = _compute_locked(cache, key, compute, timeout,
+                                   stale_timeout, lock_timeout)
+        if computed is not None:
+            return computed[0]
+        count('waits')
+        time.sleep(poll_interval)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        if time.time() >= deadline:
+            # Владелец блокировки не успел: считаем сами.
+            return _compute(cache, key, compute, timeout, stale_timeout)
+
+
+def _compute_locked(cache, key, compute, timeout, stale_timeout,
+                    lock_timeout, seen_expires_at=None):
+    """
+    Пересчёт под блокировкой; None — блокировка у другого запроса.
+    seen_expires_at — срок значения, которое видел вызывающий.
+    """
+    lock_key = f'{key}:lock'
+    token = uuid.uuid4().hex
+    if not cache.add(lock_key, token, lock_timeout):
+        return None
+    try:
+        # Значение могли пересчитать между чтением и блокировкой.
+        entry = cache.get(key)
+        if (
+            entry is not None
+            and entry[1] != seen_expires_at
+            and entry[1] > time.time()
+        ):
+            return (entry[0],)
+        return (_compute(cache, key, compute, timeout, stale_timeout),)
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def _compute(cache, key, compute, timeout, stale_timeout):
+    started = time.time()
+    value = compute()
+    finished = time.time()
+    count('computed')
+    cache.set(
+        key,
+        (value, finished + timeout, finished - started),
+        timeout + stale_timeout,
+    )
+    return value
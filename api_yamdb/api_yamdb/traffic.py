@@ -0,0 +1,219 @@
+import hmac
+import json
+import logging
+import os
+import random
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, resolve
+
+# Значения этих полей тела и строки запроса не записываются.
+SECRET_FIELDS = frozenset((
+    'password', 'confirmation_code', 'token', 'access', 'refresh',
+))
+
+# Эти поля заменяются псевдонимами (поле → формат): одинаковые значения
+# дают одинаковый псевдоним, поэтому повторные регистрации
+# воспроизводятся как были.
+PSEUDONYMIZED_FIELDS = {
+    'username': '{}',
+    'email': '{}@capture.invalid',
+    'first_name': '{}',
+    'last_name': '{}',
+    'bio': '{}',
+}
+
+# Маршруты, строка поиска которых — начало username.
+USER_SEARCH_ROUTES = frozenset(('users-list',))
+
+HIDDEN_VALUE = '***'
+
+
+def get_pseudonym(value):
+    """Необратимый без SECRET_KEY псевдоним значения."""
+    return hmac.new(
+        settings.SECRET_KEY.encode(), str(value).encode(), 'sha256',
+    ).hexdigest()[:16]
+
+
+def pseudonymize(name, value):
+    return PSEUDONYMIZED_FIELDS[name].format(get_pseudonym(value))
+
+
+def sanitize_value(name, value):
+    if name in SECRET_FIELDS:
+        return HIDDEN_VALUE
+    if name in PSEUDONYMIZED_FIELDS and isinstance(value, str):
+        return pseudonymize(name, value)
+    return sanitize(value)
+
+
+def sanitize(data):
+    """Копия JSON данных без секретов и персональных данных."""
+    if isinstance(data, dict):
+        return {
+            name: sanitize_value(name, value) for name, value in data.items()
+        }
+    if isinstance(data, list):
+        return [sanitize(value) for value in data]
+    return data
+
+
+def sanitize_query(query, search_field=None):
+    """
+    Строка запроса без секретов; search_field — поле из
+    PSEUDONYMIZED_FIELDS, псевдоним которого получает параметр search.
+    """
+    items = []
+    for name, value in parse_qsl(query, keep_blank_values=True):
+        if name == 'search' and search_field is not None:
+            items.append((name, pseudonymize(search_field, value)))
+        else:
+            items.append((name, sanitize_value(name, value)))
+    return urlencode(items)
+
+
+def sanitize_path(path, urlconf=None):
+    """
+    Путь и параметр search для строки запроса. Сегменты пути, которые
+    маршрут передаёт как поле из PSEUDONYMIZED_FIELDS (username),
+    заменяются тем же псевдонимом, что и в теле запроса.
+    """
+    try:
+        match = resolve(path, urlconf)
+    except Resolver404:
+        return path, None
+    segments = path.split('/')
+    for name, value in match.kwargs.items():
+        if name in PSEUDONYMIZED_FIELDS and isinstance(value, str):
+            segments = [
+                pseudonymize(name, value) if segment == value else segment
+                for segment in segments
+            ]
+    search_field = (
+        'username' if match.url_name in USER_SEARCH_ROUTES else None
+    )
+    return '/'.join(segments), search_field
+
+
+def get_content_length(request):
+    """Размер тела по CONTENT_LENGTH; некорректное значение — 0."""
+    try:
+        return max(int(request.META.get('CONTENT_LENGTH') or 0), 0)
+    except ValueError:
+        return 0
+
+
+class TrafficWriter:
+    """
+    Запись строк JSON в файл с ротацией по размеру.
+
+    Файл открывается при первой записи в процессе: {pid} в пути даёт
+    каждому процессу сервера свой файл, поэтому ротация не мешает
+    другим процессам.
+    """
+
+    def __init__(self, path, max_bytes, backup_count):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        self._handler = None
+        self._pid = None
+
+    def _get_handler(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            path = self.path.format(pid=pid)
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._handler = RotatingFileHandler(
+                path, maxBytes=self.max_bytes,
+                backupCount=self.backup_count, encoding='utf-8',
+            )
+            self._pid = pid
+        return self._handler
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._get_handler().handle(logging.makeLogRecord({'msg': line}))
+
+    def close(self):
+        with self._lock:
+            if self._handler is not None:
+                self._handler.close()
+                self._handler = None
+                self._pid = None
+
+
+class TrafficCaptureMiddleware:
+    """
+    Запись запросов для воспроизведения (python -m benchmarks.replay).
+
+    Для каждого запроса записываются метод, путь, строка запроса, тело
+    JSON не больше MAX_BODY_SIZE байт, статус ответа и время обработки.
+    Секреты (пароли, коды подтверждения, токены) не записываются,
+    username (в теле, пути и строке поиска), email, поля профиля
+    и заголовок Authorization заменяются псевдонимами. При выключенной
+    записи middleware исключается из цепочки.
+    """
+
+    def __init__(self, get_response):
+        options = settings.TRAFFIC_CAPTURE
+        if not options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = options['SAMPLE_RATE']
+        self.max_body_size = options['MAX_BODY_SIZE']
+        self.writer = TrafficWriter(
+            options['PATH'], options['MAX_BYTES'], options['BACKUP_COUNT'],
+        )
+
+    def __call__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+        record = self.get_request_record(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        record['duration_ms'] = round(
+            (time.perf_counter() - started) * 1000, 3,
+        )
+        record['status'] = response.status_code
+        self.writer.write(record)
+        return response
+
+    def get_request_record(self, request):
+        authorization = request.META.get('HTTP_AUTHORIZATION')
+        path, search_field = sanitize_path(
+            request.path_info, getattr(request, 'urlconf', None),
+        )
+        return {
+            'ts': time.time(),
+            'method': request.method,
+            'path': path,
+            'query': sanitize_query(
+                request.META.get('QUERY_STRING', ''), search_field,
+            ),
+            'content_type': request.content_type,
+            'body_size': get_content_length(request),
+            'body': self.get_body(request),
+            'auth': authorization and get_pseudonym(authorization),
+        }
+
+    def get_body(self, request):
+        """Тело JSON без секретов; другие и большие тела не записываются."""
+        size = get_content_length(request)
+        if (
+            not size or size > self.max_body_size
+            or request.content_type != 'application/json'
+        ):
+            return None
+        try:
+            return sanitize(json.loads(request.body))
+        except ValueError:
+            return None
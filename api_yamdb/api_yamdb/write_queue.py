@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class WriteQueueTimeout(Exception):
+    """Очередь на запись не подошла за отведённое время."""
+
+
+class WriteQueue:
+    """
+    Очередь транзакций на запись.
+
+    SQLite допускает только одного писателя, поэтому одновременные
+    транзакции из разных потоков конкурируют за блокировку и ждут её
+    в случайном порядке. Очередь выстраивает их по порядку поступления:
+    блокировка передаётся следующему ожидающему потоку напрямую, а ожидание
+    ограничено таймаутом. При заданном lock_file между процессами
+    дополнительно используется блокировка файла (flock), которую держит
+    только поток, стоящий первым в очереди своего процесса.
+    """
+
+    def __init__(self, timeout, lock_file=None):
+        if lock_file and fcntl is None:
+            raise RuntimeError(
+                'Межпроцессная очередь на запись требует fcntl (POSIX).'
+            )
+        self.timeout = timeout
+        self.lock_file = lock_file
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        self._busy = False
+        self._file = None
+        self._stats = {
+            'acquired': 0,
+            'timeouts': 0,
+            'max_depth': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+        }
+
+    @property
+    def depth(self):
+        """Количество транзакций в очереди, включая выполняющуюся."""
+        with self._lock:
+            return len(self._waiters) + self._busy
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'depth': len(self._waiters) + self._busy,
+            }
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        self._acquire_local(timeout)
+        try:
+            self._acquire_file(started + timeout)
+        except WriteQueueTimeout:
+            self._release_local()
+            raise
+        self._record_wait(time.monotonic() - started)
+        try:
+            yield
+        finally:
+            self._release_file()
+            self._release_local()
+
+    def _acquire_local(self, timeout):
+        with self._lock:
+            if not self._busy and not self._waiters:
+                self._busy = True
+                self._update_depth()
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+            self._update_depth()
+
+        if event.wait(timeout):
+            return
+        with self._lock:
+            try:
+                self._waiters.remove(event)
+            except ValueError:
+                # Блокировку передали в момент истечения таймаута.
+                return
+            self._stats['timeouts'] += 1
+        raise WriteQueueTimeout
+
+    def _release_local(self):
+        with self._lock:
+            if self._waiters:
+                # Блокировка переходит следующему без освобождения, поэтому
+                # новый поток не может обогнать очередь.
+                self._waiters.popleft().set()
+            else:
+                self._busy = False
+
+    def _acquire_file(self, deadline):
+        if not self.lock_file:
+            return
+        if self._file is None:
+            self._file = open(self.lock_file, 'a')
+        delay = 0.0005
+        while True:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    with self._lock:
+                        self._stats['timeouts'] += 1
+                    raise WriteQueueTimeout
+                time.sleep(delay)
+                delay = min(delay * 2, 0.01)
+
+    def _release_file(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def _update_depth(self):
+        depth = len(self._waiters) + self._busy
+        if depth > self._stats['max_depth']:
+            self._stats['max_depth'] = depth
+
+    def _record_wait(self, waited):
+        with self._lock:
+            self._stats['acquired'] += 1
+            self._stats['wait_seconds_total'] += waited
+            if waited > self._stats['wait_seconds_max']:
+                self._stats['wait_seconds_max'] = waited
+
+
+_write_queue = None
+
+
+def get_write_queue():
+    """Очередь на запись процесса или None, если она выключена."""
+    global _write_queue
+    config = settings.WRITE_QUEUE
+    if not config['ENABLED']:
+        return None
+    if _write_queue is None:
+        _write_queue = WriteQueue(
+            timeout=config['TIMEOUT'], lock_file=config['LOCK_FILE'],
+        )
+    return _write_queue
+
+
+@contextmanager
+def serialized_write(using=None):
+    """Транзакция на запись, выполняемая в порядке очереди."""
+    write_queue = get_write_queue()
+    if write_queue is None:
+        yield
+        return
+    with write_queue.acquire(), transaction.atomic(using=using):
+        yield
@@ -6,3 +6,6 @@ class TitlesConfig(AppConfig):
     name = 'titles'
     verbose_name = 'Произведение'
     verbose_name_plural = 'Произведения'
+
+    def ready(self):
+        from . import registry  # noqa: F401
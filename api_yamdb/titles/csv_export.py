@@ -0,0 +1,86 @@
+"""Выгрузка таблиц в CSV файлы, которые читает load_csv_data."""
+import csv
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from django.apps import apps
+from django.db import connections, transaction
+
+from .csv_loader import GZIP_SUFFIX, LOAD_ORDER, RowParser, open_data_file
+
+
+def format_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def export_step(step, directory, compress=False, delimiter=',',
+                encoding='utf-8', chunk_size=2000, using='default'):
+    """
+    Выгрузить модель шага LOAD_ORDER в его файл; возвращает число строк.
+
+    Строки читаются итератором по chunk_size (на PostgreSQL — серверным
+    курсором) и сразу пишутся в файл, так что память не зависит от размера
+    таблицы. Файл пишется под временным именем и подменяется целиком;
+    файл другого формата (сжатый или нет) удаляется, чтобы load_csv_data
+    не прочитал устаревшие данные.
+    """
+    model = apps.get_model(step.label)
+    attnames = RowParser(model, step.columns).attnames
+    file_name = step.file_name + (GZIP_SUFFIX if compress else '')
+    path = os.path.join(directory, file_name)
+    part_path = os.path.join(directory, f'.{file_name}.part')
+    rows = model._default_manager.using(using).order_by('pk').values_list(
+        *attnames,
+    ).iterator(chunk_size=chunk_size)
+    count = 0
+    try:
+        with open_data_file(part_path, 'w', encoding, compress) as csv_file:
+            writer = csv.writer(csv_file, delimiter=delimiter)
+            writer.writerow(step.columns)
+            for row in rows:
+                writer.writerow([format_value(value) for value in row])
+                count += 1
+        os.replace(part_path, path)
+    except BaseException:
+        # Недописанный временный файл не должен оставаться в каталоге.
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    other_path = os.path.join(
+        directory,
+        step.file_name if compress else step.file_name + GZIP_SUFFIX,
+    )
+    if os.path.exists(other_path):
+        os.remove(other_path)
+    return count
+
+
+@contextmanager
+def read_snapshot(using='default'):
+    """
+    Транзакция только для чтения: все таблицы читаются из одного
+    снимка базы. На SQLite с transaction_mode=IMMEDIATE начинается
+    обычным BEGIN, чтобы выгрузка не держала блокировку записи.
+    """
+    connection = connections[using]
+    deferred = getattr(connection, 'deferred_transactions', nullcontext)
+    with deferred(), transaction.atomic(using=using):
+        yield
+
+
+def export_all(directory, **options):
+    """Выгрузить все модели; возвращает [(имя файла, строк, секунд)]."""
+    results = []
+    for step in LOAD_ORDER:
+        started = time.perf_counter()
+        count = export_step(step, directory, **options)
+        results.append(
+            (step.file_name, count, time.perf_counter() - started)
+        )
+    return results
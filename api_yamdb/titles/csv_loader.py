@@ -0,0 +1,632 @@
+"""
+Загрузка CSV файлов в базу данных.
+
+Модели подключаются по меткам, без импорта на уровне модуля: модуль
+импортируется в процессах-обработчиках до настройки Django.
+"""
+import csv
+import gzip
+import hashlib
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+LoadStep = namedtuple('LoadStep', ('label', 'file_name', 'columns'))
+
+# Порядок загрузки: модель загружается после всех, на которые ссылается.
+# Столбцы — как в static/data; по ним же выгружает dump_csv_data.
+LOAD_ORDER = (
+    LoadStep('users.User', 'users.csv', (
+        'id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name',
+    )),
+    LoadStep('titles.Category', 'category.csv', ('id', 'name', 'slug')),
+    LoadStep('titles.Genre', 'genre.csv', ('id', 'name', 'slug')),
+    LoadStep('titles.Title', 'titles.csv', ('id', 'name', 'year', 'category')),
+    LoadStep('titles.GenreTitle', 'genre_title.csv', (
+        'id', 'title_id', 'genre_id',
+    )),
+    LoadStep('reviews.Review', 'review.csv', (
+        'id', 'title_id', 'text', 'author', 'score', 'pub_date',
+    )),
+    LoadStep('reviews.Comment', 'comments.csv', (
+        'id', 'review_id', 'text', 'author', 'pub_date',
+    )),
+)
+
+GZIP_SUFFIX = '.gz'
+
+# Модели, изменение которых меняет представления произведений,
+# и поле со ссылкой на произведение.
+TITLE_REFERENCES = {
+    'titles.Title': 'id',
+    'titles.GenreTitle': 'title_id',
+    'reviews.Review': 'title_id',
+}
+
+# Сколько id изменённых произведений запоминать: при большей загрузке
+# сбрасываются представления всех произведений.
+MAX_TRACKED_TITLE_IDS = 10000
+
+# Сколько разобранных пачек может ждать записи на один процесс.
+PARSE_AHEAD = 4
+
+# Результат разбора пачки: [(номер строки, кортеж значений)],
+# [(номер строки, текст ошибки)] и время разбора.
+ParsedChunk = namedtuple('ParsedChunk', ('rows', 'errors', 'seconds'))
+
+
+class RowError(Exception):
+    """Строку CSV нельзя загрузить."""
+
+
+def prepare_user(user):
+    # bulk_create не вызывает save(), где заполняется username_lower.
+    user.username_lower = user.username.lower()
+
+
+PREPARERS = {'users.User': prepare_user}
+
+# Поля, которые при обновлении меняются вместе с полями из CSV.
+UPDATE_EXTRA_FIELDS = {'users.User': ('username_lower',)}
+
+
+def revoke_user_tokens(users, fields, previous):
+    # bulk_update не вызывает save(), где отзываются токены при смене
+    # username или роли.
+    user_model = apps.get_model('users.User')
+    claims = [
+        fields.index(field) for field in user_model.TOKEN_CLAIM_FIELDS
+        if field in fields
+    ]
+    user_ids = [
+        user.pk for user in users
+        if any(
+            getattr(user, fields[index]) != previous[user.pk][index]
+            for index in claims
+        )
+    ]
+    if user_ids:
+        user_model.revoke_tokens(user_model.objects.filter(pk__in=user_ids))
+
+
+# Вызывается после bulk_update(объекты, поля, {pk: прежние значения}).
+AFTER_UPDATE = {'users.User': revoke_user_tokens}
+
+
+def find_data_file(directory, file_name):
+    """Путь к file_name или к file_name.gz; None, если файла нет."""
+    for name in (file_name, file_name + GZIP_SUFFIX):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def open_data_file(path, mode='r', encoding='utf-8', compress=None):
+    """
+    Открыть CSV файл. Файлы .gz (или при compress=True) сжимаются
+    и распаковываются на лету.
+    """
+    if compress is None:
+        compress = path.endswith(GZIP_SUFFIX)
+    if compress:
+        return gzip.open(path, mode + 't', encoding=encoding, newline='')
+    return open(path, mode, encoding=encoding, newline='')
+
+
+def get_file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_chunk_checksum(rows):
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update('\x1f'.join(row).encode())
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+
+class RowParser:
+    """
+    Преобразование строк CSV одной модели в значения полей.
+
+    Столбец соответствует полю модели по имени (category) или по имени
+    столбца в базе (title_id). Значения проверяются валидаторами полей;
+    внешние ключи преобразуются в id без запросов к базе, их
+    существование проверяет CSVLoader.
+    """
+
+    def __init__(self, model, header):
+        self.model = model
+        self.columns = []
+        fields = {}
+        for field in model._meta.concrete_fields:
+            fields[field.name] = fields[field.attname] = field
+        for column in header:
+            field = fields.get(column)
+            if field is None:
+                raise RowError(
+                    f'Столбец {column} не соответствует полю '
+                    f'{model.__name__}'
+                )
+            self.columns.append(field)
+        self.attnames = tuple(field.attname for field in self.columns)
+
+    def parse(self, row):
+        """Кортеж значений полей в порядке attnames."""
+        if len(row) != len(self.columns):
+            raise RowError(
+                f'ожидалось столбцов: {len(self.columns)}, '
+                f'получено: {len(row)}'
+            )
+        return tuple(
+            self._parse_value(field, raw)
+            for field, raw in zip(self.columns, row)
+        )
+
+    @staticmethod
+    def _parse_value(field, raw):
+        if raw == '' and field.null:
+            return None
+        try:
+            if field.is_relation:
+                return field.target_field.to_python(raw)
+            return field.clean(raw, None)
+        except ValidationError as error:
+            raise RowError(f'{field.name}: {"; ".join(error.messages)}')
+
+
+_parsers = {}
+
+
+def get_parser(label, header):
+    key = (label, tuple(header))
+    parser = _parsers.get(key)
+    if parser is None:
+        parser = _parsers[key] = RowParser(apps.get_model(label), header)
+    return parser
+
+
+def parse_chunk(label, header, first_line, rows):
+    """Разбор и проверка пачки строк; выполняется в процессе-обработчике."""
+    started = time.perf_counter()
+    parser = get_parser(label, header)
+    parsed, errors = [], []
+    for line, row in enumerate(rows, start=first_line):
+        try:
+            parsed.append((line, parser.parse(row)))
+        except RowError as error:
+            errors.append((line, str(error)))
+    return ParsedChunk(parsed, errors, time.perf_counter() - started)
+
+
+def init_worker():
+    if not apps.ready:
+        import django
+        django.setup()
+
+
+def run_now(function, *args):
+    """Выполнить задачу в текущем процессе, как Executor.submit."""
+    future = Future()
+    future.set_result(function(*args))
+    return future
+
+
+def read_chunks(reader, size, first_line=2):
+    """Пачки (номер первой строки, строки) по size строк."""
+    chunk = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield first_line, chunk
+            first_line += len(chunk)
+            chunk = []
+    if chunk:
+        yield first_line, chunk
+
+
+class FileStats:
+    """Итоги загрузки одного файла."""
+
+    def __init__(self, model, file_name):
+        self.model = model
+        self.file_name = file_name
+        self.found = True
+        self.parser = None
+        self.update_fields = ()
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.deleted = 0
+        self.skipped = 0
+        self.errors = []
+        # Инкрементальная загрузка: контрольные суммы файла и пачек,
+        # номера пачек с ошибками, первичные ключи всех строк файла
+        # (для удаления отсутствующих) и уже обработанные ключи.
+        self.checksum = None
+        self.unchanged = False
+        self.unchanged_rows = 0
+        self.chunk_checksums = []
+        self.failed_chunks = set()
+        self.file_ids = None
+        self.seen_ids = set()
+        # Время от начала до конца записи файла, суммарное время разбора
+        # во всех процессах и время записи в базу.
+        self.seconds = 0.0
+        self.parse_seconds = 0.0
+        self.insert_seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class CSVLoader:
+    """
+    Загрузка CSV файлов в порядке LOAD_ORDER.
+
+    Файлы читаются пачками по batch_size строк. При workers > 1 пачки
+    всех файлов разбираются и проверяются в пуле процессов с опережением,
+    а запись идёт в этом процессе строго в порядке LOAD_ORDER, так что
+    внешние ключи ссылаются на уже загруженные строки.
+
+    Строки вставляются через bulk_create. Внешние ключи проверяются
+    по множествам id, которые читаются из базы один раз на модель
+    и пополняются загруженными строками. Строки с уже существующим
+    первичным ключом пропускаются. Если пачка не вставляется целиком
+    (нарушено ограничение уникальности), её строки вставляются по одной,
+    и ошибочные попадают в FileStats.errors.
+
+    При incremental файлы, контрольная сумма которых не изменилась
+    с прошлой загрузки (CSVFileState), пропускаются, а существующие строки
+    обновляются по первичному ключу (только изменившиеся, bulk_update).
+    С chunk_checksums так же пропускаются неизменённые пачки строк.
+    С delete удаляются строки, которых нет в изменившемся файле.
+    """
+
+    def __init__(self, directory, delimiter=',', encoding='utf-8',
+                 batch_size=1000, workers=1, incremental=False,
+                 chunk_checksums=False, delete=False):
+        self.directory = directory
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.batch_size = batch_size
+        self.workers = workers
+        self.incremental = incremental
+        self.chunk_checksums = chunk_checksums
+        self.delete = delete
+        self.states = {}
+        self.known_ids = {}
+        # Произведения, у которых изменились данные (None — их больше
+        # MAX_TRACKED_TITLE_IDS), и признак новых отзывов: bulk_create
+        # не вызывает сигналы, поэтому кеши сбрасывает вызывающий код.
+        self.changed_title_ids = set()
+        self.reviews_changed = False
+
+    @property
+    def state_model(self):
+        return apps.get_model('titles.CSVFileState')
+
+    def load(self):
+        """Загрузить все файлы; возвращает список FileStats."""
+        if self.incremental:
+            self.states = {
+                state.file_name: state
+                for state in self.state_model.objects.all()
+            }
+        results = self._load_files()
+        if self.delete:
+            self._delete_missing(results)
+        if self.incremental:
+            self._save_states(results)
+        return results
+
+    def _load_files(self):
+        if self.workers <= 1:
+            return self._load_all(run_now, window=1)
+        with ProcessPoolExecutor(
+            self.workers, initializer=init_worker,
+        ) as pool:
+            return self._load_all(
+                pool.submit, window=self.workers * PARSE_AHEAD,
+            )
+
+    def _load_all(self, submit, window):
+        results = []
+        pending = deque()
+        tasks = self._read_tasks(results)
+        last = time.perf_counter()
+        while True:
+            while len(pending) < window:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                stats, index, args = task
+                pending.append((stats, index, submit(parse_chunk, *args)))
+            if not pending:
+                return results
+            stats, index, future = pending.popleft()
+            self._load_chunk(stats, index, future.result())
+            now = time.perf_counter()
+            stats.seconds += now - last
+            last = now
+
+    def _read_tasks(self, results):
+        """
+        Задачи разбора (FileStats, номер пачки, аргументы parse_chunk)
+        по порядку.
+        """
+        for step in LOAD_ORDER:
+            stats = FileStats(apps.get_model(step.label), step.file_name)
+            results.append(stats)
+            path = find_data_file(self.directory, step.file_name)
+            if path is None:
+                stats.found = False
+                continue
+            if self.incremental and self._is_unchanged(stats, path):
+                continue
+            yield from self._read_file_tasks(step, stats, path)
+
+    def _is_unchanged(self, stats, path):
+        stats.checksum = get_file_checksum(path)
+        state = self.states.get(stats.file_name)
+        stats.unchanged = (
+            state is not None and state.checksum == stats.checksum
+        )
+        return stats.unchanged
+
+    def _read_file_tasks(self, step, stats, path):
+        with open_data_file(path, encoding=self.encoding) as csv_file:
+            reader = csv.reader(csv_file, delimiter=self.delimiter)
+            header = next(reader, [])
+            try:
+                self._set_parser(stats, step.label, header)
+            except RowError as error:
+                stats.errors.append(str(error))
+                return
+            old_checksums = self._get_old_chunk_checksums(stats)
+            chunks = read_chunks(reader, self.batch_size)
+            for index, (first_line, rows) in enumerate(chunks):
+                if self.delete:
+                    self._collect_ids(stats, rows)
+                if self._is_unchanged_chunk(stats, rows, old_checksums):
+                    continue
+                yield stats, index, (step.label, header, first_line, rows)
+
+    def _set_parser(self, stats, label, header):
+        parser = get_parser(label, header)
+        pk_name = stats.model._meta.pk.attname
+        if self.incremental and pk_name not in parser.attnames:
+            raise RowError(
+                f'Нет столбца {pk_name}: строки обновляются '
+                f'по первичному ключу'
+            )
+        stats.parser = parser
+        stats.update_fields = tuple(
+            field.attname for field in parser.columns
+            if field.editable and not field.primary_key
+        ) + UPDATE_EXTRA_FIELDS.get(label, ())
+        if self.delete:
+            stats.file_ids = set()
+
+    def _get_old_chunk_checksums(self, stats):
+        state = self.states.get(stats.file_name)
+        if (
+            not self.chunk_checksums
+            or state is None
+            or state.batch_size != self.batch_size
+        ):
+            return []
+        return state.chunk_checksums
+
+    def _is_unchanged_chunk(self, stats, rows, old_checksums):
+        if not self.chunk_checksums:
+            return False
+        index = len(stats.chunk_checksums)
+        checksum = get_chunk_checksum(rows)
+        stats.chunk_checksums.append(checksum)
+        if index < len(old_checksums) and old_checksums[index] == checksum:
+            stats.unchanged_rows += len(rows)
+            return True
+        return False
+
+    @staticmethod
+    def _collect_ids(stats, rows):
+        pk_field = stats.model._meta.pk
+        index = stats.parser.attnames.index(pk_field.attname)
+        for row in rows:
+            try:
+                stats.file_ids.add(pk_field.to_python(row[index]))
+            except (IndexError, ValidationError):
+                continue
+
+    def _load_chunk(self, stats, index, chunk):
+        started = time.perf_counter()
+        errors_count = len(stats.errors)
+        stats.rows += len(chunk.rows) + len(chunk.errors)
+        stats.parse_seconds += chunk.seconds
+        stats.errors.extend(
+            f'строка {line}: {error}' for line, error in chunk.errors
+        )
+        inserts, updates = [], []
+        for line, values in chunk.rows:
+            try:
+                built = self._build(
+                    stats, dict(zip(stats.parser.attnames, values)),
+                )
+            except RowError as error:
+                stats.errors.append(f'строка {line}: {error}')
+                continue
+            if built is None:
+                stats.skipped += 1
+                continue
+            instance, exists = built
+            (updates if exists else inserts).append((line, instance))
+        if inserts:
+            self._insert(stats, inserts)
+        if updates:
+            self._update(stats, updates)
+        if len(stats.errors) > errors_count:
+            stats.failed_chunks.add(index)
+        stats.insert_seconds += time.perf_counter() - started
+
+    def _build(self, stats, values):
+        """
+        (объект, есть ли он в базе) или None, если строку нужно
+        пропустить: повтор в файле или существующая строка без
+        incremental.
+        """
+        model = stats.model
+        known_ids = self.get_known_ids(model)
+        pk = values.get(model._meta.pk.attname)
+        exists = pk is not None and pk in known_ids
+        if pk in stats.seen_ids or (exists and not self.incremental):
+            return None
+        self._check_relations(model, values)
+        instance = model(**values)
+        preparer = PREPARERS.get(model._meta.label)
+        if preparer is not None:
+            preparer(instance)
+        if pk is not None:
+            stats.seen_ids.add(pk)
+            known_ids.add(pk)
+        return instance, exists
+
+    def _check_relations(self, model, values):
+        for field in model._meta.concrete_fields:
+            if not field.is_relation:
+                continue
+            value = values.get(field.attname)
+            if (
+                value is not None
+                and value not in self.get_known_ids(field.related_model)
+            ):
+                raise RowError(
+                    f'{field.related_model.__name__} с id {value} не найден'
+                )
+
+    def get_known_ids(self, model):
+        ids = self.known_ids.get(model)
+        if ids is None:
+            ids = self.known_ids[model] = set(
+                model.objects.values_list('pk', flat=True)
+            )
+        return ids
+
+    def _write(self, stats, batch, write):
+        """
+        write(объекты) в точке сохранения; если пачка не записывается
+        целиком, строки записываются по одной. Возвращает записанные.
+        """
+        instances = [instance for _, instance in batch]
+        try:
+            with transaction.atomic():
+                write(instances)
+        except IntegrityError:
+            instances = []
+            for line, instance in batch:
+                try:
+                    with transaction.atomic():
+                        write([instance])
+                except IntegrityError as error:
+                    stats.errors.append(f'строка {line}: {error}')
+                else:
+                    instances.append(instance)
+        self._remember(stats.model, instances)
+        return instances
+
+    def _insert(self, stats, batch):
+        created = self._write(stats, batch, stats.model.objects.bulk_create)
+        stats.created += len(created)
+        self.get_known_ids(stats.model).difference_update(
+            {instance.pk for _, instance in batch}
+            - {instance.pk for instance in created}
+        )
+
+    def _update(self, stats, batch):
+        """Обновить строки, значения которых отличаются от базы."""
+        model, fields = stats.model, stats.update_fields
+        previous = {
+            row[0]: row[1:]
+            for row in model.objects.filter(
+                pk__in=[instance.pk for _, instance in batch],
+            ).values_list('pk', *fields)
+        }
+        changed = [
+            (line, instance) for line, instance in batch
+            if tuple(getattr(instance, field) for field in fields)
+            != previous.get(instance.pk)
+        ]
+        stats.skipped += len(batch) - len(changed)
+        if not changed:
+            return
+        updated = self._write(
+            stats, changed,
+            lambda instances: model.objects.bulk_update(instances, fields),
+        )
+        stats.updated += len(updated)
+        after_update = AFTER_UPDATE.get(model._meta.label)
+        if after_update is not None and updated:
+            after_update(updated, fields, previous)
+
+    def _remember(self, model, instances):
+        title_field = TITLE_REFERENCES.get(model._meta.label)
+        if title_field is None:
+            return
+        if model._meta.label == 'reviews.Review':
+            self.reviews_changed = True
+        if self.changed_title_ids is None:
+            return
+        self.changed_title_ids.update(
+            getattr(instance, title_field) for instance in instances
+        )
+        if len(self.changed_title_ids) > MAX_TRACKED_TITLE_IDS:
+            self.changed_title_ids = None
+
+    def _delete_missing(self, results):
+        """
+        Удалить строки, которых нет в изменившихся файлах. Зависимые
+        модели обрабатываются первыми; удаление идёт через ORM, поэтому
+        каскады и сигналы срабатывают как обычно.
+        """
+        for stats in reversed(results):
+            if stats.file_ids is None:
+                continue
+            model = stats.model
+            known_ids = self.get_known_ids(model)
+            missing = list(known_ids - stats.file_ids)
+            for start in range(0, len(missing), self.batch_size):
+                pks = missing[start:start + self.batch_size]
+                _, deleted = model.objects.filter(pk__in=pks).delete()
+                stats.deleted += deleted.get(model._meta.label, 0)
+            known_ids.difference_update(missing)
+
+    def _save_states(self, results):
+        """
+        Запомнить контрольные суммы загруженных файлов. Файл с ошибками
+        будет обработан снова, а при chunk_checksums — только его пачки
+        с ошибками.
+        """
+        for stats in results:
+            if stats.checksum is None or stats.unchanged:
+                continue
+            state = self.states.get(stats.file_name) or self.state_model(
+                file_name=stats.file_name,
+            )
+            state.checksum = '' if stats.errors else stats.checksum
+            state.batch_size = self.batch_size
+            state.chunk_checksums = [
+                None if index in stats.failed_chunks else checksum
+                for index, checksum in enumerate(stats.chunk_checksums)
+            ]
+            state.save()
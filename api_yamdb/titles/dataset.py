@@ -0,0 +1,409 @@
+"""
+Генерация синтетического набора данных заданного масштаба.
+
+Распределения приближены к реальным: число отзывов на произведение
+убывает по закону Ципфа, активность пользователей — степенная, жанры
+произведения чаще берутся из одной группы, названия и тексты на русском.
+Строки вставляются INSERT ... executemany без создания объектов моделей;
+результат полностью определяется seed и параметрами.
+"""
+import random
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Max
+
+from reviews.models import Comment, Review
+from users.models import User
+from .models import Category, Genre, GenreTitle, Title
+
+# Размер набора при scale=1; scale=100 даёт 10^7 отзывов.
+TITLES_PER_SCALE = 1000
+USERS_PER_SCALE = 5000
+REVIEWS_PER_SCALE = 100_000
+
+CATEGORIES = (
+    ('Фильм', 'movie', 40),
+    ('Книга', 'book', 30),
+    ('Сериал', 'series', 15),
+    ('Музыка', 'music', 10),
+    ('Игра', 'game', 5),
+)
+
+# Жанры одной группы часто встречаются вместе.
+GENRE_GROUPS = (
+    (('Драма', 'drama', 30), ('Мелодрама', 'melodrama', 12),
+     ('Биография', 'biography', 5)),
+    (('Комедия', 'comedy', 25), ('Мюзикл', 'musical', 4),
+     ('Мультфильм', 'cartoon', 8)),
+    (('Боевик', 'action', 18), ('Триллер', 'thriller', 15),
+     ('Детектив', 'detective', 12)),
+    (('Фантастика', 'sci-fi', 15), ('Фэнтези', 'fantasy', 12),
+     ('Приключения', 'adventure', 10)),
+    (('Ужасы', 'horror', 8), ('Мистика', 'mystic', 6),
+     ('Вестерн', 'western', 3)),
+)
+
+# Доля дополнительных жанров из группы первого жанра.
+SAME_GROUP_PROBABILITY = 0.75
+
+FIRST_NAMES = (
+    'Александр', 'Алексей', 'Анна', 'Дарья', 'Дмитрий', 'Екатерина',
+    'Елена', 'Иван', 'Ирина', 'Мария', 'Михаил', 'Наталья', 'Николай',
+    'Ольга', 'Павел', 'Сергей', 'Софья', 'Татьяна', 'Юлия', 'Ярослав',
+)
+LAST_NAMES = (
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров',
+    'Соколов', 'Михайлов', 'Новиков', 'Фёдоров', 'Морозов', 'Волков',
+    'Алексеев', 'Лебедев', 'Семёнов', 'Егоров', 'Павлов', 'Козлов',
+)
+ADJECTIVES = (
+    'Тихий', 'Белый', 'Последний', 'Тёмный', 'Золотой', 'Далёкий',
+    'Старый', 'Северный', 'Вечный', 'Железный', 'Ночной', 'Забытый',
+    'Красный', 'Седьмой', 'Хрустальный', 'Дикий', 'Чужой', 'Летний',
+)
+NOUNS = (
+    'Дон', 'город', 'берег', 'сад', 'ветер', 'океан', 'путь', 'лес',
+    'остров', 'огонь', 'мир', 'дом', 'снег', 'замок', 'поезд', 'маяк',
+    'рассвет', 'звездолёт', 'переулок', 'горизонт',
+)
+REVIEW_PHRASES = (
+    'Смотрел на одном дыхании.', 'Сюжет предсказуем, но актёры хороши.',
+    'Финал оставил двоякое впечатление.', 'Рекомендую всем друзьям.',
+    'Слишком затянуто в середине.', 'Музыка просто великолепна.',
+    'Пересматриваю уже третий раз.', 'Ожидал большего.',
+    'Атмосфера передана безупречно.', 'Диалоги написаны живо.',
+    'Главный герой раздражал.', 'Классика, которая не стареет.',
+)
+COMMENT_PHRASES = (
+    'Согласен!', 'Не соглашусь, мне понравилось.', 'Спасибо за отзыв.',
+    'А как же концовка?', 'Полностью поддерживаю.', 'Спорное мнение.',
+)
+
+# Размеры заранее подготовленных наборов текстов и дат.
+TEXT_POOL_SIZE = 1000
+DATE_POOL_SIZE = 2000
+DATE_RANGE_DAYS = 5 * 365
+# Даты отсчитываются от фиксированного момента, а не от текущего:
+# набор с тем же seed совпадает при любом запуске.
+DATASET_END = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def insert_rows(model, fields, rows, using=DEFAULT_DB_ALIAS):
+    """INSERT кортежей значений полей fields без создания объектов."""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    columns = ', '.join(
+        quote(model._meta.get_field(name).column) for name in fields
+    )
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+            f'VALUES ({placeholders})',
+            rows,
+        )
+
+
+def get_zipf_counts(total, size, exponent, limit):
+    """
+    Разбить total на size частей с долями 1 / rank^exponent; часть
+    не больше limit.
+    """
+    weights = [1 / rank ** exponent for rank in range(1, size + 1)]
+    scale = total / sum(weights)
+    counts = [min(limit, int(weight * scale)) for weight in weights]
+    rest = total - sum(counts)
+    while rest > 0:
+        added = 0
+        for index in range(size):
+            if counts[index] < limit and rest > 0:
+                counts[index] += 1
+                rest -= 1
+                added += 1
+        if not added:
+            break
+    return counts
+
+
+class DatasetGenerator:
+    """
+    Генератор набора данных: scale * TITLES_PER_SCALE произведений,
+    scale * USERS_PER_SCALE пользователей и scale * REVIEWS_PER_SCALE
+    отзывов. Новые строки получают id после существующих, поэтому набор
+    можно добавлять в непустую базу.
+    """
+
+    def __init__(self, scale=1.0, seed=0, batch_size=10_000,
+                 zipf_exponent=1.1, activity_exponent=1.0,
+                 comments_ratio=0.2, using=DEFAULT_DB_ALIAS):
+        self.rng = random.Random(seed)
+        self.titles_count = max(1, round(TITLES_PER_SCALE * scale))
+        self.users_count = max(1, round(USERS_PER_SCALE * scale))
+        self.reviews_count = round(REVIEWS_PER_SCALE * scale)
+        self.comments_count = round(self.reviews_count * comments_ratio)
+        self.batch_size = batch_size
+        self.zipf_exponent = zipf_exponent
+        self.activity_exponent = activity_exponent
+        self.using = using
+        self.connection = connections[using]
+
+    def generate(self):
+        """
+        Сгенерировать набор; возвращает [(таблица, строк, секунд)].
+        Все строки вставляются в одной транзакции: без неё SQLite
+        фиксирует каждую строку отдельно.
+        """
+        self._prepare_pools()
+        steps = (
+            (User, self._generate_users),
+            (Title, self._generate_titles),
+            (GenreTitle, self._generate_genres),
+            (Review, self._generate_reviews),
+            (Comment, self._generate_comments),
+        )
+        results = []
+        with transaction.atomic(using=self.using):
+            self._create_references()
+            for model, generate in steps:
+                started = time.perf_counter()
+                count = generate()
+                results.append((
+                    model._meta.db_table, count,
+                    time.perf_counter() - started,
+                ))
+            self._reset_sequences([model for model, _ in steps])
+        return results
+
+    def _next_id(self, model):
+        last = model._default_manager.using(self.using).aggregate(
+            last=Max('pk'),
+        )['last']
+        return (last or 0) + 1
+
+    def _insert(self, model, fields, rows):
+        """Вставить строки пачками по batch_size; возвращает их число."""
+        count = 0
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return count
+            insert_rows(model, fields, batch, self.using)
+            count += len(batch)
+
+    def _reset_sequences(self, models):
+        # На PostgreSQL последовательности id не знают о вставленных id.
+        statements = self.connection.ops.sequence_reset_sql(
+            no_style(), models,
+        )
+        with self.connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def _prepare_date(self, value):
+        return Review._meta.get_field('pub_date').get_db_prep_save(
+            value, self.connection,
+        )
+
+    def _prepare_pools(self):
+        rng = self.rng
+        self.dates = [
+            self._prepare_date(DATASET_END - timedelta(
+                seconds=rng.randrange(DATE_RANGE_DAYS * 24 * 3600),
+            ))
+            for _ in range(DATE_POOL_SIZE)
+        ]
+        self.review_texts = [
+            ' '.join(rng.sample(REVIEW_PHRASES, rng.randint(1, 4)))
+            for _ in range(TEXT_POOL_SIZE)
+        ]
+        self.comment_texts = list(COMMENT_PHRASES)
+
+    def _create_references(self):
+        manager = Category._default_manager.db_manager(self.using)
+        self.categories = [
+            manager.get_or_create(slug=slug, defaults={'name': name})[0].pk
+            for name, slug, _ in CATEGORIES
+        ]
+        self.category_weights = list(
+            accumulate(weight for _, _, weight in CATEGORIES)
+        )
+        manager = Genre._default_manager.db_manager(self.using)
+        self.genre_groups = [
+            [
+                manager.get_or_create(slug=slug, defaults={'name': name})[0].pk
+                for name, slug, _ in group
+            ]
+            for group in GENRE_GROUPS
+        ]
+        self.genres = [pk for group in self.genre_groups for pk in group]
+        self.genre_weights = list(accumulate(
+            weight for group in GENRE_GROUPS for _, _, weight in group
+        ))
+
+    def _generate_users(self):
+        rng = self.rng
+        first_id = self._next_id(User)
+        self.user_ids = range(first_id, first_id + self.users_count)
+        # Степенная активность: вес пользователя 1 / rank^a, ранги
+        # перемешаны, чтобы активные пользователи не шли подряд.
+        ranks = list(range(1, self.users_count + 1))
+        rng.shuffle(ranks)
+        self.user_weights = list(accumulate(
+            1 / rank ** self.activity_exponent for rank in ranks
+        ))
+        joined = self._prepare_date(DATASET_END - timedelta(
+            days=DATE_RANGE_DAYS,
+        ))
+        password = UNUSABLE_PASSWORD_PREFIX
+
+        def rows():
+            for pk in self.user_ids:
+                username = f'user_{pk}'
+                role = User.MODERATOR if rng.random() < 0.01 else User.USER
+                yield (
+                    pk, password, False, username, rng.choice(FIRST_NAMES),
+                    rng.choice(LAST_NAMES), f'{username}@yamdb.fake',
+                    False, True, joined, '', role, username, 0,
+                )
+
+        return self._insert(User, (
+            'id', 'password', 'is_superuser', 'username', 'first_name',
+            'last_name', 'email', 'is_staff', 'is_active', 'date_joined',
+            'bio', 'role', 'username_lower', 'token_version',
+        ), rows())
+
+    def _generate_titles(self):
+        rng = self.rng
+        first_id = self._next_id(Title)
+        self.title_ids = range(first_id, first_id + self.titles_count)
+        last_year = DATASET_END.year
+
+        def rows():
+            for pk in self.title_ids:
+                yield (
+                    pk, self._get_title_name(), last_year - min(
+                        100, int(rng.expovariate(1 / 15)),
+                    ), '',
+                    rng.choices(
+                        self.categories, cum_weights=self.category_weights,
+                    )[0],
+                )
+
+        return self._insert(
+            Title, ('id', 'name', 'year', 'description', 'category'), rows(),
+        )
+
+    def _get_title_name(self):
+        rng = self.rng
+        pattern = rng.random()
+        noun = rng.choice(NOUNS)
+        if pattern < 0.5:
+            return f'{rng.choice(ADJECTIVES)} {noun}'
+        if pattern < 0.7:
+            return noun.capitalize()
+        if pattern < 0.85:
+            return f'{noun.capitalize()} и {rng.choice(NOUNS)}'
+        return f'{rng.choice(ADJECTIVES)} {noun}: часть {rng.randint(2, 5)}'
+
+    def _get_title_genres(self):
+        rng = self.rng
+        count = rng.choices((1, 2, 3), weights=(50, 35, 15))[0]
+        first = rng.choices(self.genres, cum_weights=self.genre_weights)[0]
+        chosen = [first]
+        group = next(
+            group for group in self.genre_groups if first in group
+        )
+        while len(chosen) < count:
+            pool = (
+                group if rng.random() < SAME_GROUP_PROBABILITY
+                else self.genres
+            )
+            genre = rng.choice(pool)
+            if genre not in chosen:
+                chosen.append(genre)
+        return chosen
+
+    def _generate_genres(self):
+        first_id = self._next_id(GenreTitle)
+
+        def rows():
+            pk = first_id
+            for title_id in self.title_ids:
+                for genre_id in self._get_title_genres():
+                    yield pk, title_id, genre_id
+                    pk += 1
+
+        return self._insert(GenreTitle, ('id', 'title', 'genre'), rows())
+
+    def _sample_authors(self, count):
+        """count разных пользователей с учётом их активности."""
+        rng = self.rng
+        if count * 2 > self.users_count:
+            return sorted(rng.sample(range(self.users_count), count))
+        chosen = set()
+        while len(chosen) < count:
+            chosen.update(rng.choices(
+                range(self.users_count), cum_weights=self.user_weights,
+                k=count - len(chosen),
+            ))
+        return sorted(chosen)
+
+    def _generate_reviews(self):
+        rng = self.rng
+        # Один пользователь пишет на произведение не больше одного отзыва.
+        counts = get_zipf_counts(
+            self.reviews_count, self.titles_count, self.zipf_exponent,
+            self.users_count,
+        )
+        rng.shuffle(counts)
+        first_id = self._next_id(Review)
+        first_user_id = self.user_ids.start
+
+        def rows():
+            pk = first_id
+            for title_id, count in zip(self.title_ids, counts):
+                quality = rng.gauss(6.5, 1.5)
+                for author in self._sample_authors(count):
+                    score = min(10, max(1, round(rng.gauss(quality, 1.8))))
+                    yield (
+                        pk, rng.choice(self.review_texts),
+                        first_user_id + author, rng.choice(self.dates),
+                        title_id, score,
+                    )
+                    pk += 1
+
+        count = self._insert(Review, (
+            'id', 'text', 'author', 'pub_date', 'title', 'score',
+        ), rows())
+        self.review_ids = range(first_id, first_id + count)
+        return count
+
+    def _generate_comments(self):
+        rng = self.rng
+        if not self.review_ids:
+            return 0
+        first_id = self._next_id(Comment)
+        first_user_id = self.user_ids.start
+        total_weight = self.user_weights[-1]
+
+        def rows():
+            for pk in range(first_id, first_id + self.comments_count):
+                author = bisect_left(
+                    self.user_weights, rng.random() * total_weight,
+                )
+                yield (
+                    pk, rng.choice(self.comment_texts),
+                    first_user_id + author, rng.choice(self.dates),
+                    rng.choice(self.review_ids),
+                )
+
+        return self._insert(Comment, (
+            'id', 'text', 'author', 'pub_date', 'review',
+        ), rows())
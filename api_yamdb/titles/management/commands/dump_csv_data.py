@@ -0,0 +1,78 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from titles.csv_export import export_all, read_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка данных из БД в CSV файлы в формате load_csv_data'
+
+    def add_arguments(self, parser):
+        """Определение аргументов для команды."""
+        parser.add_argument(
+            'directory',
+            type=str,
+            help='Каталог для CSV файлов (создаётся, если его нет)',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файлы (users.csv.gz и т.д.)',
+        )
+        parser.add_argument(
+            '--delimiter',
+            type=str,
+            default=',',
+            help='CSV разделитель (по-умолчанию: ",")',
+        )
+        parser.add_argument(
+            '--encoding',
+            type=str,
+            default='utf-8',
+            help='Кодировка файла (по-умолчанию: utf-8)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Строк, читаемых из базы за один раз (по-умолчанию: 2000)',
+        )
+        parser.add_argument(
+            '--database',
+            type=str,
+            default=DEFAULT_DB_ALIAS,
+            help='База данных для чтения, например реплика '
+                 '(по-умолчанию: default)',
+        )
+
+    def handle(self, *args, **options):
+        """Основная процедура."""
+        directory = options['directory']
+        database = options['database']
+        os.makedirs(directory, exist_ok=True)
+        # Все таблицы читаются в одной транзакции, чтобы внешние ключи
+        # в выгрузке ссылались на выгруженные строки.
+        with read_snapshot(database):
+            results = export_all(
+                directory,
+                compress=options['gzip'],
+                delimiter=options['delimiter'],
+                encoding=options['encoding'],
+                chunk_size=options['chunk_size'],
+                using=database,
+            )
+        total_rows = total_seconds = 0
+        for file_name, rows, seconds in results:
+            total_rows += rows
+            total_seconds += seconds
+            rate = rows / seconds if seconds else 0.0
+            self.stdout.write(
+                f'{file_name}: {rows} строк ({rate:.0f} строк/с)'
+            )
+        rate = total_rows / total_seconds if total_seconds else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'\nВыгрузка завершена: {total_rows} строк за'
+            f' {total_seconds:.2f} с ({rate:.0f} строк/с)'
+        ))
@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from api.mixins import invalidate_cached_responses
+from api.signals import TITLES_NAMESPACE
+from titles import registry
+from titles.dataset import DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетического набора данных заданного масштаба'
+
+    def add_arguments(self, parser):
+        """Определение аргументов для команды."""
+        parser.add_argument(
+            '--scale',
+            type=float,
+            default=1.0,
+            help='Масштаб: 1 — 1000 произведений, 5000 пользователей, '
+                 '10^5 отзывов (по-умолчанию: 1)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Начальное значение генератора (по-умолчанию: 0)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10_000,
+            help='Строк в одном executemany (по-умолчанию: 10000)',
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель закона Ципфа для отзывов на произведение '
+                 '(по-умолчанию: 1.1)',
+        )
+        parser.add_argument(
+            '--activity',
+            type=float,
+            default=1.0,
+            help='Показатель степенной активности пользователей '
+                 '(по-умолчанию: 1.0)',
+        )
+        parser.add_argument(
+            '--comments-ratio',
+            type=float,
+            default=0.2,
+            help='Комментариев на отзыв (по-умолчанию: 0.2)',
+        )
+        parser.add_argument(
+            '--database',
+            type=str,
+            default=DEFAULT_DB_ALIAS,
+            help='База данных (по-умолчанию: default)',
+        )
+
+    def handle(self, *args, **options):
+        """Основная процедура."""
+        generator = DatasetGenerator(
+            scale=options['scale'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            zipf_exponent=options['zipf'],
+            activity_exponent=options['activity'],
+            comments_ratio=options['comments_ratio'],
+            using=options['database'],
+        )
+        with transaction.atomic(using=options['database']):
+            results = generator.generate()
+            # Строки вставлены в обход сигналов.
+            for reference in registry.REGISTRIES.values():
+                transaction.on_commit(reference.invalidate)
+            transaction.on_commit(
+                lambda: invalidate_cached_responses(TITLES_NAMESPACE),
+            )
+        total_rows = total_seconds = 0
+        for table, rows, seconds in results:
+            total_rows += rows
+            total_seconds += seconds
+            rate = rows / seconds if seconds else 0.0
+            self.stdout.write(f'{table}: {rows} строк ({rate:.0f} строк/с)')
+        self.stdout.write(self.style.SUCCESS(
+            f'\nНабор данных создан: {total_rows} строк за'
+            f' {total_seconds:.2f} с'
+        ))
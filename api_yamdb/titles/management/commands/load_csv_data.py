@@ -1,20 +1,19 @@
-import csv
 import os
+import time
 
-from django.apps import apps
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
-DATA_PATH = f'{settings.BASE_DIR}/static/data'
+from api.representations import clear_title_representations
+from api.signals import REVIEWS_NAMESPACE, TITLES_NAMESPACE, on_titles_changed
+from titles import registry
+from titles.csv_loader import CSVLoader
 
+DATA_PATH = f'{settings.BASE_DIR}/static/data'
 
-MODEL_FILES = {
-    'User': 'users.csv',
-    'Title': 'titles.csv',
-    'GenreTitle': 'genre_title.csv',
-    'Comment': 'comments.csv',
-}
+# Сколько ошибок выводить для одного файла.
+MAX_REPORTED_ERRORS = 20
 
 
 class Command(BaseCommand):
@@ -40,121 +39,135 @@ class Command(BaseCommand):
             default='utf-8',
             help='Кодировка файла (по-умолчанию: utf-8)',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Строк в одном INSERT (по-умолчанию: 1000)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Процессов для разбора CSV (по-умолчанию: 1, без пула)',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Пропускать неизменённые файлы, обновлять строки по id',
+        )
+        parser.add_argument(
+            '--chunk-checksums',
+            action='store_true',
+            help='С --incremental: пропускать неизменённые пачки строк',
+        )
+        parser.add_argument(
+            '--delete',
+            action='store_true',
+            help='С --incremental: удалять строки, которых нет в файле',
+        )
 
     def handle(self, *args, **options):
         """Основная процедура."""
-        self.directory = options['directory']
-        self.delimiter = options['delimiter']
-        self.encoding = options['encoding']
-        self.success_count = 0
-        self.error_count = 0
-
-        if not self._validate_directory():
-            return
-
-        with transaction.atomic():
-            self._process_all_models()
-
-        self._print_final_summary()
-
-    def _validate_directory(self):
-        """Проверка наличия каталога с файлами загрузки."""
-        if not os.path.exists(self.directory):
-            self.stderr.write(self.style.ERROR(
-                f"Каталог '{self.directory}' не найден",
-            ))
-            return False
-        return True
-
-    def _process_all_models(self):
-        """Обработка всех моделей приложений."""
-        for model in apps.get_models():
-            model_name = model.__name__
-            file_path = self._get_model_file_path(model_name)
-
-            if not os.path.exists(file_path):
-                self.stdout.write(self.style.WARNING(
-                    f"Файл {file_path} для модели {model_name} не найден..."
-                ))
-                continue
-
-            self._process_model_file(model, file_path)
-
-    def _get_model_file_path(self, model_name):
-        """Получить CSV файл для модели."""
-        file_name = MODEL_FILES.get(model_name, f"{model_name}.csv")
-        return os.path.join(self.directory, file_name)
-
-    def _process_model_file(self, model, file_path):
-        """Обработка файла CSV."""
-        try:
-            with open(file_path, 'r', encoding=self.encoding) as csvfile:
-                reader = csv.DictReader(csvfile, delimiter=self.delimiter)
-                created_count = 0
-
-                for row in reader:
-                    if self._process_model_row(model, row):
-                        created_count += 1
-
-                if created_count > 0:
-                    self.stdout.write(self.style.SUCCESS(
-                        f"Создано {created_count} {model.__name__}"
-                        f" объектов из {os.path.basename(file_path)}"
-                    ))
-                    self.success_count += 1
-
-        except Exception as e:
+        directory = options['directory']
+        if (
+            options['chunk_checksums'] or options['delete']
+        ) and not options['incremental']:
+            raise CommandError(
+                '--chunk-checksums и --delete работают только '
+                'с --incremental'
+            )
+        if not os.path.exists(directory):
             self.stderr.write(self.style.ERROR(
-                f"Ошибка обработки {file_path} для {model.__name__}: {str(e)}",
+                f"Каталог '{directory}' не найден",
             ))
-            self.error_count += 1
+            return
 
-    def _process_model_row(self, model, row):
-        """Обработка одной строки из CSV файла."""
-        try:
-            model_data = self._prepare_model_data(model, row)
-            obj, created = model.objects.get_or_create(**model_data)
-            return created
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(
-                f"Ошибка создания {model.__name__} для строки {row}: {str(e)}"
+        loader = CSVLoader(
+            directory,
+            delimiter=options['delimiter'],
+            encoding=options['encoding'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            incremental=options['incremental'],
+            chunk_checksums=options['chunk_checksums'],
+            delete=options['delete'],
+        )
+        started = time.perf_counter()
+        with transaction.atomic():
+            results = loader.load()
+            self._invalidate_caches(loader)
+        seconds = time.perf_counter() - started
+
+        for stats in results:
+            self._print_file_summary(stats)
+        self._print_final_summary(results, seconds, options['workers'])
+
+    def _invalidate_caches(self, loader):
+        """
+        bulk_create не вызывает сигналы: справочники, представления
+        произведений и закешированные ответы сбрасываются явно. Кеш
+        ответов сбрасывается одним изменением общих пространств имён,
+        а не по каждому произведению.
+        """
+        for reference in registry.REGISTRIES.values():
+            transaction.on_commit(reference.invalidate)
+        namespaces = [TITLES_NAMESPACE]
+        if loader.reviews_changed:
+            namespaces.append(REVIEWS_NAMESPACE)
+        title_ids = loader.changed_title_ids
+        if title_ids is None and settings.MATERIALIZED_TITLES:
+            clear_title_representations()
+        on_titles_changed(title_ids or (), *namespaces)
+
+    def _print_file_summary(self, stats):
+        """Вывод итогов загрузки одного файла."""
+        model_name = stats.model.__name__
+        if not stats.found:
+            self.stdout.write(self.style.WARNING(
+                f'Файл {stats.file_name} для модели {model_name} не найден...'
             ))
-            self.error_count += 1
-            return False
-
-    def _prepare_model_data(self, model, row):
-        """Подготовка данных из CSV, получение внешних ключей."""
-        model_data = row.copy()
-
-        for field in model._meta.get_fields():
-            field_name = field.name
-
-            if field_name in model_data and field.many_to_one:
-                model_data[field_name] = self._get_related_object(
-                    field.related_model,
-                    model_data[field_name],
-                )
-        return model_data
-
-    def _get_related_object(self, related_model, related_id):
-        """Получить связанный объект для поля foreign key."""
-        try:
-            return related_model.objects.get(pk=related_id)
-        except related_model.DoesNotExist:
+            return
+        if stats.unchanged:
+            self.stdout.write(
+                f'{stats.file_name}: файл не изменился, пропущен'
+            )
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'{stats.file_name}: создано {stats.created} {model_name}'
+            f' объектов из {stats.rows} строк, пропущено {stats.skipped},'
+            f' обновлено {stats.updated}, удалено {stats.deleted},'
+            f' без изменений {stats.unchanged_rows},'
+            f' ошибок {len(stats.errors)}'
+            f' ({stats.rows_per_second:.0f} строк/с, разбор'
+            f' {stats.parse_seconds:.2f} с, запись'
+            f' {stats.insert_seconds:.2f} с)'
+        ))
+        for error in stats.errors[:MAX_REPORTED_ERRORS]:
             self.stderr.write(self.style.ERROR(
-                f"Связанный объект не найден: {related_model.__name__}"
-                f" с id {related_id}"
+                f'Ошибка {stats.file_name}, {error}'
             ))
-            raise
-        except ValueError:
+        if len(stats.errors) > MAX_REPORTED_ERRORS:
             self.stderr.write(self.style.ERROR(
-                f"Некорректный ID для {related_model.__name__}: {related_id}"
+                f'... и ещё {len(stats.errors) - MAX_REPORTED_ERRORS} ошибок'
+                f' в {stats.file_name}'
             ))
-            raise
 
-    def _print_final_summary(self):
+    def _print_final_summary(self, results, seconds, workers):
         """Вывод итоговой информации о загрузке данных."""
+        rows = sum(stats.rows for stats in results)
+        created = sum(stats.created for stats in results)
+        updated = sum(stats.updated for stats in results)
+        deleted = sum(stats.deleted for stats in results)
+        errors = sum(len(stats.errors) for stats in results)
+        parse_seconds = sum(stats.parse_seconds for stats in results)
+        insert_seconds = sum(stats.insert_seconds for stats in results)
+        rate = rows / seconds if seconds else 0.0
         self.stdout.write(self.style.SUCCESS(
-            f"\nЗагрузка данных завершена."
-            f" Успешно: {self.success_count}, Ошибок: {self.error_count}"
+            f'\nЗагрузка данных завершена.'
+            f' Создано: {created}, Обновлено: {updated},'
+            f' Удалено: {deleted}, Ошибок: {errors},'
+            f' {rows} строк за {seconds:.2f} с ({rate:.0f} строк/с).'
+            f' Процессов разбора: {workers}, разбор {parse_seconds:.2f} с,'
+            f' запись {insert_seconds:.2f} с'
         ))
@@ -79,3 +79,62 @@ class GenreTitle(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Произведение',
     )
+
+
+class TitleRepresentation(models.Model):
+    """
+    Готовый JSON произведения в формате TitleGETSerializer.
+    Обновляется при изменении произведения, его жанров, категории
+    и отзывов (api/signals.py).
+    """
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='representation',
+        verbose_name='Произведение',
+    )
+    content = models.TextField(verbose_name='JSON')
+    updated_at = models.DateTimeField(
+        verbose_name='Дата обновления',
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = 'Представление произведения'
+        verbose_name_plural = 'Представления произведений'
+
+    def __str__(self):
+        return str(self.title_id)
+
+
+class CSVFileState(models.Model):
+    """
+    Контрольные суммы последнего загруженного CSV файла
+    (load_csv_data --incremental).
+    """
+    file_name = models.CharField(
+        verbose_name='Файл',
+        max_length=255,
+        unique=True,
+    )
+    checksum = models.CharField(verbose_name='SHA-256 файла', max_length=64)
+    batch_size = models.PositiveIntegerField(
+        verbose_name='Строк в пачке',
+        default=0,
+    )
+    chunk_checksums = models.JSONField(
+        verbose_name='SHA-256 пачек строк',
+        default=list,
+    )
+    loaded_at = models.DateTimeField(
+        verbose_name='Дата загрузки',
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = 'Загруженный CSV файл'
+        verbose_name_plural = 'Загруженные CSV файлы'
+
+    def __str__(self):
+        return self.file_name
@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import Category, Genre
+
+RegistryEntry = namedtuple('RegistryEntry', ('id', 'slug', 'name'))
+
+
+class SlugRegistry:
+    """
+    Справочник slug → (id, name) в памяти процесса.
+
+    Таблицы категорий и жанров маленькие и меняются редко, поэтому они
+    загружаются целиком. Изменения отмечаются новой версией в кеше
+    REFERENCE_REGISTRY_CACHE (сигналы post_save и post_delete), и каждый
+    процесс перечитывает справочник, увидев новую версию. Изменения
+    в обход сигналов (queryset.update, bulk_create) подхватываются
+    не позже чем через REFERENCE_REGISTRY_MAX_AGE секунд или после
+    вызова invalidate().
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._version_key = f'slug_registry:{model._meta.label_lower}'
+        self._lock = threading.Lock()
+        self._by_slug = None
+        self._by_id = None
+        self._version = None
+        self._loaded_at = 0
+
+    def __deepcopy__(self, memo):
+        # Справочник один на процесс; поля DRF копируются вместе
+        # с аргументами конструктора.
+        return self
+
+    @property
+    def _cache(self):
+        return caches[settings.REFERENCE_REGISTRY_CACHE]
+
+    def get(self, slug):
+        """Запись по slug или None."""
+        entry = self._get_maps()[0].get(slug)
+        if entry is None:
+            # Объект мог появиться в другом процессе, а новая версия
+            # ещё не дошла до этого: промах проверяется по базе.
+            entry = self._load_one(slug=slug)
+        return entry
+
+    def get_by_id(self, pk):
+        entry = self._get_maps()[1].get(pk)
+        if entry is None:
+            entry = self._load_one(pk=pk)
+        return entry
+
+    def get_instance(self, slug):
+        """
+        Объект модели с данными из справочника, без запроса к базе.
+        Годится для присваивания связей.
+        """
+        entry = self.get(slug)
+        if entry is None:
+            return None
+        instance = self.model(id=entry.id, slug=entry.slug, name=entry.name)
+        instance._state.adding = False
+        instance._state.db = router.db_for_read(self.model)
+        return instance
+
+    def invalidate(self):
+        """Отметить справочник устаревшим во всех процессах."""
+        self._cache.set(self._version_key, time.time_ns(), None)
+        with self._lock:
+            self._by_slug = self._by_id = None
+
+    def _get_maps(self):
+        version = self._get_version()
+        by_slug, by_id = self._by_slug, self._by_id
+        if (
+            by_slug is None
+            or version != self._version
+            or time.monotonic() - self._loaded_at
+            > settings.REFERENCE_REGISTRY_MAX_AGE
+        ):
+            by_slug, by_id = self._load(version)
+        return by_slug, by_id
+
+    def _get_version(self):
+        version = self._cache.get(self._version_key)
+        if version is None:
+            self._cache.add(self._version_key, time.time_ns(), None)
+            version = self._cache.get(self._version_key)
+        return version
+
+    def _load(self, version):
+        entries = [
+            RegistryEntry(*row)
+            for row in self.model.objects.values_list('id', 'slug', 'name')
+        ]
+        by_slug = {entry.slug: entry for entry in entries}
+        by_id = {entry.id: entry for entry in entries}
+        with self._lock:
+            self._by_slug, self._by_id = by_slug, by_id
+            self._version = version
+            self._loaded_at = time.monotonic()
+        return by_slug, by_id
+
+    def _load_one(self, **lookup):
+        row = self.model.objects.filter(**lookup).values_list(
+            'id', 'slug', 'name',
+        ).first()
+        return None if row is None else RegistryEntry(*row)
+
+
+categories = SlugRegistry(Category)
+genres = SlugRegistry(Genre)
+
+REGISTRIES = {Category: categories, Genre: genres}
+
+
+def invalidate_registry(sender, **kwargs):
+    # Новая версия публикуется после фиксации транзакции, иначе другой
+    # процесс может перечитать старые данные под новой версией.
+    transaction.on_commit(REGISTRIES[sender].invalidate)
+
+
+for registry_model in REGISTRIES:
+    post_save.connect(invalidate_registry, sender=registry_model)
+    post_delete.connect(invalidate_registry, sender=registry_model)
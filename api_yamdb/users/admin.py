@@ -2,14 +2,15 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
 
-from users.models import User
+from users.models import ConfirmationEmail, User
 
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     list_display = ('username', 'email', 'role', 'is_active', 'date_joined')
     list_filter = ('role', 'is_staff', 'is_superuser', 'is_active')
-    search_fields = ('username__exact', 'email__exact')
+    search_fields = ('username_lower', 'email')
+    show_full_result_count = False
     ordering = ('-date_joined',)
     date_hierarchy = 'date_joined'
     fieldsets = (
@@ -50,6 +51,16 @@ class UserAdmin(BaseUserAdmin):
             return qs.filter(is_superuser=False)
         return qs
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по началу username или точному email по индексам."""
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return (
+            queryset.search_username(search_term)
+            | queryset.filter(email=search_term)
+        ), False
+
     def get_readonly_fields(self, request, obj=None):
         readonly_fields = super().get_readonly_fields(request, obj)
         if not request.user.is_admin:
@@ -64,8 +75,17 @@ class UserAdmin(BaseUserAdmin):
 
     @admin.action(description=_('Activate selected users'))
     def activate_users(self, request, queryset):
-        queryset.update(is_active=True)
+        User.revoke_tokens(queryset, is_active=True)
 
     @admin.action(description=_('Deactivate selected users'))
     def deactivate_users(self, request, queryset):
-        queryset.update(is_active=False)
+        User.revoke_tokens(queryset, is_active=False)
+
+
+@admin.register(ConfirmationEmail)
+class ConfirmationEmailAdmin(admin.ModelAdmin):
+    list_display = ('email', 'status', 'attempts', 'next_attempt_at',
+                    'sent_at')
+    list_filter = ('status',)
+    search_fields = ('email__exact',)
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+
+from users.models import User
+
+
+class VerifiedTokenCache:
+    """LRU кеш токенов, подпись которых уже проверена."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, raw_token):
+        with self._lock:
+            token = self._tokens.get(raw_token)
+            if token is None:
+                return None
+            if token['exp'] <= time.time():
+                del self._tokens[raw_token]
+                return None
+            self._tokens.move_to_end(raw_token)
+            return token
+
+    def set(self, raw_token, token):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._tokens[raw_token] = token
+            self._tokens.move_to_end(raw_token)
+            if len(self._tokens) > self.maxsize:
+                self._tokens.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+
+verified_tokens = VerifiedTokenCache(settings.JWT_VERIFIED_TOKEN_CACHE_SIZE)
+
+
+class RoleTokenUser(TokenUser):
+    """Пользователь, восстановленный из данных access токена."""
+
+    @property
+    def role(self):
+        return self.token.get('role', User.USER)
+
+    @property
+    def is_admin(self):
+        return self.role == User.ADMIN or self.is_superuser
+
+    @property
+    def is_moderator(self):
+        return self.role == User.MODERATOR
+
+
+class VersionedJWTAuthentication(JWTAuthentication):
+    """
+    JWT аутентификация с отзывом токенов.
+    Токен, выданный до изменения роли или блокировки пользователя,
+    отклоняется.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = verified_tokens.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            verified_tokens.set(raw_token, token)
+        return token
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        version = validated_token.get('token_version')
+        if version is not None and version != user.token_version:
+            raise AuthenticationFailed('Токен отозван.', code='token_revoked')
+        return user
+
+
+class StatelessJWTAuthentication(VersionedJWTAuthentication):
+    """
+    JWT аутентификация без запроса пользователя из базы данных.
+
+    Для чтения (GET, HEAD, OPTIONS) пользователь восстанавливается из
+    данных токена, выданного RoleAccessToken: этого достаточно для
+    проверок в users/permissions.py. Актуальность роли проверяется по
+    версии токенов пользователя в общем кеше. Изменяющие запросы и
+    токены без данных о роли обрабатываются как обычно.
+    """
+
+    def authenticate(self, request):
+        self.request_method = request.method
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if (
+            self.request_method not in SAFE_METHODS
+            or 'role' not in validated_token
+            or 'token_version' not in validated_token
+        ):
+            return super().get_user(validated_token)
+
+        user = RoleTokenUser(validated_token)
+        version = User.get_token_version(user.id)
+        if version is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден.', code='user_not_found',
+            )
+        if version != validated_token['token_version']:
+            raise AuthenticationFailed('Токен отозван.', code='token_revoked')
+        return user
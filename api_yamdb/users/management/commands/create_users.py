@@ -0,0 +1,96 @@
+import csv
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.provisioning import provision_users
+
+USER_FIELDS = ('username', 'email', 'role', 'bio', 'first_name', 'last_name')
+
+
+class Command(BaseCommand):
+    help = 'Массовое создание пользователей из CSV файла'
+
+    def add_arguments(self, parser):
+        """Определение аргументов для команды."""
+        parser.add_argument(
+            'file',
+            type=str,
+            help='CSV файл с колонками username, email и, опционально, '
+                 'role, bio, first_name, last_name',
+        )
+        parser.add_argument(
+            '--delimiter',
+            type=str,
+            default=',',
+            help='CSV разделитель (по-умолчанию: ",")',
+        )
+        parser.add_argument(
+            '--encoding',
+            type=str,
+            default='utf-8',
+            help='Кодировка файла (по-умолчанию: utf-8)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк, проверяемых и создаваемых за один проход',
+        )
+        parser.add_argument(
+            '--send-confirmation',
+            action='store_true',
+            help='Поставить в очередь письма с кодами подтверждения',
+        )
+
+    def handle(self, *args, **options):
+        """Основная процедура."""
+        file_path = options['file']
+        if not os.path.exists(file_path):
+            raise CommandError(f"Файл '{file_path}' не найден")
+
+        created_count = 0
+        conflict_count = 0
+        with open(file_path, 'r', encoding=options['encoding']) as csvfile:
+            reader = csv.DictReader(csvfile, delimiter=options['delimiter'])
+            # Номер строки в файле: заголовок — первая строка.
+            first_line = 2
+            while True:
+                rows = [
+                    self._clean_row(row)
+                    for row in islice(reader, options['batch_size'])
+                ]
+                if not rows:
+                    break
+                created, conflicts = provision_users(
+                    rows,
+                    send_confirmation=options['send_confirmation'],
+                    batch_size=options['batch_size'],
+                )
+                for conflict in conflicts:
+                    self.stderr.write(self.style.ERROR(
+                        f"Строка {first_line + conflict['row']}: "
+                        f"{self._format_errors(conflict['errors'])}"
+                    ))
+                created_count += len(created)
+                conflict_count += len(conflicts)
+                first_line += len(rows)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {created_count}, '
+            f'Конфликтов: {conflict_count}'
+        ))
+
+    def _clean_row(self, row):
+        """Только известные колонки, пустые значения не передаются."""
+        return {
+            field: row[field] for field in USER_FIELDS
+            if row.get(field)
+        }
+
+    def _format_errors(self, errors):
+        return '; '.join(
+            f'{field}: {" ".join(str(error) for error in field_errors)}'
+            for field, field_errors in errors.items()
+        )
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Заполнение username_lower у существующих пользователей'
+
+    def add_arguments(self, parser):
+        """Определение аргументов для команды."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Количество пользователей, обновляемых одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        """Основная процедура."""
+        batch_size = options['batch_size']
+        updated_count = 0
+        last_pk = 0
+
+        while True:
+            batch = list(
+                User.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .only('pk', 'username', 'username_lower')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            changed = [
+                user for user in batch
+                if user.username_lower != user.username.lower()
+            ]
+            for user in changed:
+                user.username_lower = user.username.lower()
+            User.objects.bulk_update(changed, ['username_lower'])
+            updated_count += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено пользователей: {updated_count}'
+        ))
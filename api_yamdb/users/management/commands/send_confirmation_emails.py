@@ -0,0 +1,80 @@
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from users.outbox import get_pending_emails, send_batch
+
+
+class Command(BaseCommand):
+    help = 'Отправка писем с кодами подтверждения из очереди'
+
+    def add_arguments(self, parser):
+        """Определение аргументов для команды."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Количество писем за один проход',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            help='Число попыток до отметки письма как неотправленного',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза между проверками пустой очереди, в секундах',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить накопившиеся письма и завершить работу',
+        )
+
+    def handle(self, *args, **options):
+        """Основная процедура."""
+        self.batch_size = options['batch_size']
+        self.max_attempts = options['max_attempts']
+        self.sent_count = 0
+
+        connection = get_connection()
+        try:
+            if options['once']:
+                self._drain(connection)
+            else:
+                self._run_forever(connection, options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Отправлено писем: {self.sent_count}'
+        ))
+
+    def _run_forever(self, connection, interval):
+        """Постоянная обработка очереди."""
+        while True:
+            if not self._drain(connection):
+                # Очередь пуста: не держим SMTP соединение открытым зря.
+                connection.close()
+                time.sleep(interval)
+
+    def _drain(self, connection):
+        """Отправка всех писем, готовых к отправке."""
+        processed = 0
+        while True:
+            batch = get_pending_emails(self.batch_size)
+            if not batch:
+                return processed
+            self.sent_count += send_batch(
+                batch, connection, max_attempts=self.max_attempts,
+            )
+            processed += len(batch)
+            if len(batch) < self.batch_size:
+                return processed
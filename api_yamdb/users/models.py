@@ -1,7 +1,44 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+import sys
 
-from api_yamdb.constants import LIMIT_EMAIL
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.core.cache import caches
+from django.db import models, transaction
+from django.utils import timezone
+
+from api_yamdb.constants import LIMIT_EMAIL, LIMIT_USERNAME
+
+
+def get_prefix_upper_bound(prefix):
+    """
+    Наименьшая строка, которая больше всех строк с данным префиксом.
+    Последний символ chr(0x10FFFF) увеличить нельзя: он отбрасывается и
+    увеличивается предыдущий. None — верхней границы нет.
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class UserQuerySet(models.QuerySet):
+    def search_username(self, prefix):
+        """
+        Поиск по началу username без учёта регистра.
+        Выполняется как диапазонный запрос по индексу username_lower.
+        """
+        prefix = prefix.lower()
+        if not prefix:
+            return self
+        queryset = self.filter(username_lower__gte=prefix)
+        upper_bound = get_prefix_upper_bound(prefix)
+        if upper_bound is None:
+            return queryset
+        return queryset.filter(username_lower__lt=upper_bound)
+
+
+class SearchableUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
 
 
 class User(AbstractUser):
@@ -30,12 +67,118 @@ class User(AbstractUser):
         default=USER,
         verbose_name='Роль'
     )
+    username_lower = models.CharField(
+        max_length=LIMIT_USERNAME,
+        db_index=True,
+        editable=False,
+        verbose_name='Username в нижнем регистре'
+    )
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия токенов'
+    )
+
+    # Поля, которые копируются в access токен. Их изменение отзывает
+    # ранее выданные токены.
+    TOKEN_CLAIM_FIELDS = ('username', 'role', 'is_superuser', 'is_active')
+
+    objects = SearchableUserManager()
 
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ['username']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._token_claims = instance._get_token_claims()
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded_claims = getattr(self, '_token_claims', None)
+        claims_changed = (
+            loaded_claims is not None
+            and loaded_claims != self._get_token_claims()
+        )
+        if claims_changed:
+            self.token_version += 1
+        self.username_lower = self.username.lower()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'username' in update_fields:
+                update_fields.add('username_lower')
+            if claims_changed:
+                update_fields.add('token_version')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+        self._token_claims = self._get_token_claims()
+        if claims_changed:
+            transaction.on_commit(lambda: self.store_token_versions(
+                {self.pk: self.token_version}
+            ))
+
+    def _get_token_claims(self):
+        # __dict__ вместо getattr: отложенные поля не должны подгружаться.
+        return tuple(
+            self.__dict__.get(field) for field in self.TOKEN_CLAIM_FIELDS
+        )
+
+    @staticmethod
+    def _get_token_version_key(user_id):
+        return f'user_token_version:{user_id}'
+
+    @classmethod
+    def store_token_versions(cls, versions):
+        """
+        Записать новые версии токенов в кеш после фиксации транзакции.
+        Запись, а не удаление ключа: иначе читатель, прочитавший старую
+        версию до фиксации, мог бы положить её в кеш уже после удаления.
+        """
+        caches[settings.TOKEN_VERSION_CACHE].set_many({
+            cls._get_token_version_key(user_id): version
+            for user_id, version in versions.items()
+        }, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+
+    @classmethod
+    def get_token_version(cls, user_id):
+        """
+        Текущая версия токенов пользователя.
+        Берётся из общего кеша, база данных читается только при промахе.
+        None — пользователь не существует.
+        """
+        cache = caches[settings.TOKEN_VERSION_CACHE]
+        key = cls._get_token_version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            version = cls.objects.filter(pk=user_id).values_list(
+                'token_version', flat=True,
+            ).first()
+            if version is not None:
+                # add не перезаписывает версию, сохранённую изменившим
+                # пользователя запросом, а конечный срок хранения
+                # ограничивает время жизни устаревшего значения.
+                cache.add(key, version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+        return version
+
+    @classmethod
+    def revoke_tokens(cls, queryset, **changes):
+        """
+        Массовое изменение пользователей с отзывом их токенов.
+        Нужен там, где queryset.update() обходит save().
+        """
+        user_ids = list(queryset.values_list('pk', flat=True))
+        cls.objects.filter(pk__in=user_ids).update(
+            token_version=models.F('token_version') + 1, **changes,
+        )
+        transaction.on_commit(lambda: cls.store_token_versions(dict(
+            cls.objects.filter(pk__in=user_ids).values_list(
+                'pk', 'token_version',
+            )
+        )))
+
     @property
     def is_admin(self):
         return self.role == self.ADMIN or self.is_superuser
@@ -43,3 +186,78 @@ class User(AbstractUser):
     @property
     def is_moderator(self):
         return self.role == self.MODERATOR
+
+
+class ConfirmationEmail(models.Model):
+    """Письмо с кодом подтверждения в очереди на отправку."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    email = models.EmailField(
+        max_length=LIMIT_EMAIL,
+        verbose_name='Адрес электронной почты'
+    )
+    subject = models.CharField(
+        max_length=255,
+        verbose_name='Тема'
+    )
+    message = models.TextField(
+        verbose_name='Текст письма'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        db_index=True,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток отправки'
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name='Следующая попытка'
+    )
+    claim_token = models.CharField(
+        max_length=32,
+        blank=True,
+        default='',
+        verbose_name='Метка отправителя'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки'
+    )
+
+    class Meta:
+        verbose_name = 'Письмо подтверждения'
+        verbose_name_plural = 'Письма подтверждения'
+        ordering = ['next_attempt_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['email'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_confirmation_email'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.email} ({self.status})'
@@ -0,0 +1,236 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMessage, get_connection
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from users.models import ConfirmationEmail
+
+CONFIRMATION_SUBJECT = 'Ваш код подтверждения YAmdb!'
+
+
+def build_confirmation_message(user):
+    """Текст письма с кодом подтверждения для пользователя."""
+    confirmation_code = default_token_generator.make_token(user)
+    return f'Ваш код подтверждения: {confirmation_code}'
+
+
+def enqueue_email(email, subject, message):
+    """
+    Поставить письмо в очередь на отправку.
+    Повторная регистрация на тот же адрес не создаёт новое письмо,
+    а обновляет текст ещё не отправленного.
+    """
+    defaults = {
+        'subject': subject,
+        'message': message,
+        'attempts': 0,
+        'next_attempt_at': timezone.now(),
+        'last_error': '',
+        # Новый текст: отправка старого не должна отметить письмо SENT.
+        'claim_token': '',
+    }
+    try:
+        with transaction.atomic():
+            outgoing, _ = ConfirmationEmail.objects.update_or_create(
+                email=email,
+                status=ConfirmationEmail.PENDING,
+                defaults=defaults,
+            )
+    except IntegrityError:
+        # Параллельный запрос успел создать письмо для этого адреса.
+        outgoing = ConfirmationEmail.objects.get(
+            email=email, status=ConfirmationEmail.PENDING,
+        )
+        ConfirmationEmail.objects.filter(pk=outgoing.pk).update(**defaults)
+    return outgoing
+
+
+def enqueue_confirmation_emails(users):
+    """
+    Поставить в очередь письма с кодами подтверждения для списка
+    пользователей одним запросом. Адреса, для которых уже есть
+    неотправленное письмо, пропускаются.
+    """
+    ConfirmationEmail.objects.bulk_create(
+        [
+            ConfirmationEmail(
+                email=user.email,
+                subject=CONFIRMATION_SUBJECT,
+                message=build_confirmation_message(user),
+            )
+            for user in users
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def get_retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой отправки."""
+    delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(
+        seconds=min(delay, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY)
+    )
+
+
+def get_pending_emails(batch_size, ids=None):
+    """Письма, время отправки которых уже наступило."""
+    queryset = ConfirmationEmail.objects.filter(
+        status=ConfirmationEmail.PENDING,
+        next_attempt_at__lte=timezone.now(),
+    )
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    return list(queryset.order_by('next_attempt_at', 'pk')[:batch_size])
+
+
+def claim_emails(outgoing_emails):
+    """
+    Закрепить письма за этим отправителем. Письмо забирается, только если
+    оно не изменилось с момента чтения (метка claim_token та же); срок
+    следующей попытки сдвигается на EMAIL_OUTBOX_CLAIM_TIMEOUT, поэтому
+    другие отправители его не видят. Возвращает закреплённые письма.
+    """
+    claimed = []
+    claimed_until = timezone.now() + timedelta(
+        seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT
+    )
+    for outgoing in outgoing_emails:
+        token = uuid.uuid4().hex
+        updated = ConfirmationEmail.objects.filter(
+            pk=outgoing.pk,
+            status=ConfirmationEmail.PENDING,
+            claim_token=outgoing.claim_token,
+            next_attempt_at__lte=timezone.now(),
+        ).update(claim_token=token, next_attempt_at=claimed_until)
+        if updated:
+            outgoing.claim_token = token
+            outgoing.next_attempt_at = claimed_until
+            claimed.append(outgoing)
+    return claimed
+
+
+def send_batch(outgoing_emails, connection=None, max_attempts=None,
+               fail_silently=True):
+    """
+    Отправка пачки писем через одно SMTP соединение.
+    Возвращает количество успешно отправленных писем. При
+    fail_silently=False ошибка отправки учитывается и пробрасывается.
+    """
+    outgoing_emails = claim_emails(outgoing_emails)
+    if not outgoing_emails:
+        return 0
+    if max_attempts is None:
+        max_attempts = settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    if connection is None:
+        connection = get_connection()
+
+    try:
+        connection.open()
+    except Exception as error:
+        for outgoing in outgoing_emails:
+            _register_failure(outgoing, error, max_attempts)
+        if not fail_silently:
+            raise
+        return 0
+
+    return sum(
+        _send_one(outgoing, connection, max_attempts, fail_silently)
+        for outgoing in outgoing_emails
+    )
+
+
+def send_now(outgoing):
+    """
+    Немедленная отправка одного письма из очереди. Ошибка SMTP
+    пробрасывается: письмо остаётся в очереди, а клиент узнаёт о сбое.
+    """
+    connection = get_connection()
+    try:
+        return send_batch(
+            get_pending_emails(batch_size=1, ids=[outgoing.pk]), connection,
+            fail_silently=False,
+        )
+    finally:
+        connection.close()
+
+
+def send_to_addresses(emails, batch_size=500):
+    """
+    Немедленная отправка ожидающих писем на указанные адреса через одно
+    SMTP соединение. Ошибки не прерывают отправку: письмо остаётся
+    в очереди и повторяется по обычным правилам.
+    """
+    connection = get_connection()
+    try:
+        for start in range(0, len(emails), batch_size):
+            ids = ConfirmationEmail.objects.filter(
+                email__in=emails[start:start + batch_size],
+                status=ConfirmationEmail.PENDING,
+            ).values_list('pk', flat=True)
+            send_batch(
+                get_pending_emails(batch_size, ids=list(ids)), connection,
+            )
+    finally:
+        connection.close()
+
+
+def _register_failure(outgoing, error, max_attempts):
+    """Учёт неудачной попытки отправки."""
+    attempts = outgoing.attempts + 1
+    update = {
+        'attempts': attempts,
+        'last_error': str(error),
+        'next_attempt_at': timezone.now() + get_retry_delay(attempts),
+    }
+    if attempts >= max_attempts:
+        update['status'] = ConfirmationEmail.FAILED
+    ConfirmationEmail.objects.filter(
+        pk=outgoing.pk,
+        status=ConfirmationEmail.PENDING,
+        claim_token=outgoing.claim_token,
+    ).update(**update)
+
+
+def _send_one(outgoing, connection, max_attempts, fail_silently=True):
+    """Отправка одного письма через открытое соединение."""
+    message = EmailMessage(
+        subject=outgoing.subject,
+        body=outgoing.message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[outgoing.email],
+        connection=connection,
+    )
+    try:
+        connection.send_messages([message])
+    except Exception as error:
+        _register_failure(outgoing, error, max_attempts)
+        if not fail_silently:
+            raise
+        _reconnect(connection)
+        return False
+    # Письмо могли изменить повторной регистрацией во время отправки:
+    # тогда оно остаётся в очереди с новым текстом.
+    ConfirmationEmail.objects.filter(
+        pk=outgoing.pk,
+        status=ConfirmationEmail.PENDING,
+        claim_token=outgoing.claim_token,
+    ).update(
+        status=ConfirmationEmail.SENT,
+        attempts=outgoing.attempts + 1,
+        sent_at=timezone.now(),
+        last_error='',
+    )
+    return True
+
+
+def _reconnect(connection):
+    """Соединение могло оборваться: переоткрываем для остальных писем."""
+    connection.close()
+    try:
+        connection.open()
+    except Exception:
+        pass
@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from users.models import User
+from users.outbox import enqueue_confirmation_emails, send_to_addresses
+from users.serializers import BulkUserSerializer
+
+DUPLICATE_IN_BATCH = 'Значение повторяется в загружаемом списке.'
+USERNAME_TAKEN = 'Этот username уже занят другим пользователем!'
+EMAIL_TAKEN = 'Этот email уже используется для другого аккаунта!'
+
+
+def provision_users(rows, send_confirmation=False, batch_size=1000):
+    """
+    Массовое создание пользователей.
+
+    Уникальность username и email проверяется для всей пачки одним
+    запросом, пользователи создаются через bulk_create. Строки с ошибками
+    не прерывают загрузку, а попадают в список конфликтов.
+    Возвращает список созданных пользователей и список конфликтов
+    вида {'row': <номер строки>, 'errors': {<поле>: [<ошибка>]}}.
+    """
+    conflicts = []
+    valid_rows = _validate_rows(rows, conflicts)
+
+    new_users = []
+    for index, data in _exclude_taken(valid_rows, conflicts):
+        user = User(**data, username_lower=data['username'].lower())
+        user.set_unusable_password()
+        new_users.append((index, user))
+
+    # Пользователь мог появиться после проверки: такие строки не ломают
+    # вставку, а обнаруживаются при чтении созданных записей.
+    User.objects.bulk_create(
+        [user for _, user in new_users],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    stored = User.objects.in_bulk(
+        [user.username for _, user in new_users], field_name='username',
+    )
+    created, lost_rows = [], []
+    for index, user in new_users:
+        stored_user = stored.get(user.username)
+        if stored_user is None or stored_user.email != user.email:
+            lost_rows.append((index, {
+                'username': user.username, 'email': user.email,
+            }))
+            continue
+        created.append(stored_user)
+    # Повторная проверка показывает, какое из полей заняли на самом деле.
+    for index, _ in _exclude_taken(lost_rows, conflicts):
+        conflicts.append({'row': index, 'errors': {
+            'username': [USERNAME_TAKEN],
+        }})
+
+    if send_confirmation:
+        enqueue_confirmation_emails(created)
+        if not settings.EMAIL_OUTBOX_ASYNC:
+            emails = [user.email for user in created]
+            transaction.on_commit(lambda: send_to_addresses(emails))
+
+    conflicts.sort(key=lambda conflict: conflict['row'])
+    return created, conflicts
+
+
+def _exclude_taken(rows, conflicts):
+    """
+    Строки, username и email которых свободны. Для остальных
+    в conflicts добавляется ошибка по каждому занятому полю.
+    """
+    usernames = {data['username'] for _, data in rows}
+    emails = {data['email'] for _, data in rows}
+    taken_usernames, taken_emails = set(), set()
+    for username, email in User.objects.filter(
+        Q(username__in=usernames) | Q(email__in=emails)
+    ).values_list('username', 'email'):
+        taken_usernames.add(username)
+        taken_emails.add(email)
+
+    free_rows = []
+    for index, data in rows:
+        errors = {}
+        if data['username'] in taken_usernames:
+            errors['username'] = [USERNAME_TAKEN]
+        if data['email'] in taken_emails:
+            errors['email'] = [EMAIL_TAKEN]
+        if errors:
+            conflicts.append({'row': index, 'errors': errors})
+            continue
+        free_rows.append((index, data))
+    return free_rows
+
+
+def _validate_rows(rows, conflicts):
+    """Проверка полей каждой строки и повторов внутри пачки."""
+    valid_rows = []
+    seen_usernames, seen_emails = set(), set()
+    for index, row in enumerate(rows):
+        serializer = BulkUserSerializer(data=row)
+        if not serializer.is_valid():
+            conflicts.append({'row': index, 'errors': serializer.errors})
+            continue
+        data = serializer.validated_data
+        errors = {}
+        if data['username'] in seen_usernames:
+            errors['username'] = [DUPLICATE_IN_BATCH]
+        if data['email'] in seen_emails:
+            errors['email'] = [DUPLICATE_IN_BATCH]
+        if errors:
+            conflicts.append({'row': index, 'errors': errors})
+            continue
+        seen_usernames.add(data['username'])
+        seen_emails.add(data['email'])
+        valid_rows.append((index, data))
+    return valid_rows
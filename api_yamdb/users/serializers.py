@@ -0,0 +1,43 @@
+from django.core.validators import RegexValidator
+from rest_framework import serializers
+
+from api_yamdb import constants
+from users.models import User
+
+
+class UsernameEmailFieldsMixin(serializers.Serializer):
+    """Поля username и email без проверки уникальности в базе данных."""
+    email = serializers.EmailField(
+        required=True,
+        max_length=constants.LIMIT_EMAIL
+    )
+    username = serializers.CharField(
+        required=True,
+        max_length=constants.LIMIT_USERNAME,
+        validators=[RegexValidator(
+            regex=constants.USERNAME_REGEX,
+            message='Недопустимые символы в username!'
+        )],
+    )
+
+    def validate_username(self, value):
+        if value == constants.UNAVAILABLE_USERNAME:
+            raise serializers.ValidationError(
+                f"Нельзя использовать {value} как username!"
+            )
+        return value
+
+
+class BulkUserSerializer(UsernameEmailFieldsMixin,
+                         serializers.ModelSerializer):
+    """
+    Проверка одной строки массового создания пользователей.
+    Уникальность username и email проверяется для всей пачки сразу.
+    """
+
+    class Meta:
+        model = User
+        fields = (
+            'username', 'email', 'first_name',
+            'last_name', 'bio', 'role'
+        )
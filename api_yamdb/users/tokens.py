@@ -0,0 +1,17 @@
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class RoleAccessToken(AccessToken):
+    """
+    Access токен с данными, достаточными для проверки прав доступа
+    без обращения к базе данных.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['username'] = user.username
+        token['role'] = user.role
+        token['is_superuser'] = user.is_superuser
+        token['token_version'] = user.token_version
+        return token
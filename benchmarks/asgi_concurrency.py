@@ -0,0 +1,161 @@
+"""
+Пропускная способность WSGI и ASGI при большом числе медленных клиентов.
+
+Клиенты (--concurrency) непрерывно запрашивают список произведений
+и список отзывов. Каждый клиент медленно передаёт запрос (--client-delay).
+WSGI сервер моделируется пулом из --workers потоков: поток занят запросом
+всё время, пока клиент передаёт данные. ASGI приложение обслуживает всех
+клиентов в одном цикле событий, а запросы к базе данных выполняет в пуле
+из того же числа потоков.
+
+    python -m benchmarks.asgi_concurrency --concurrency 64 --workers 8
+"""
+import argparse
+import asyncio
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.utils import (call_asgi, call_wsgi, create_test_database,
+                              destroy_test_database, make_environ,
+                              print_table, setup_django, summarize,
+                              write_json)
+
+
+def seed(titles_count, reviews_count):
+    from reviews.models import Review
+    from titles.models import Category, Title
+    from users.models import User
+
+    category = Category.objects.create(name='Фильм', slug='movie')
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i}', year=2000, category=category)
+        for i in range(titles_count)
+    )
+    User.objects.bulk_create(
+        User(username=f'user_{i}', username_lower=f'user_{i}',
+             email=f'user_{i}@yamdb.fake')
+        for i in range(reviews_count)
+    )
+    users = list(User.objects.all())
+    titles = list(Title.objects.order_by('pk'))
+    Review.objects.bulk_create(
+        Review(title=title, author=user, text='Отзыв', score=i % 10 + 1)
+        for title in titles
+        for i, user in enumerate(users)
+    )
+    return [title.pk for title in titles]
+
+
+def get_paths(title_ids):
+    paths = ['/api/v1/titles/']
+    paths += [f'/api/v1/titles/{pk}/reviews/' for pk in title_ids]
+    return paths
+
+
+def run_wsgi(args, paths):
+    from api_yamdb.handlers import RouteScopedWSGIHandler
+
+    handler = RouteScopedWSGIHandler()
+    workers = threading.BoundedSemaphore(args.workers)
+    samples = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def client(number):
+        from django.db import connection
+
+        index = number
+        while time.monotonic() < deadline:
+            started = time.perf_counter_ns()
+            with workers:
+                time.sleep(args.client_delay)
+                status, _ = call_wsgi(
+                    handler, make_environ(paths[index % len(paths)]),
+                )
+            assert status == 200, status
+            with lock:
+                samples.append(time.perf_counter_ns() - started)
+            index += 1
+        connection.close()
+
+    threads = [
+        threading.Thread(target=client, args=(number,))
+        for number in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def run_asgi(args, paths):
+    from api_yamdb.handlers import RouteScopedASGIHandler
+
+    application = RouteScopedASGIHandler()
+    samples = []
+
+    async def client(number, deadline):
+        index = number
+        while time.monotonic() < deadline:
+            started = time.perf_counter_ns()
+            status, _ = await call_asgi(
+                application, paths[index % len(paths)],
+                receive_delay=args.client_delay,
+            )
+            assert status == 200, status
+            samples.append(time.perf_counter_ns() - started)
+            index += 1
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(args.workers))
+        deadline = time.monotonic() + args.duration
+        await asyncio.gather(*(
+            client(number, deadline) for number in range(args.concurrency)
+        ))
+
+    asyncio.run(main())
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--client-delay', type=float, default=0.1,
+                        help='Время передачи запроса клиентом, в секундах')
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--titles', type=int, default=20)
+    parser.add_argument('--reviews', type=int, default=10,
+                        help='Отзывов на произведение')
+    parser.add_argument('--json', help='Сохранить результат в JSON файл')
+    args = parser.parse_args()
+
+    setup_django()
+    with tempfile.TemporaryDirectory() as directory:
+        old_name = create_test_database(Path(directory) / 'bench.sqlite3')
+        try:
+            paths = get_paths(seed(args.titles, args.reviews))
+            results = []
+            for name, runner in (('wsgi', run_wsgi), ('asgi', run_asgi)):
+                samples = runner(args, paths)
+                results.append({
+                    'server': name,
+                    'per_second': len(samples) / args.duration,
+                    **summarize(samples),
+                })
+        finally:
+            destroy_test_database(old_name)
+
+    print_table(results, ['server', 'per_second', 'count', 'p50_us',
+                          'p90_us', 'p99_us'])
+    if args.json:
+        write_json(args.json, {'args': vars(args), 'results': results})
+
+
+if __name__ == '__main__':
+    main()
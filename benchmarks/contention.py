@@ -0,0 +1,339 @@
+"""
+Нагрузочный стенд для конкурентных записей через WSGI приложение.
+
+Запросы выполняются в процессе, без сети, из многих потоков или процессов
+(--mode), которые стартуют одновременно. Сценарии:
+
+- review_race: пользователи одновременно пишут отзыв на одно произведение,
+  каждый пользователь отправляет --duplicates одинаковых запросов
+  (гонка проверки «отзыва ещё нет» и вставки);
+- comment_storm: все пишут комментарии к одному отзыву;
+- mixed: чтение списков и карточек вперемешку с отзывами и комментариями
+  (доля писателей --write-ratio).
+
+Выводятся пропускная способность, статусы ответов, классы ошибок
+(IntegrityError, "database is locked" и т.д.) и распределение задержек,
+а для review_race — число созданных отзывов против ожидаемого.
+
+    python -m benchmarks.contention --workers 16 --requests 20
+    python -m benchmarks.contention --mode processes --profile production
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from benchmarks.sqlite_concurrency import PROFILES
+from benchmarks.utils import (call_wsgi, create_test_database,
+                              destroy_test_database, make_environ,
+                              print_table, setup_django, summarize,
+                              write_json)
+
+
+def get_error_class(error):
+    if 'locked' in str(error):
+        return 'database is locked'
+    return type(error).__name__
+
+
+class Recorder:
+    """Результаты запросов одного процесса: вид, статус, задержка."""
+
+    def __init__(self):
+        self.samples = []
+        self.errors = Counter()
+        self.lock = threading.Lock()
+
+    def add(self, kind, status, duration):
+        with self.lock:
+            self.samples.append((kind, status, duration))
+
+    def error(self, sender, request=None, **kwargs):
+        # got_request_exception: исключение уже превращено в ответ 500.
+        import sys
+
+        error = sys.exc_info()[1]
+        with self.lock:
+            self.errors[get_error_class(error)] += 1
+
+
+def seed(workers, requests, scale):
+    """Данные и токены пользователей стенда."""
+    from reviews.models import Review
+    from titles.dataset import DatasetGenerator
+    from titles.models import Category, Title
+    from users.models import User
+    from users.tokens import RoleAccessToken
+
+    DatasetGenerator(scale=scale, seed=0).generate()
+    category = Category.objects.first()
+    race_titles = [
+        Title.objects.create(name=f'Гонка {i}', year=2000, category=category)
+        for i in range(requests)
+    ]
+    users = [
+        User.objects.create(username=f'stress_{i}',
+                            email=f'stress_{i}@yamdb.fake')
+        for i in range(workers)
+    ]
+    review = Review.objects.order_by('pk').first()
+    return {
+        'tokens': [
+            f'Bearer {RoleAccessToken.for_user(user)}' for user in users
+        ],
+        'race_title_ids': [title.pk for title in race_titles],
+        'review': (review.title_id, review.pk),
+        'title_ids': list(Title.objects.exclude(
+            pk__in=[title.pk for title in race_titles],
+        ).values_list('pk', flat=True)),
+        'reviews': list(Review.objects.values_list('title_id', 'pk')[:500]),
+    }
+
+
+def post(path, token, data):
+    return ('write', {
+        'path': path,
+        'method': 'POST',
+        'body': json.dumps(data).encode(),
+        'headers': {'Authorization': token},
+    })
+
+
+def review_race(data, worker, args):
+    users = max(1, args.workers // args.duplicates)
+    token = data['tokens'][worker % users]
+    return [
+        post(f'/api/v1/titles/{title_id}/reviews/', token,
+             {'text': 'Отзыв', 'score': 5})
+        for title_id in data['race_title_ids']
+    ]
+
+
+def comment_storm(data, worker, args):
+    title_id, review_id = data['review']
+    return [
+        post(f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+             data['tokens'][worker], {'text': f'Комментарий {i}'})
+        for i in range(args.requests)
+    ]
+
+
+def mixed(data, worker, args):
+    rng = random.Random(worker)
+    writers = max(1, round(args.workers * args.write_ratio))
+    token = data['tokens'][worker]
+    requests = []
+    for i in range(args.requests):
+        title_id = rng.choice(data['title_ids'])
+        if worker >= writers:
+            path = rng.choice((
+                '/api/v1/titles/',
+                f'/api/v1/titles/{title_id}/',
+                f'/api/v1/titles/{title_id}/reviews/',
+            ))
+            requests.append(('read', {'path': path}))
+        elif i % 2:
+            review_title_id, review_id = rng.choice(data['reviews'])
+            requests.append(post(
+                f'/api/v1/titles/{review_title_id}/reviews/{review_id}'
+                f'/comments/', token, {'text': 'Комментарий'},
+            ))
+        else:
+            # Каждый писатель пишет отзывы на разные произведения.
+            title_id = data['title_ids'][
+                (worker * args.requests + i) % len(data['title_ids'])
+            ]
+            requests.append(post(
+                f'/api/v1/titles/{title_id}/reviews/', token,
+                {'text': 'Отзыв', 'score': 7},
+            ))
+    return requests
+
+
+SCENARIOS = {
+    'review_race': review_race,
+    'comment_storm': comment_storm,
+    'mixed': mixed,
+}
+
+
+def run_requests(handler, requests, barrier, recorder):
+    from django.db import connection
+
+    barrier.wait()
+    for kind, environ in requests:
+        started = time.perf_counter_ns()
+        try:
+            status, _ = call_wsgi(handler, make_environ(**environ))
+        except Exception as error:
+            recorder.errors[get_error_class(error)] += 1
+            status = 'exception'
+        recorder.add(kind, status, time.perf_counter_ns() - started)
+    connection.close()
+
+
+def run_process(handler, requests, barrier, queue):
+    from django.core.signals import got_request_exception
+
+    recorder = Recorder()
+    got_request_exception.connect(recorder.error)
+    run_requests(handler, requests, barrier, recorder)
+    queue.put((recorder.samples, dict(recorder.errors)))
+
+
+def run_scenario(scenario, data, args):
+    """Запустить сценарий; возвращает Recorder и длительность."""
+    from django.core.signals import got_request_exception
+    from django.db import connections
+
+    from api_yamdb.handlers import RouteScopedWSGIHandler
+
+    handler = RouteScopedWSGIHandler()
+    plans = [
+        SCENARIOS[scenario](data, worker, args)
+        for worker in range(args.workers)
+    ]
+    recorder = Recorder()
+    if args.mode == 'threads':
+        got_request_exception.connect(recorder.error)
+        barrier = threading.Barrier(args.workers + 1)
+        workers = [
+            threading.Thread(
+                target=run_requests,
+                args=(handler, plan, barrier, recorder),
+            )
+            for plan in plans
+        ]
+    else:
+        # Процессы получают копию настроек тестовой базы через fork;
+        # открытые соединения не должны переходить в дочерние процессы.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        barrier = context.Barrier(args.workers + 1)
+        queue = context.Queue()
+        workers = [
+            context.Process(
+                target=run_process, args=(handler, plan, barrier, queue),
+            )
+            for plan in plans
+        ]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    started = time.perf_counter()
+    if args.mode == 'processes':
+        for _ in workers:
+            samples, errors = queue.get()
+            recorder.samples.extend(samples)
+            recorder.errors.update(errors)
+    for worker in workers:
+        worker.join()
+    got_request_exception.disconnect(recorder.error)
+    return recorder, time.perf_counter() - started
+
+
+def check_reviews(data, args):
+    """Сколько отзывов создано на произведения review_race."""
+    from reviews.models import Review
+
+    users = max(1, args.workers // args.duplicates)
+    return {
+        'expected_reviews': users * len(data['race_title_ids']),
+        'created_reviews': Review.objects.filter(
+            title_id__in=data['race_title_ids'],
+        ).count(),
+    }
+
+
+def summarize_scenario(recorder, elapsed):
+    result = {
+        'requests': len(recorder.samples),
+        'per_second': len(recorder.samples) / elapsed if elapsed else 0.0,
+        'statuses': dict(Counter(
+            str(status) for _, status, _ in recorder.samples
+        )),
+        'errors': dict(recorder.errors),
+    }
+    for kind in ('read', 'write'):
+        durations = [
+            duration for sample_kind, _, duration in recorder.samples
+            if sample_kind == kind
+        ]
+        if durations:
+            result[kind] = summarize(durations)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument('--mode', choices=('threads', 'processes'),
+                        default='threads')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=20,
+                        help='Запросов на поток или процесс')
+    parser.add_argument('--duplicates', type=int, default=2,
+                        help='review_race: одновременных запросов '
+                             'одного пользователя')
+    parser.add_argument('--write-ratio', type=float, default=0.25,
+                        help='mixed: доля писателей')
+    parser.add_argument('--scenarios', nargs='*', choices=SCENARIOS,
+                        default=list(SCENARIOS))
+    parser.add_argument('--profile', choices=PROFILES, default='default',
+                        help='Настройки базы из benchmarks.sqlite_concurrency')
+    parser.add_argument('--scale', type=float, default=0.05,
+                        help='Масштаб набора данных generate_dataset')
+    parser.add_argument('--json', help='Сохранить результат в JSON файл')
+    args = parser.parse_args()
+
+    os.environ.update(PROFILES[args.profile])
+    setup_django(RESPONSE_CACHE_ENABLED=False)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        old_name = create_test_database(Path(directory) / 'stress.sqlite3')
+        try:
+            data = seed(args.workers, args.requests, args.scale)
+            for scenario in args.scenarios:
+                recorder, elapsed = run_scenario(scenario, data, args)
+                results[scenario] = summarize_scenario(recorder, elapsed)
+            if 'review_race' in results:
+                results['review_race'].update(check_reviews(data, args))
+        finally:
+            destroy_test_database(old_name)
+
+    rows = []
+    for scenario, result in results.items():
+        for kind in ('read', 'write'):
+            if kind in result:
+                rows.append({
+                    'scenario': scenario,
+                    'kind': kind,
+                    'count': result[kind]['count'],
+                    'p50_us': result[kind]['p50_us'],
+                    'p99_us': result[kind]['p99_us'],
+                    'per_second': result['per_second'],
+                })
+    print_table(rows, ['scenario', 'kind', 'count', 'per_second', 'p50_us',
+                       'p99_us'])
+    print()
+    for scenario, result in results.items():
+        print(f'{scenario}: статусы {result["statuses"]}, '
+              f'ошибки {result["errors"]}')
+    if 'review_race' in results:
+        race = results['review_race']
+        print(f'review_race: создано отзывов {race["created_reviews"]} '
+              f'из ожидаемых {race["expected_reviews"]}')
+    if args.json:
+        write_json(args.json, {'args': vars(args), 'results': results})
+
+
+if __name__ == '__main__':
+    main()
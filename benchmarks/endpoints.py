@@ -0,0 +1,327 @@
+"""
+Набор бенчмарков ключевых эндпоинтов на сгенерированных данных.
+
+Для каждого сценария (список произведений с фильтрами и сортировками,
+карточка произведения, списки отзывов и комментариев, создание отзыва,
+регистрация и получение токена) измеряются перцентили задержки, число
+SQL запросов на запрос и пик выделенной памяти (tracemalloc). Запросы
+выполняются в процессе, без сети, через RouteScopedWSGIHandler.
+
+Результат сохраняется в JSON и сравнивается с базовым прогоном:
+метрика, выросшая больше чем на --threshold, считается регрессией,
+и команда завершается с кодом 1.
+
+    python -m benchmarks.endpoints --scale 0.2 --save baseline.json
+    python -m benchmarks.endpoints --scale 0.2 --baseline baseline.json
+"""
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from collections import namedtuple
+from itertools import count
+from urllib.parse import urlencode
+
+from benchmarks.utils import (call_wsgi, create_test_database,
+                              destroy_test_database, make_environ, measure,
+                              print_table, setup_django, summarize,
+                              write_json)
+
+Scenario = namedtuple('Scenario', ('name', 'request', 'statuses'))
+
+# Сравниваемые метрики и допустимый рост: None — --threshold.
+# Число запросов к базе не зависит от машины и не должно расти вовсе.
+COMPARED_METRICS = {
+    'p50_us': None,
+    'p99_us': None,
+    'alloc_peak_kb': None,
+    'queries': 0.0,
+}
+
+TITLE_LIST_QUERIES = (
+    ('titles_list', ''),
+    ('titles_filter_category', 'category=movie'),
+    ('titles_filter_genre', 'genre=drama'),
+    ('titles_filter_name', urlencode({'name': 'город'})),
+    ('titles_filter_year', 'year=2020'),
+    ('titles_ordering_year', 'ordering=-year'),
+    ('titles_ordering_rating', 'ordering=-rating'),
+)
+
+# Запросов для замера памяти; берётся медиана пиков.
+ALLOC_SAMPLES = 5
+
+THROTTLE_RATES = {
+    f'THROTTLE_{name}': '1000000/hour'
+    for name in ('SIGNUP_IP', 'SIGNUP_USERNAME', 'SIGNUP_EMAIL',
+                 'TOKEN_IP', 'TOKEN_USERNAME')
+}
+
+
+class BenchmarkData:
+    """Id и учётные данные, на которые ссылаются сценарии."""
+
+    def __init__(self, titles_limit=50):
+        from django.contrib.auth.tokens import default_token_generator
+        from django.db.models import Count
+
+        from reviews.models import Review
+        from titles.models import Title
+        from users.models import User
+
+        self.title_ids = list(Title.objects.annotate(
+            reviews_count=Count('reviews'),
+        ).order_by('-reviews_count', 'pk').values_list(
+            'pk', flat=True,
+        )[:titles_limit])
+        self.reviews = list(Review.objects.annotate(
+            comments_count=Count('comments'),
+        ).filter(comments_count__gt=0).order_by(
+            '-comments_count', 'pk',
+        ).values_list('title_id', 'pk')[:titles_limit])
+        user = User.objects.order_by('pk').first()
+        self.token_user = (
+            user.username, default_token_generator.make_token(user),
+        )
+        self.all_title_ids = list(
+            Title.objects.order_by('pk').values_list('pk', flat=True)
+        )
+        self.authors = []
+
+    def create_authors(self, requests_count):
+        """
+        Авторы для requests_count новых отзывов: пользователь пишет
+        на произведение один отзыв. Создаются до измерений.
+        """
+        from users.models import User
+        from users.tokens import RoleAccessToken
+
+        needed = requests_count // len(self.all_title_ids) + 1
+        for index in range(len(self.authors), needed):
+            user = User.objects.create(
+                username=f'bench_author_{index}',
+                email=f'bench_author_{index}@yamdb.fake',
+            )
+            self.authors.append(f'Bearer {RoleAccessToken.for_user(user)}')
+
+    def get_author_header(self, index):
+        return self.authors[index // len(self.all_title_ids)]
+
+
+def build_scenarios(data):
+    """Сценарии: имя, функция номер итерации → аргументы make_environ."""
+    titles_count = len(data.all_title_ids)
+
+    def get_title_id(i):
+        return data.title_ids[i % len(data.title_ids)]
+
+    scenarios = [
+        Scenario(name, lambda i, query=query: {
+            'path': '/api/v1/titles/',
+            'query': '&'.join(filter(None, (query, f'offset={i % 5 * 10}'))),
+        }, (200,))
+        for name, query in TITLE_LIST_QUERIES
+    ]
+    scenarios += [
+        Scenario('title_detail', lambda i: {
+            'path': f'/api/v1/titles/{get_title_id(i)}/',
+        }, (200,)),
+        Scenario('reviews_list', lambda i: {
+            'path': f'/api/v1/titles/{get_title_id(i)}/reviews/',
+        }, (200,)),
+        Scenario('comments_list', lambda i: {
+            'path': '/api/v1/titles/{}/reviews/{}/comments/'.format(
+                *data.reviews[i % len(data.reviews)]
+            ),
+        }, (200,)),
+        Scenario('review_post', lambda i: {
+            'path': f'/api/v1/titles/'
+                    f'{data.all_title_ids[i % titles_count]}/reviews/',
+            'method': 'POST',
+            'body': json.dumps({'text': 'Отзыв', 'score': i % 10 + 1})
+            .encode(),
+            'headers': {'Authorization': data.get_author_header(i)},
+        }, (201,)),
+        Scenario('signup', lambda i: {
+            'path': '/api/v1/auth/signup/',
+            'method': 'POST',
+            'body': json.dumps({
+                'username': f'bench_signup_{i}',
+                'email': f'bench_signup_{i}@yamdb.fake',
+            }).encode(),
+        }, (200,)),
+        Scenario('token', lambda i: {
+            'path': '/api/v1/auth/token/',
+            'method': 'POST',
+            'body': json.dumps({
+                'username': data.token_user[0],
+                'confirmation_code': data.token_user[1],
+            }).encode(),
+        }, (200,)),
+    ]
+    return scenarios
+
+
+def run_scenario(handler, scenario, iterations, warmup=5):
+    """Метрики одного сценария; номера итераций не повторяются."""
+    from django.db import connection
+
+    counter = count()
+    queries = []
+
+    def request():
+        index = next(counter)
+        status, body = call_wsgi(
+            handler, make_environ(**scenario.request(index)),
+        )
+        if status not in scenario.statuses:
+            raise AssertionError(
+                f'{scenario.name}: статус {status}, {body[:200]!r}'
+            )
+
+    def count_query(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    samples = measure(request, iterations, warmup=warmup)
+    # CaptureQueriesContext не подходит: сигнал request_started
+    # очищает connection.queries.
+    with connection.execute_wrapper(count_query):
+        request()
+
+    tracemalloc.start()
+    peaks = []
+    try:
+        for _ in range(ALLOC_SAMPLES):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            request()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return {
+        **summarize(samples),
+        'queries': len(queries),
+        'alloc_peak_kb': sorted(peaks)[len(peaks) // 2] / 1024,
+    }
+
+
+def run_suite(iterations, warmup=5, only=None):
+    """Прогнать сценарии на текущей базе; {имя: метрики}."""
+    from django.conf import settings
+
+    from api_yamdb.handlers import RouteScopedWSGIHandler
+
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    handler = RouteScopedWSGIHandler()
+    data = BenchmarkData()
+    # Прогрев, измерения, подсчёт запросов и замеры памяти.
+    data.create_authors(warmup + iterations + 1 + ALLOC_SAMPLES)
+    results = {}
+    for scenario in build_scenarios(data):
+        if only and scenario.name not in only:
+            continue
+        results[scenario.name] = run_scenario(
+            handler, scenario, iterations, warmup,
+        )
+    return results
+
+
+def compare(baseline, results, threshold):
+    """
+    Регрессии относительно базового прогона: список словарей
+    со сценарием, метрикой, старым и новым значением.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        old_metrics = baseline.get(name)
+        if old_metrics is None:
+            continue
+        for metric, allowed in COMPARED_METRICS.items():
+            old, new = old_metrics.get(metric), metrics.get(metric)
+            if old is None or new is None:
+                continue
+            limit = threshold if allowed is None else allowed
+            if new > old * (1 + limit):
+                regressions.append({
+                    'scenario': name,
+                    'metric': metric,
+                    'baseline': old,
+                    'current': new,
+                    'change_pct': (new / old - 1) * 100 if old else None,
+                })
+    return regressions
+
+
+def get_environment():
+    import django
+    from django.conf import settings
+
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'machine': platform.machine(),
+        'engine': settings.DATABASES['default']['ENGINE'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument('--scale', type=float, default=0.2,
+                        help='Масштаб набора данных generate_dataset')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--only', nargs='*', help='Запустить сценарии')
+    parser.add_argument('--response-cache', action='store_true',
+                        help='Не отключать кеш ответов')
+    parser.add_argument('--save', help='Сохранить результат в JSON файл')
+    parser.add_argument('--baseline',
+                        help='JSON файл прошлого прогона для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Допустимый рост метрики (по-умолчанию: 0.2)')
+    args = parser.parse_args()
+
+    setup_django(
+        RESPONSE_CACHE_ENABLED=args.response_cache, **THROTTLE_RATES,
+    )
+    from titles.dataset import DatasetGenerator
+
+    old_name = create_test_database()
+    try:
+        DatasetGenerator(scale=args.scale, seed=args.seed).generate()
+        results = run_suite(args.iterations, args.warmup, args.only)
+    finally:
+        destroy_test_database(old_name)
+
+    print_table(
+        [{'scenario': name, **metrics} for name, metrics in results.items()],
+        ['scenario', 'p50_us', 'p90_us', 'p99_us', 'queries',
+         'alloc_peak_kb'],
+    )
+    if args.save:
+        write_json(args.save, {
+            'args': vars(args),
+            'environment': get_environment(),
+            'results': results,
+        })
+    if not args.baseline:
+        return
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+    regressions = compare(baseline['results'], results, args.threshold)
+    print()
+    if not regressions:
+        print(f'Регрессий относительно {args.baseline} нет')
+        return
+    print(f'Регрессии относительно {args.baseline}:')
+    print_table(regressions, ['scenario', 'metric', 'baseline', 'current',
+                              'change_pct'])
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""
+Микробенчмарки отдельных частей обработки запроса.
+
+Сериализация TitleGETSerializer, ReviewSerializer и CommentSerializer
+(1000 объектов за вызов), построение queryset в TitleFilter, проверки
+из users/permissions.py, validate_year и SignUpSerializer.validate.
+Для каждого случая выводятся нс на операцию (медиана) и пик выделенной
+памяти на операцию (tracemalloc). База создаётся в памяти и заполняется
+generate_dataset.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --only permission_is_admin --json -
+"""
+import argparse
+import json
+import sys
+import tracemalloc
+from collections import namedtuple
+from itertools import cycle, islice
+from types import SimpleNamespace
+
+from benchmarks.utils import (create_test_database, destroy_test_database,
+                              measure, percentile, print_table, setup_django,
+                              write_json)
+
+Case = namedtuple('Case', ('name', 'func', 'ops'))
+
+# Объектов в одном вызове сериализатора.
+SERIALIZED_OBJECTS = 1000
+
+# Повторов за вызов для быстрых проверок: время одного вызова
+# сравнимо с погрешностью таймера.
+REPEATS = 1000
+
+ALLOC_SAMPLES = 5
+
+
+def repeat(check, times=REPEATS):
+    def func():
+        for _ in range(times):
+            check()
+    return func
+
+
+def take(queryset, count=SERIALIZED_OBJECTS):
+    """count объектов по кругу: сериализатору повторы не важны."""
+    return list(islice(cycle(queryset), count))
+
+
+def build_serializer_cases():
+    from django.db.models import Avg
+
+    from api.serializers import (CommentSerializer, ReviewSerializer,
+                                 TitleGETSerializer)
+    from reviews.models import Comment, Review
+    from titles.models import Title
+
+    titles = take(Title.objects.select_related('category').prefetch_related(
+        'genre',
+    ).annotate(rating=Avg('reviews__score')).order_by('pk'))
+    reviews = take(Review.objects.select_related('author').order_by('pk'))
+    comments = take(Comment.objects.select_related('author').order_by('pk'))
+    return [
+        Case('title_get_serializer', lambda: TitleGETSerializer(
+            titles, many=True,
+        ).data, len(titles)),
+        Case('review_serializer', lambda: ReviewSerializer(
+            reviews, many=True,
+        ).data, len(reviews)),
+        Case('comment_serializer', lambda: CommentSerializer(
+            comments, many=True,
+        ).data, len(comments)),
+    ]
+
+
+def build_filter_cases():
+    from api.filters import TitleFilter
+    from titles.models import Category, Genre, Title
+
+    params = {
+        'name': 'город',
+        'year': '2020',
+        'category': Category.objects.order_by('pk').first().slug,
+        'genre': Genre.objects.order_by('pk').first().slug,
+    }
+    return [
+        # Queryset строится, но не выполняется.
+        Case('title_filter_queryset', lambda: TitleFilter(
+            params, queryset=Title.objects.all(),
+        ).qs, 1),
+    ]
+
+
+def build_permission_cases():
+    from reviews.models import Review
+    from users.models import User
+    from users.permissions import (IsAdmin, IsAdminOrReadOnly,
+                                   IsAuthorModeratorAdminOrReadOnly)
+
+    review = Review.objects.select_related('author').order_by('pk').first()
+    admin = User(username='micro_admin', role=User.ADMIN)
+    moderator = User(username='micro_moderator', role=User.MODERATOR)
+    get = SimpleNamespace(method='GET', user=review.author)
+    post = SimpleNamespace(method='POST', user=admin)
+    patch_author = SimpleNamespace(method='PATCH', user=review.author)
+    patch_moderator = SimpleNamespace(method='PATCH', user=moderator)
+    is_admin = IsAdmin()
+    admin_or_read_only = IsAdminOrReadOnly()
+    author_or_staff = IsAuthorModeratorAdminOrReadOnly()
+    return [
+        Case('permission_is_admin', repeat(
+            lambda: is_admin.has_permission(post, None),
+        ), REPEATS),
+        Case('permission_admin_or_read_only_get', repeat(
+            lambda: admin_or_read_only.has_permission(get, None),
+        ), REPEATS),
+        Case('permission_admin_or_read_only_post', repeat(
+            lambda: admin_or_read_only.has_permission(post, None),
+        ), REPEATS),
+        Case('permission_author_object', repeat(
+            lambda: author_or_staff.has_object_permission(
+                patch_author, None, review,
+            ),
+        ), REPEATS),
+        Case('permission_moderator_object', repeat(
+            lambda: author_or_staff.has_object_permission(
+                patch_moderator, None, review,
+            ),
+        ), REPEATS),
+    ]
+
+
+def build_validator_cases():
+    from django.core.exceptions import ValidationError
+
+    from api.serializers import SignUpSerializer
+    from api.validators import validate_year
+    from users.models import User
+
+    def invalid_year():
+        try:
+            validate_year(10 ** 6)
+        except ValidationError:
+            pass
+
+    user = User.objects.order_by('pk').first()
+    existing = {'username': user.username, 'email': user.email}
+    new = {'username': 'micro_new', 'email': 'micro_new@yamdb.fake'}
+    serializer = SignUpSerializer()
+    return [
+        Case('validate_year', repeat(lambda: validate_year(2000)), REPEATS),
+        Case('validate_year_invalid', repeat(invalid_year), REPEATS),
+        Case('signup_validate_existing',
+             lambda: serializer.validate(existing), 1),
+        Case('signup_validate_new', lambda: serializer.validate(new), 1),
+    ]
+
+
+def build_cases():
+    return [
+        *build_serializer_cases(),
+        *build_filter_cases(),
+        *build_permission_cases(),
+        *build_validator_cases(),
+    ]
+
+
+def run_case(case, iterations, warmup=3):
+    """нс и пик выделенной памяти в байтах на операцию (медианы)."""
+    samples = measure(case.func, iterations, warmup=warmup)
+    tracemalloc.start()
+    peaks = []
+    try:
+        for _ in range(ALLOC_SAMPLES):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            case.func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return {
+        'ops': case.ops,
+        'iterations': iterations,
+        'ns_per_op': percentile(samples, 0.5) / case.ops,
+        'p90_ns_per_op': percentile(samples, 0.9) / case.ops,
+        'alloc_bytes_per_op': percentile(peaks, 0.5) / case.ops,
+    }
+
+
+def run_suite(iterations, warmup=3, only=None):
+    """Прогнать случаи на текущей базе; {имя: метрики}."""
+    return {
+        case.name: run_case(case, iterations, warmup)
+        for case in build_cases()
+        if not only or case.name in only
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument('--scale', type=float, default=0.05,
+                        help='Масштаб набора данных generate_dataset')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--only', nargs='*', help='Запустить случаи')
+    parser.add_argument('--json',
+                        help='Сохранить результат в JSON файл, "-" — '
+                             'вывести JSON вместо таблицы')
+    args = parser.parse_args()
+
+    setup_django()
+    from titles.dataset import DatasetGenerator
+
+    old_name = create_test_database()
+    try:
+        DatasetGenerator(scale=args.scale, seed=args.seed).generate()
+        results = run_suite(args.iterations, args.warmup, args.only)
+    finally:
+        destroy_test_database(old_name)
+
+    data = {'args': vars(args), 'results': results}
+    if args.json == '-':
+        json.dump(data, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return
+    print_table(
+        [{'case': name, **metrics} for name, metrics in results.items()],
+        ['case', 'ops', 'ns_per_op', 'p90_ns_per_op', 'alloc_bytes_per_op'],
+    )
+    if args.json:
+        write_json(args.json, data)
+
+
+if __name__ == '__main__':
+    main()
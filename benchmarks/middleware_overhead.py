@@ -0,0 +1,76 @@
+"""
+Накладные расходы цепочки middleware на запрос к API.
+
+Сравнивает обработку GET /api/v1/categories/ стандартным WSGIHandler
+(полная цепочка MIDDLEWARE) и RouteScopedWSGIHandler (LEAN_MIDDLEWARE
+для /api/). Запросы выполняются в процессе, без сети.
+
+    python -m benchmarks.middleware_overhead --iterations 5000
+"""
+import argparse
+
+from benchmarks.utils import (call_wsgi, create_test_database,
+                              destroy_test_database, make_environ, measure,
+                              print_table, setup_django, summarize,
+                              write_json)
+
+PATH = '/api/v1/categories/'
+
+
+def request(handler, path):
+    status, _ = call_wsgi(handler, make_environ(path))
+    assert status == 200, status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--path', default=PATH)
+    parser.add_argument('--json', help='Сохранить результат в JSON файл')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.handlers.wsgi import WSGIHandler
+
+    from api_yamdb.handlers import RouteScopedWSGIHandler
+    from titles.models import Category
+
+    old_name = create_test_database()
+    try:
+        Category.objects.bulk_create(
+            Category(name=f'Категория {i}', slug=f'category-{i}')
+            for i in range(10)
+        )
+        handlers = {
+            'full': WSGIHandler(),
+            'lean': RouteScopedWSGIHandler(),
+        }
+        # Замеры чередуются короткими сериями, чтобы прогрев и фоновые
+        # колебания нагрузки одинаково влияли на оба обработчика.
+        samples = {name: [] for name in handlers}
+        for _ in range(args.rounds):
+            for name, handler in handlers.items():
+                samples[name] += measure(
+                    lambda: request(handler, args.path),
+                    args.iterations // args.rounds,
+                )
+        results = [
+            {'handler': name, **summarize(samples[name])}
+            for name in handlers
+        ]
+    finally:
+        destroy_test_database(old_name)
+
+    full, lean = results
+    saved = full['mean_us'] - lean['mean_us']
+    print_table(results, ['handler', 'count', 'mean_us', 'p50_us', 'p90_us',
+                          'p99_us'])
+    print(f'\nЭкономия на запрос: {saved:.1f} мкс '
+          f'({saved / full["mean_us"] * 100:.1f}%)')
+    if args.json:
+        write_json(args.json, {'path': args.path, 'results': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""
+Воспроизведение записанного трафика (TRAFFIC_CAPTURE_ENABLED=True).
+
+Запросы из файлов записи отправляются в исходном порядке и с исходными
+интервалами, ускоренными в --speed раз (0 — без пауз), на запущенный
+сервер (--url) или в процессе через WSGI приложение с настройками
+из окружения. Для каждого маршрута (id в пути заменяются на {id})
+считаются p50/p99 задержки и распределение статусов ответов.
+
+Результат сохраняется в JSON; при --baseline сравнивается с прогоном
+другой сборки: рост задержки больше --threshold и изменение статусов
+считаются регрессией, команда завершается с кодом 1. Сравнивать имеет
+смысл прогоны на одинаковых данных, например после
+generate_dataset с одним --seed.
+
+Ограничения: все запросы, записанные с авторизацией, отправляются
+с одним заголовком --authorization, поэтому запросы, требующие прав
+другого пользователя (изменение чужих отзывов, действия администратора),
+получают 401/403. Коды подтверждения записываются как '***', и запросы
+к /auth/token/ возвращают 400. Сравнение статусов между сборками от этого
+не страдает, но такие маршруты не отражают исходную нагрузку на запись.
+Заголовок --authorization не сохраняется в --save.
+
+    python -m benchmarks.replay traffic/*.jsonl* --url http://127.0.0.1:8000
+    python -m benchmarks.replay trace.jsonl --speed 0 --baseline old.json
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.utils import (call_wsgi, make_environ, print_table,
+                              setup_django, summarize, write_json)
+
+ID_PATTERN = re.compile(r'/\d+(?=/|$)')
+
+COMPARED_METRICS = ('p50_us', 'p99_us')
+
+
+def get_route(record):
+    return f'{record["method"]} {ID_PATTERN.sub("/{id}", record["path"])}'
+
+
+def load_trace(paths):
+    """
+    Записи из файлов, упорядоченные по времени запроса.
+    Ротированные файлы (.1, .2, ...) можно передавать в любом порядке.
+    """
+    records = []
+    for path in paths:
+        with open(path, encoding='utf-8') as file:
+            records.extend(json.loads(line) for line in file if line.strip())
+    records.sort(key=lambda record: record['ts'])
+    return records
+
+
+def get_request(record, authorization=None):
+    """Аргументы make_environ для записи."""
+    headers = {}
+    if record.get('auth') and authorization:
+        headers['Authorization'] = authorization
+    body = b''
+    if record.get('body') is not None:
+        body = json.dumps(record['body']).encode()
+    return {
+        'path': record['path'],
+        'method': record['method'],
+        'query': record.get('query', ''),
+        'body': body,
+        'headers': headers,
+        'content_type': record.get('content_type') or 'application/json',
+    }
+
+
+def http_sender(base_url, authorization=None):
+    """Отправка записи на запущенный сервер; возвращает статус."""
+    base_url = base_url.rstrip('/')
+
+    def send(record):
+        request = get_request(record, authorization)
+        url = base_url + request['path']
+        if request['query']:
+            url += '?' + request['query']
+        http_request = urllib.request.Request(
+            url, data=request['body'] or None, method=request['method'],
+            headers={
+                'Content-Type': request['content_type'],
+                **request['headers'],
+            },
+        )
+        try:
+            with urllib.request.urlopen(http_request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            return error.code
+
+    return send
+
+
+def wsgi_sender(handler, authorization=None):
+    """Отправка записи в WSGI приложение в этом процессе."""
+    def send(record):
+        status, _ = call_wsgi(
+            handler, make_environ(**get_request(record, authorization)),
+        )
+        return status
+
+    return send
+
+
+def replay(records, send, speed=1.0, concurrency=8):
+    """
+    Воспроизвести записи; список (маршрут, записанный статус, статус,
+    задержка нс). Запрос отправляется в момент, соответствующий его
+    смещению от первой записи, делённому на speed.
+    """
+    results = []
+    lock = threading.Lock()
+
+    def run(record):
+        started = time.perf_counter_ns()
+        try:
+            status = send(record)
+        except OSError as error:
+            status = type(error).__name__
+        duration = time.perf_counter_ns() - started
+        with lock:
+            results.append(
+                (get_route(record), record.get('status'), status, duration)
+            )
+
+    if not records:
+        return results
+    first = records[0]['ts']
+    started = time.monotonic()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for record in records:
+            if speed:
+                delay = (record['ts'] - first) / speed
+                pause = started + delay - time.monotonic()
+                if pause > 0:
+                    time.sleep(pause)
+            executor.submit(run, record)
+    return results
+
+
+def summarize_replay(results):
+    """Метрики по маршрутам: задержки, статусы и расхождения с записью."""
+    routes = defaultdict(list)
+    for route, recorded, status, duration in results:
+        routes[route].append((recorded, status, duration))
+    summary = {}
+    for route, samples in sorted(routes.items()):
+        summary[route] = {
+            **summarize([duration for _, _, duration in samples]),
+            'statuses': dict(Counter(
+                str(status) for _, status, _ in samples
+            )),
+            'status_mismatches': sum(
+                recorded is not None and recorded != status
+                for recorded, status, _ in samples
+            ),
+        }
+    return summary
+
+
+def compare(baseline, results, threshold):
+    """
+    Регрессии относительно прогона другой сборки: рост задержки больше
+    threshold и другое распределение статусов на маршруте.
+    """
+    regressions = []
+    for route, metrics in results.items():
+        old_metrics = baseline.get(route)
+        if old_metrics is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = old_metrics[metric], metrics[metric]
+            if new > old * (1 + threshold):
+                regressions.append({
+                    'route': route,
+                    'metric': metric,
+                    'baseline': old,
+                    'current': new,
+                })
+        if old_metrics['statuses'] != metrics['statuses']:
+            regressions.append({
+                'route': route,
+                'metric': 'statuses',
+                'baseline': old_metrics['statuses'],
+                'current': metrics['statuses'],
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument('traces', nargs='+', help='Файлы записи трафика')
+    parser.add_argument('--url', help='Адрес сервера; без него запросы '
+                                      'выполняются в этом процессе')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Ускорение относительно записи, 0 — без пауз')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Одновременных запросов')
+    parser.add_argument('--authorization',
+                        help='Заголовок Authorization для запросов, '
+                             'записанных с авторизацией')
+    parser.add_argument('--save', help='Сохранить результат в JSON файл')
+    parser.add_argument('--baseline',
+                        help='JSON файл прогона другой сборки')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Допустимый рост задержки (по-умолчанию: 0.2)')
+    args = parser.parse_args()
+
+    records = load_trace(args.traces)
+    if args.url:
+        send = http_sender(args.url, args.authorization)
+    else:
+        setup_django()
+        from api_yamdb.handlers import RouteScopedWSGIHandler
+
+        send = wsgi_sender(RouteScopedWSGIHandler(), args.authorization)
+    started = time.perf_counter()
+    results = summarize_replay(
+        replay(records, send, args.speed, args.concurrency)
+    )
+    seconds = time.perf_counter() - started
+
+    print(f'Воспроизведено {len(records)} запросов за {seconds:.2f} с')
+    print_table(
+        [
+            {'route': route, **metrics, 'statuses': json.dumps(
+                metrics['statuses'],
+            )}
+            for route, metrics in results.items()
+        ],
+        ['route', 'count', 'p50_us', 'p99_us', 'statuses',
+         'status_mismatches'],
+    )
+    if args.save:
+        # Токен не должен попадать в сохраняемые результаты.
+        saved_args = {
+            name: value for name, value in vars(args).items()
+            if name != 'authorization'
+        }
+        write_json(args.save, {'args': saved_args, 'results': results})
+    if not args.baseline:
+        return
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+    regressions = compare(baseline['results'], results, args.threshold)
+    print()
+    if not regressions:
+        print(f'Регрессий относительно {args.baseline} нет')
+        return
+    print(f'Регрессии относительно {args.baseline}:')
+    print_table(regressions, ['route', 'metric', 'baseline', 'current'])
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
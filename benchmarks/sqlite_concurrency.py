@@ -0,0 +1,230 @@
+"""
+Конкурентные чтения и записи в SQLite при разных профилях базы данных.
+
+Для каждого профиля (стандартный, SQLITE_PRODUCTION и SQLITE_PRODUCTION
+с очередью на запись WRITE_QUEUE) в отдельном процессе создаётся файловая
+база, после чего потоки-читатели выполняют запрос списка произведений
+с рейтингом, а потоки-писатели — транзакции «проверить отзыв и добавить
+комментарий». Выводятся пропускная способность, задержки, доля ошибок
+"database is locked" и статистика очереди на запись.
+
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from benchmarks.utils import (BASE_DIR, create_test_database,
+                              destroy_test_database, print_table,
+                              setup_django, summarize, write_json)
+
+PROFILES = {
+    'default': {'SQLITE_PRODUCTION': 'False'},
+    'production': {'SQLITE_PRODUCTION': 'True'},
+    'production+queue': {
+        'SQLITE_PRODUCTION': 'True', 'WRITE_QUEUE_ENABLED': 'True',
+    },
+}
+
+
+def seed(titles_count, users_count):
+    from reviews.models import Review
+    from titles.models import Category, Title
+    from users.models import User
+
+    category = Category.objects.create(name='Фильм', slug='movie')
+    User.objects.bulk_create(
+        User(username=f'user_{i}', username_lower=f'user_{i}',
+             email=f'user_{i}@yamdb.fake')
+        for i in range(users_count)
+    )
+    users = list(User.objects.order_by('pk'))
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i}', year=2000, category=category)
+        for i in range(titles_count)
+    )
+    titles = list(Title.objects.order_by('pk'))
+    Review.objects.bulk_create(
+        Review(title=title, author=users[0], text='Отзыв', score=5)
+        for title in titles
+    )
+    return [title.pk for title in titles], [user.pk for user in users]
+
+
+def reader(deadline, title_ids, stats):
+    from django.db import connection
+    from django.db.models import Avg
+
+    from titles.models import Title
+
+    index = 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter_ns()
+        try:
+            list(Title.objects.annotate(
+                rating=Avg('reviews__score')
+            ).order_by('name')[:10])
+            list(Title.objects.get(
+                pk=title_ids[index % len(title_ids)]
+            ).reviews.all()[:10])
+        except Exception as error:
+            stats.error(error)
+        else:
+            stats.add('read', time.perf_counter_ns() - started)
+        index += 1
+    connection.close()
+
+
+def writer(deadline, title_ids, author_id, stats):
+    from django.db import connection, transaction
+
+    from api_yamdb.write_queue import serialized_write
+    from reviews.models import Comment, Review
+
+    index = 0
+    while time.monotonic() < deadline:
+        title_id = title_ids[index % len(title_ids)]
+        started = time.perf_counter_ns()
+        try:
+            with serialized_write(), transaction.atomic():
+                review = Review.objects.filter(title_id=title_id).first()
+                Comment.objects.create(
+                    review=review, author_id=author_id, text='Комментарий',
+                )
+        except Exception as error:
+            stats.error(error)
+        else:
+            stats.add('write', time.perf_counter_ns() - started)
+        index += 1
+    connection.close()
+
+
+class Stats:
+    def __init__(self):
+        self.samples = {'read': [], 'write': []}
+        self.errors = Counter()
+        self.lock = threading.Lock()
+
+    def add(self, kind, duration):
+        with self.lock:
+            self.samples[kind].append(duration)
+
+    def error(self, error):
+        name = type(error).__name__
+        if 'locked' in str(error):
+            name = 'database is locked'
+        with self.lock:
+            self.errors[name] += 1
+
+
+def run_threads(args, database_path):
+    old_name = create_test_database(database_path)
+    try:
+        title_ids, user_ids = seed(args.titles, args.writers)
+        stats = Stats()
+        deadline = time.monotonic() + args.duration
+        threads = [
+            threading.Thread(target=reader, args=(deadline, title_ids, stats))
+            for _ in range(args.readers)
+        ] + [
+            threading.Thread(
+                target=writer, args=(deadline, title_ids, user_id, stats),
+            )
+            for user_id in user_ids
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        destroy_test_database(old_name)
+    return stats
+
+
+def run_profile(args):
+    setup_django()
+    from django.conf import settings
+
+    from api_yamdb.write_queue import get_write_queue
+
+    with tempfile.TemporaryDirectory() as directory:
+        stats = run_threads(args, Path(directory) / 'bench.sqlite3')
+    write_queue = get_write_queue()
+
+    result = {'engine': settings.DATABASES['default']['ENGINE']}
+    for kind, samples in stats.samples.items():
+        result[kind] = {
+            **(summarize(samples) if samples else {'count': 0}),
+            'per_second': len(samples) / args.duration,
+        }
+    total = sum(len(samples) for samples in stats.samples.values())
+    errors = sum(stats.errors.values())
+    result['errors'] = dict(stats.errors)
+    if write_queue is not None:
+        result['write_queue'] = write_queue.stats()
+    result['error_rate'] = errors / max(1, total + errors)
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--titles', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--profile', choices=PROFILES,
+                        help='Запустить только один профиль в этом процессе')
+    parser.add_argument('--json', help='Сохранить результат в JSON файл')
+    args = parser.parse_args()
+
+    if args.profile:
+        os.environ.update(PROFILES[args.profile])
+        run_profile(args)
+        return
+
+    results = {}
+    for profile in PROFILES:
+        command = [
+            sys.executable, '-m', 'benchmarks.sqlite_concurrency',
+            '--profile', profile,
+            '--readers', str(args.readers),
+            '--writers', str(args.writers),
+            '--titles', str(args.titles),
+            '--duration', str(args.duration),
+        ]
+        output = subprocess.run(
+            command, cwd=BASE_DIR, check=True, capture_output=True, text=True,
+        ).stdout
+        results[profile] = json.loads(output.strip().splitlines()[-1])
+
+    rows = []
+    for profile, result in results.items():
+        for kind in ('read', 'write'):
+            rows.append({
+                'profile': profile,
+                'operation': kind,
+                'per_second': result[kind]['per_second'],
+                'p50_us': result[kind].get('p50_us'),
+                'p99_us': result[kind].get('p99_us'),
+            })
+    print_table(rows, ['profile', 'operation', 'per_second', 'p50_us',
+                       'p99_us'])
+    print()
+    for profile, result in results.items():
+        if 'write_queue' in result:
+            print(f'{profile}: очередь на запись {result["write_queue"]}')
+        print(f'{profile}: ошибок {result["error_rate"] * 100:.2f}% '
+              f'{result["errors"]}')
+    if args.json:
+        write_json(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Пропускная способность списка произведений: сериализация из строк базы
+против сборки ответа из готовых JSON представлений (MATERIALIZED_TITLES).
+Кеш ответов отключён, чтобы каждый запрос доходил до базы.
+
+    python -m benchmarks.title_list --titles 2000 --limit 50
+"""
+import argparse
+import time
+
+from benchmarks.utils import (call_wsgi, create_test_database,
+                              destroy_test_database, make_environ, measure,
+                              print_table, setup_django, summarize,
+                              write_json)
+
+
+def seed(titles_count, genres_count, reviews_per_title):
+    from reviews.models import Review
+    from titles.models import Category, Genre, GenreTitle, Title
+    from users.models import User
+
+    category = Category.objects.create(name='Фильм', slug='movie')
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(genres_count)
+    )
+    genres = list(Genre.objects.all())
+    User.objects.bulk_create(
+        User(username=f'user_{i}', username_lower=f'user_{i}',
+             email=f'user_{i}@yamdb.fake')
+        for i in range(reviews_per_title)
+    )
+    users = list(User.objects.all())
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i:05}', year=2000, category=category,
+              description='Описание произведения ' * 5)
+        for i in range(titles_count)
+    )
+    titles = list(Title.objects.all())
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title=title, genre=genres[(title.pk + shift) % len(genres)])
+        for title in titles
+        for shift in range(2)
+    )
+    Review.objects.bulk_create(
+        Review(title=title, author=user, text='Отзыв', score=i % 10 + 1)
+        for title in titles
+        for i, user in enumerate(users)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--genres', type=int, default=10)
+    parser.add_argument('--reviews', type=int, default=5,
+                        help='Отзывов на произведение')
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--json', help='Сохранить результат в JSON файл')
+    args = parser.parse_args()
+
+    setup_django(RESPONSE_CACHE_ENABLED=False)
+    from django.conf import settings
+
+    from api_yamdb.handlers import RouteScopedWSGIHandler
+
+    old_name = create_test_database()
+    try:
+        seed(args.titles, args.genres, args.reviews)
+        handler = RouteScopedWSGIHandler()
+        pages = max(1, args.titles // args.limit)
+        results = []
+        for materialized in (False, True):
+            settings.MATERIALIZED_TITLES = materialized
+            counter = iter(range(10 ** 9))
+
+            def request():
+                offset = next(counter) % pages * args.limit
+                status, _ = call_wsgi(handler, make_environ(
+                    '/api/v1/titles/',
+                    query=f'limit={args.limit}&offset={offset}',
+                ))
+                assert status == 200, status
+
+            # Первый проход заполняет отсутствующие представления.
+            for _ in range(pages):
+                request()
+            started = time.perf_counter()
+            samples = measure(request, args.iterations, warmup=0)
+            elapsed = time.perf_counter() - started
+            results.append({
+                'mode': 'materialized' if materialized else 'serializer',
+                'per_second': args.iterations / elapsed,
+                **summarize(samples),
+            })
+    finally:
+        destroy_test_database(old_name)
+
+    print_table(results, ['mode', 'per_second', 'count', 'p50_us',
+                          'p90_us', 'p99_us'])
+    if args.json:
+        write_json(args.json, {'args': vars(args), 'results': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+import atexit
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from wsgiref.util import setup_testing_defaults
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PROJECT_DIR = BASE_DIR / 'api_yamdb'
+
+
+def setup_django(**environ):
+    """Подготовка Django для запуска бенчмарка вне manage.py."""
+    if str(PROJECT_DIR) not in sys.path:
+        sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    if 'SHARED_CACHE_LOCATION' not in os.environ:
+        # Общий кеш во временном каталоге, а не в кеше сервера разработки.
+        # Дочерние процессы наследуют переменную и используют тот же файл.
+        cache_dir = tempfile.mkdtemp(prefix='api_yamdb_benchmark_')
+        atexit.register(shutil.rmtree, cache_dir, ignore_errors=True)
+        os.environ['SHARED_CACHE_LOCATION'] = os.path.join(
+            cache_dir, 'cache.sqlite3',
+        )
+    for key, value in environ.items():
+        os.environ.setdefault(key, str(value))
+
+    import django
+    django.setup()
+
+
+def create_test_database(name=None):
+    """
+    Создание чистой тестовой базы данных.
+    По умолчанию SQLite база создаётся в памяти; для бенчмарков
+    с несколькими потоками или процессами нужен файл (name).
+    """
+    from django.db import connection
+
+    if name is not None:
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = str(name)
+    return connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, keepdb=False,
+    )
+
+
+def destroy_test_database(old_name):
+    from django.db import connection
+
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def make_environ(path, method='GET', query='', body=b'', headers=None,
+                 content_type='application/json'):
+    """WSGI environ запроса без сетевого соединения."""
+    environ = {
+        'PATH_INFO': path,
+        'REQUEST_METHOD': method,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': content_type,
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    }
+    for name, value in (headers or {}).items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    setup_testing_defaults(environ)
+    return environ
+
+
+def call_wsgi(application, environ):
+    """Вызов WSGI приложения, возвращает статус и тело ответа."""
+    status_holder = []
+
+    def start_response(status, headers, exc_info=None):
+        status_holder.append(int(status.split(' ', 1)[0]))
+
+    if isinstance(environ.get('wsgi.input'), io.BytesIO):
+        environ['wsgi.input'].seek(0)
+    response = application(environ, start_response)
+    try:
+        body = b''.join(response)
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return status_holder[0], body
+
+
+def measure(func, iterations, warmup=10):
+    """Время выполнения func в наносекундах для каждой итерации."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter_ns()
+        func()
+        samples.append(time.perf_counter_ns() - started)
+    return samples
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples_ns):
+    """Сводка по выборке времён в наносекундах; результат в микросекундах."""
+    return {
+        'count': len(samples_ns),
+        'mean_us': statistics.mean(samples_ns) / 1000,
+        'p50_us': percentile(samples_ns, 0.50) / 1000,
+        'p90_us': percentile(samples_ns, 0.90) / 1000,
+        'p99_us': percentile(samples_ns, 0.99) / 1000,
+    }
+
+
+def print_table(rows, columns):
+    """Вывод списка словарей в виде таблицы."""
+    widths = {
+        column: max(
+            len(column),
+            *(len(format_value(row.get(column))) for row in rows),
+        )
+        for column in columns
+    }
+    print('  '.join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print('  '.join(
+            format_value(row.get(column)).ljust(widths[column])
+            for column in columns
+        ))
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return f'{value:.1f}'
+    return '' if value is None else str(value)
+
+
+def write_json(path, data):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False, indent=2)
+
+
+async def call_asgi(application, path, method='GET', query='', body=b'',
+                    headers=None, receive_delay=0):
+    """
+    Вызов ASGI приложения, возвращает статус и тело ответа.
+    receive_delay имитирует медленного клиента: тело запроса приходит
+    с задержкой, во время которой сервер свободен для других запросов.
+    """
+    import asyncio
+
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'root_path': '',
+        'query_string': query.encode(),
+        'headers': [
+            (b'host', b'testserver'),
+            (b'content-length', str(len(body)).encode()),
+            *(
+                (name.lower().encode(), value.encode())
+                for name, value in (headers or {}).items()
+            ),
+        ],
+        'client': ('127.0.0.1', 10000),
+        'server': ('testserver', 80),
+    }
+    status_holder = []
+    chunks = []
+
+    async def receive():
+        if receive_delay:
+            await asyncio.sleep(receive_delay)
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status_holder.append(message['status'])
+        else:
+            chunks.append(message.get('body', b''))
+
+    await application(scope, receive, send)
+    return status_holder[0], b''.join(chunks)
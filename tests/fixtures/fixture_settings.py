@@ -0,0 +1,20 @@
+import copy
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+
+
+@pytest.fixture(autouse=True, scope='session')
+def test_settings(tmp_path_factory):
+    """
+    Настройки тестового окружения: письма отправляются сразу, чтобы тесты
+    видели их в mail.outbox, а общий кеш лежит во временном каталоге,
+    чтобы не стирать кеш запущенного сервера разработки.
+    """
+    caches = copy.deepcopy(settings.CACHES)
+    caches['shared']['LOCATION'] = str(
+        tmp_path_factory.mktemp('cache') / 'cache.sqlite3'
+    )
+    with override_settings(EMAIL_OUTBOX_ASYNC=False, CACHES=caches):
+        yield
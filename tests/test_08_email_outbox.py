@@ -0,0 +1,143 @@
+import socket
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+
+from users.models import ConfirmationEmail
+
+
+def get_closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08EmailOutbox:
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    VALID_DATA = {
+        'email': 'outbox@yamdb.fake',
+        'username': 'outbox_user'
+    }
+
+    @pytest.fixture(autouse=True)
+    def async_outbox(self, settings):
+        settings.EMAIL_OUTBOX_ASYNC = True
+
+    def test_01_signup_does_not_send_inline(self, client):
+        outbox_before_count = len(mail.outbox)
+
+        response = client.post(self.URL_SIGNUP, data=self.VALID_DATA)
+
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == outbox_before_count, (
+            'При EMAIL_OUTBOX_ASYNC=True письмо не должно отправляться '
+            'во время обработки запроса.'
+        )
+        assert ConfirmationEmail.objects.filter(
+            email=self.VALID_DATA['email'],
+            status=ConfirmationEmail.PENDING,
+        ).count() == 1
+
+    def test_02_repeated_signup_is_deduplicated(self, client):
+        for _ in range(3):
+            client.post(self.URL_SIGNUP, data=self.VALID_DATA)
+
+        assert ConfirmationEmail.objects.filter(
+            email=self.VALID_DATA['email'],
+        ).count() == 1, (
+            'Повторные регистрации на один адрес не должны создавать '
+            'несколько писем в очереди.'
+        )
+
+    def test_03_worker_sends_pending(self, client):
+        client.post(self.URL_SIGNUP, data=self.VALID_DATA)
+        outbox_before_count = len(mail.outbox)
+
+        call_command('send_confirmation_emails', '--once')
+
+        assert len(mail.outbox) == outbox_before_count + 1
+        assert self.VALID_DATA['email'] in mail.outbox[-1].to
+        outgoing = ConfirmationEmail.objects.get(
+            email=self.VALID_DATA['email']
+        )
+        assert outgoing.status == ConfirmationEmail.SENT
+        assert outgoing.sent_at is not None
+
+    def test_04_worker_retries_with_backoff(self, client, settings):
+        client.post(self.URL_SIGNUP, data=self.VALID_DATA)
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+        settings.EMAIL_HOST = '127.0.0.1'
+        settings.EMAIL_PORT = get_closed_port()
+        settings.EMAIL_USE_TLS = False
+
+        call_command('send_confirmation_emails', '--once')
+
+        outgoing = ConfirmationEmail.objects.get(
+            email=self.VALID_DATA['email']
+        )
+        assert outgoing.status == ConfirmationEmail.PENDING
+        assert outgoing.attempts == 1
+        assert outgoing.last_error
+        assert outgoing.next_attempt_at > outgoing.created_at
+
+        call_command('send_confirmation_emails', '--once')
+        outgoing.refresh_from_db()
+        assert outgoing.attempts == 1, (
+            'Письмо не должно отправляться повторно до истечения задержки.'
+        )
+
+    def test_05_worker_gives_up_after_max_attempts(self, client, settings):
+        client.post(self.URL_SIGNUP, data=self.VALID_DATA)
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+        settings.EMAIL_HOST = '127.0.0.1'
+        settings.EMAIL_PORT = get_closed_port()
+        settings.EMAIL_USE_TLS = False
+
+        call_command('send_confirmation_emails', '--once', '--max-attempts=1')
+
+        outgoing = ConfirmationEmail.objects.get(
+            email=self.VALID_DATA['email']
+        )
+        assert outgoing.status == ConfirmationEmail.FAILED
+
+    def test_06_sync_signup_raises_on_smtp_error(self, client, settings):
+        settings.EMAIL_OUTBOX_ASYNC = False
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+        settings.EMAIL_HOST = '127.0.0.1'
+        settings.EMAIL_PORT = get_closed_port()
+        settings.EMAIL_USE_TLS = False
+
+        with pytest.raises(OSError):
+            client.post(self.URL_SIGNUP, data=self.VALID_DATA)
+
+    def test_07_email_is_claimed_by_one_worker(self, client):
+        from users.outbox import claim_emails, get_pending_emails
+
+        client.post(self.URL_SIGNUP, data=self.VALID_DATA)
+        first = get_pending_emails(batch_size=10)
+        second = get_pending_emails(batch_size=10)
+
+        assert len(claim_emails(first)) == 1
+        assert claim_emails(second) == [], (
+            'Письмо, закреплённое за одним отправителем, не должен '
+            'забирать другой.'
+        )
+        assert get_pending_emails(batch_size=10) == []
+
+    def test_08_changed_email_is_not_marked_sent(self, client):
+        from django.core.mail import get_connection
+
+        from users.outbox import (_send_one, claim_emails, enqueue_email,
+                                  get_pending_emails)
+
+        client.post(self.URL_SIGNUP, data=self.VALID_DATA)
+        [outgoing] = claim_emails(get_pending_emails(batch_size=10))
+        enqueue_email(outgoing.email, outgoing.subject, 'Новый код')
+
+        assert _send_one(outgoing, get_connection(), max_attempts=5)
+        outgoing.refresh_from_db()
+        assert outgoing.status == ConfirmationEmail.PENDING
+        assert outgoing.message == 'Новый код'
@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.throttles import (SignUpEmailThrottle, SignUpIPThrottle,
+                           TokenBucketThrottle, TokenUsernameThrottle)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09Throttling:
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+
+    def test_01_signup_email_limit(self, client, monkeypatch):
+        monkeypatch.setitem(
+            SignUpEmailThrottle.THROTTLE_RATES, 'signup_email', '2/hour'
+        )
+        valid_data = {
+            'email': 'throttle@yamdb.fake',
+            'username': 'throttle_user'
+        }
+        for _ in range(2):
+            response = client.post(self.URL_SIGNUP, data=valid_data)
+            assert response.status_code == HTTPStatus.OK
+
+        response = client.post(self.URL_SIGNUP, data=valid_data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Превышение лимита запросов к `{self.URL_SIGNUP}` для одного '
+            'email должно возвращать ответ со статусом 429.'
+        )
+        assert int(response['Retry-After']) > 0, (
+            'Ответ со статусом 429 должен содержать заголовок `Retry-After`.'
+        )
+
+        other_data = {
+            'email': 'other@yamdb.fake',
+            'username': 'other_user'
+        }
+        response = client.post(self.URL_SIGNUP, data=other_data)
+        assert response.status_code == HTTPStatus.OK, (
+            'Лимит для одного email не должен затрагивать другие адреса.'
+        )
+
+    def test_02_signup_ip_limit(self, client, monkeypatch):
+        monkeypatch.setitem(
+            SignUpIPThrottle.THROTTLE_RATES, 'signup_ip', '1/hour'
+        )
+        client.post(self.URL_SIGNUP, data={})
+
+        response = client.post(self.URL_SIGNUP, data={})
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+    def test_03_token_username_limit(self, client, user, monkeypatch):
+        monkeypatch.setitem(
+            TokenUsernameThrottle.THROTTLE_RATES, 'token_username', '3/hour'
+        )
+        invalid_data = {
+            'username': user.username,
+            'confirmation_code': 'invalid'
+        }
+        for _ in range(3):
+            response = client.post(self.URL_TOKEN, data=invalid_data)
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        response = client.post(self.URL_TOKEN, data=invalid_data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Подбор `confirmation_code` для одного пользователя должен '
+            'ограничиваться лимитом запросов.'
+        )
+
+    def test_04_denied_request_keeps_tokens(self, client, monkeypatch):
+        monkeypatch.setitem(
+            SignUpIPThrottle.THROTTLE_RATES, 'signup_ip', '2/hour'
+        )
+        monkeypatch.setitem(
+            SignUpEmailThrottle.THROTTLE_RATES, 'signup_email', '1/hour'
+        )
+        data = {'email': 'chain@yamdb.fake', 'username': 'chain_user'}
+        response = client.post(self.URL_SIGNUP, data=data)
+        assert response.status_code == HTTPStatus.OK
+        for _ in range(3):
+            response = client.post(self.URL_SIGNUP, data=data)
+            assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+        response = client.post(self.URL_SIGNUP, data={
+            'email': 'other_chain@yamdb.fake', 'username': 'other_chain',
+        })
+        assert response.status_code == HTTPStatus.OK, (
+            'Запрос, отклонённый одним ограничением, не должен расходовать '
+            'жетоны других ограничений.'
+        )
+
+    def test_05_ident_value_is_abstract(self):
+        with pytest.raises(TypeError):
+            TokenBucketThrottle()
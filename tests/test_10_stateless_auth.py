@@ -0,0 +1,116 @@
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from users.tokens import RoleAccessToken
+
+
+def get_role_client(user):
+    client = APIClient()
+    token = RoleAccessToken.for_user(user)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def count_user_queries(context):
+    return sum(
+        'users_user' in query['sql'] for query in context.captured_queries
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10StatelessAuth:
+    CATEGORIES_URL = '/api/v1/categories/'
+    USERS_ME_URL = '/api/v1/users/me/'
+
+    def test_01_read_without_user_lookup(self, admin):
+        client = get_role_client(admin)
+        client.get(self.CATEGORIES_URL)
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.CATEGORIES_URL)
+
+        assert response.status_code == HTTPStatus.OK
+        assert count_user_queries(context) == 0, (
+            'GET-запрос с токеном, содержащим роль, не должен загружать '
+            'пользователя из базы данных.'
+        )
+
+    def test_02_write_with_role_token(self, admin):
+        client = get_role_client(admin)
+        response = client.post(
+            self.CATEGORIES_URL, data={'name': 'Фильм', 'slug': 'films'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+
+    def test_03_users_me_with_role_token(self, user):
+        response = get_role_client(user).get(self.USERS_ME_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['username'] == user.username
+
+    def test_04_role_change_revokes_token(self, admin):
+        client = get_role_client(admin)
+        assert client.get(self.CATEGORIES_URL).status_code == HTTPStatus.OK
+
+        admin.role = 'user'
+        admin.save()
+
+        response = client.get(self.CATEGORIES_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'После изменения роли ранее выданный токен должен отзываться.'
+        )
+        response = get_role_client(admin).post(
+            self.CATEGORIES_URL, data={'name': 'Фильм', 'slug': 'films'}
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_05_profile_change_keeps_token(self, user):
+        client = get_role_client(user)
+        response = client.patch(self.USERS_ME_URL, data={'bio': 'new bio'})
+        assert response.status_code == HTTPStatus.OK
+
+        response = client.get(self.CATEGORIES_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            'Изменение полей, не входящих в токен, не должно его отзывать.'
+        )
+
+    def test_06_stale_version_does_not_overwrite_new(self, admin):
+        from users.models import User
+
+        client = get_role_client(admin)
+        stale_version = admin.token_version
+        admin.role = 'user'
+        admin.save()
+
+        # Читатель, получивший версию из базы до фиксации изменения,
+        # не должен перезаписать в кеше новую версию.
+        cache = caches[settings.TOKEN_VERSION_CACHE]
+        cache.add(
+            User._get_token_version_key(admin.pk), stale_version,
+            settings.TOKEN_VERSION_CACHE_TIMEOUT,
+        )
+        assert User.get_token_version(admin.pk) == admin.token_version
+        response = client.get(self.CATEGORIES_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_07_update_fields_stores_token_version(self, admin):
+        from users.models import User
+
+        client = get_role_client(admin)
+        admin.role = 'user'
+        admin.save(update_fields=['role'])
+
+        caches[settings.TOKEN_VERSION_CACHE].clear()
+        assert User.objects.get(pk=admin.pk).token_version == (
+            admin.token_version
+        ), (
+            'Новая версия токенов должна сохраняться в базе и при '
+            'save(update_fields=...).'
+        )
+        response = client.get(self.CATEGORIES_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
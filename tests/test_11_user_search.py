@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from users.models import get_prefix_upper_bound
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11UserSearch:
+    USERS_URL = '/api/v1/users/'
+
+    @pytest.fixture
+    def users(self, django_user_model):
+        return [
+            django_user_model.objects.create_user(
+                username=username, email=f'{username.lower()}@yamdb.fake'
+            )
+            for username in ('Alice', 'alina', 'Boris', 'Малина')
+        ]
+
+    def test_01_prefix_search_ignores_case(self, admin_client, users):
+        response = admin_client.get(f'{self.USERS_URL}?search=ALI')
+        assert response.status_code == HTTPStatus.OK
+        usernames = [user['username'] for user in response.json()['results']]
+        assert usernames == ['Alice', 'alina'], (
+            'Поиск пользователей должен выполняться по началу `username` '
+            'без учёта регистра.'
+        )
+
+    def test_02_search_matches_only_prefix(self, admin_client, users):
+        response = admin_client.get(f'{self.USERS_URL}?search=лин')
+        assert response.json()['results'] == []
+
+        response = admin_client.get(f'{self.USERS_URL}?search=мал')
+        usernames = [user['username'] for user in response.json()['results']]
+        assert usernames == ['Малина']
+
+    def test_03_cursor_pagination(self, admin_client, admin, users):
+        response = admin_client.get(f'{self.USERS_URL}?cursor=&page_size=2')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data
+        assert len(data['results']) == 2
+
+        usernames = [user['username'] for user in data['results']]
+        while data['next']:
+            data = admin_client.get(data['next']).json()
+            usernames += [user['username'] for user in data['results']]
+        assert usernames == sorted(
+            [admin.username] + [user.username for user in users]
+        )
+
+    def test_04_fill_username_lower(self, django_user_model, users):
+        django_user_model.objects.update(username_lower='')
+
+        call_command('fill_username_lower')
+
+        assert not django_user_model.objects.filter(
+            username_lower=''
+        ).exists()
+        assert django_user_model.objects.search_username('МАЛ').count() == 1
+
+    def test_05_max_code_point_prefix(self, admin_client, users):
+        assert get_prefix_upper_bound('a\U0010ffff') == 'b'
+        assert get_prefix_upper_bound('\U0010ffff\U0010ffff') is None
+
+        for search in ('\U0010ffff', 'ali\U0010ffff'):
+            response = admin_client.get(
+                self.USERS_URL, {'search': search},
+            )
+            assert response.status_code == HTTPStatus.OK
+            assert response.json()['results'] == []
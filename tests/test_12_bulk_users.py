@@ -0,0 +1,124 @@
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+
+from users.models import ConfirmationEmail, User
+from users.provisioning import EMAIL_TAKEN, provision_users
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12BulkUsers:
+    BULK_URL = '/api/v1/users/bulk/'
+
+    def test_01_bulk_admin_only(self, user_client, moderator_client):
+        data = {'users': [{'username': 'new', 'email': 'new@yamdb.fake'}]}
+        for client in (user_client, moderator_client):
+            response = client.post(self.BULK_URL, data=data, format='json')
+            assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_02_bulk_reports_conflicts(self, admin_client, admin,
+                                       django_user_model):
+        users = [
+            {'username': 'partner_1', 'email': 'partner_1@yamdb.fake',
+             'role': 'moderator'},
+            {'username': admin.username, 'email': 'other@yamdb.fake'},
+            {'username': 'partner_2', 'email': 'partner_1@yamdb.fake'},
+            {'username': 'partner_3', 'email': 'invalid'},
+            {'username': 'me', 'email': 'me@yamdb.fake'},
+            {'username': 'partner_4', 'email': 'partner_4@yamdb.fake'},
+        ]
+        response = admin_client.post(
+            self.BULK_URL, data={'users': users}, format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+
+        assert [user['username'] for user in data['created']] == [
+            'partner_1', 'partner_4'
+        ]
+        assert [conflict['row'] for conflict in data['conflicts']] == [
+            1, 2, 3, 4
+        ]
+        assert 'username' in data['conflicts'][0]['errors']
+        assert 'email' in data['conflicts'][1]['errors']
+        partner = django_user_model.objects.get(username='partner_1')
+        assert partner.role == 'moderator'
+        assert django_user_model.objects.search_username('PARTNER').count() == 2
+
+    def test_03_bulk_queues_confirmation(self, admin_client, settings):
+        settings.EMAIL_OUTBOX_ASYNC = True
+        users = [
+            {'username': f'partner_{i}', 'email': f'partner_{i}@yamdb.fake'}
+            for i in range(3)
+        ]
+        admin_client.post(
+            self.BULK_URL,
+            data={'users': users, 'send_confirmation': True},
+            format='json',
+        )
+        assert ConfirmationEmail.objects.filter(
+            status=ConfirmationEmail.PENDING
+        ).count() == 3
+
+    def test_04_create_users_command(self, tmp_path, django_user_model):
+        csv_file = tmp_path / 'users.csv'
+        csv_file.write_text(
+            'username,email,role\n'
+            'partner_1,partner_1@yamdb.fake,admin\n'
+            'partner_2,partner_1@yamdb.fake,user\n'
+            'partner_3,partner_3@yamdb.fake,\n',
+            encoding='utf-8',
+        )
+
+        call_command('create_users', str(csv_file), '--batch-size=2')
+
+        assert set(django_user_model.objects.values_list(
+            'username', flat=True
+        )) == {'partner_1', 'partner_3'}
+        assert django_user_model.objects.get(
+            username='partner_3'
+        ).role == 'user'
+
+    def test_05_concurrent_email_conflict(self, monkeypatch):
+        bulk_create = User.objects.bulk_create
+
+        def create_concurrently(users, **kwargs):
+            # Параллельный запрос занимает email после проверки пачки.
+            User.objects.create_user(
+                username='concurrent', email='partner_1@yamdb.fake',
+            )
+            return bulk_create(users, **kwargs)
+
+        monkeypatch.setattr(User.objects, 'bulk_create', create_concurrently)
+        created, conflicts = provision_users([
+            {'username': 'partner_1', 'email': 'partner_1@yamdb.fake'},
+            {'username': 'partner_2', 'email': 'partner_2@yamdb.fake'},
+        ])
+
+        assert [user.username for user in created] == ['partner_2']
+        assert conflicts == [
+            {'row': 0, 'errors': {'email': [EMAIL_TAKEN]}},
+        ], 'Конфликт должен указывать на действительно занятое поле.'
+
+    def test_06_bulk_sends_confirmation_in_sync_mode(self, admin_client,
+                                                     settings):
+        settings.EMAIL_OUTBOX_ASYNC = False
+        users = [
+            {'username': f'partner_{i}', 'email': f'partner_{i}@yamdb.fake'}
+            for i in range(3)
+        ]
+        outbox_before_count = len(mail.outbox)
+        admin_client.post(
+            self.BULK_URL,
+            data={'users': users, 'send_confirmation': True},
+            format='json',
+        )
+        assert len(mail.outbox) == outbox_before_count + 3, (
+            'При синхронной отправке писем массовое создание пользователей '
+            'должно сразу отправлять письма с кодом подтверждения.'
+        )
+        assert ConfirmationEmail.objects.filter(
+            status=ConfirmationEmail.SENT
+        ).count() == 3
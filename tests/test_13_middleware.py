@@ -0,0 +1,27 @@
+from django.test import RequestFactory
+
+from api_yamdb.handlers import RouteScopedWSGIHandler
+
+
+class Test13RouteScopedMiddleware:
+
+    def test_01_api_uses_lean_chain(self):
+        handler = RouteScopedWSGIHandler()
+        response = handler.get_response(RequestFactory().get('/api/v1/'))
+
+        assert response.status_code == 200
+        assert 'X-Frame-Options' not in response, (
+            'Запросы к `/api/` не должны проходить через полную цепочку '
+            'middleware.'
+        )
+        assert 'X-Content-Type-Options' in response
+
+    def test_02_admin_uses_full_chain(self):
+        handler = RouteScopedWSGIHandler()
+        response = handler.get_response(
+            RequestFactory().get('/admin/login/')
+        )
+
+        assert response.status_code == 200
+        assert 'X-Frame-Options' in response
+        assert 'csrftoken' in response.cookies
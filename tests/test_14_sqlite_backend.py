@@ -0,0 +1,57 @@
+import pytest
+from django.db.utils import ConnectionHandler
+
+
+def get_connection(tmp_path, **options):
+    handler = ConnectionHandler({
+        'default': {
+            'ENGINE': 'api_yamdb.backends.sqlite3',
+            'NAME': str(tmp_path / 'db.sqlite3'),
+            'OPTIONS': options,
+        },
+    })
+    return handler['default']
+
+
+class Test14SQLiteBackend:
+
+    @pytest.fixture(autouse=True)
+    def unblock_db(self, django_db_blocker):
+        with django_db_blocker.unblock():
+            yield
+
+    def test_01_init_command_applied(self, tmp_path):
+        connection = get_connection(
+            tmp_path,
+            init_command='PRAGMA journal_mode=WAL; PRAGMA busy_timeout=1234',
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            assert cursor.fetchone()[0] == 'wal'
+            cursor.execute('PRAGMA busy_timeout')
+            assert cursor.fetchone()[0] == 1234
+        connection.close()
+
+    def test_02_immediate_transactions(self, tmp_path):
+        connection = get_connection(tmp_path, transaction_mode='IMMEDIATE')
+        other = get_connection(tmp_path, timeout=0)
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+
+        connection._start_transaction_under_autocommit()
+        try:
+            # Блокировка записи берётся при BEGIN, до первой записи.
+            with other.cursor() as cursor:
+                try:
+                    cursor.execute('INSERT INTO item DEFAULT VALUES')
+                except Exception as error:
+                    assert 'locked' in str(error)
+                else:
+                    raise AssertionError(
+                        'BEGIN IMMEDIATE должен блокировать других писателей.'
+                    )
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('ROLLBACK')
+            connection.close()
+            other.close()
@@ -0,0 +1,103 @@
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+
+from api_yamdb import write_queue as write_queue_module
+from api_yamdb.write_queue import WriteQueue, WriteQueueTimeout
+
+
+def wait_for_depth(queue, depth):
+    deadline = time.monotonic() + 5
+    while queue.depth < depth:
+        assert time.monotonic() < deadline, 'Поток не встал в очередь.'
+        time.sleep(0.001)
+
+
+class Test15WriteQueue:
+
+    def test_01_fifo_order(self):
+        queue = WriteQueue(timeout=5)
+        order = []
+
+        def worker(number):
+            with queue.acquire():
+                order.append(number)
+
+        with queue.acquire():
+            threads = []
+            for number in range(5):
+                thread = threading.Thread(target=worker, args=(number,))
+                thread.start()
+                threads.append(thread)
+                wait_for_depth(queue, number + 2)
+        for thread in threads:
+            thread.join()
+
+        assert order == list(range(5)), (
+            'Транзакции должны выполняться в порядке поступления.'
+        )
+        stats = queue.stats()
+        assert stats['acquired'] == 6
+        assert stats['max_depth'] == 6
+        assert stats['depth'] == 0
+
+    def test_02_bounded_wait(self):
+        queue = WriteQueue(timeout=0.05)
+        errors = []
+
+        def worker():
+            try:
+                with queue.acquire():
+                    pass
+            except WriteQueueTimeout:
+                errors.append(True)
+
+        with queue.acquire():
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+
+        assert errors == [True]
+        assert queue.stats()['timeouts'] == 1
+        with queue.acquire(timeout=0):
+            pass
+
+    def test_03_cross_process_lock_file(self, tmp_path):
+        lock_file = str(tmp_path / 'write.lock')
+        first = WriteQueue(timeout=0.05, lock_file=lock_file)
+        second = WriteQueue(timeout=0.05, lock_file=lock_file)
+
+        with first.acquire():
+            with pytest.raises(WriteQueueTimeout):
+                with second.acquire():
+                    pass
+        with second.acquire():
+            pass
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15WriteQueueAPI:
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    @pytest.fixture
+    def enabled_queue(self, settings, monkeypatch):
+        settings.WRITE_QUEUE = {
+            'ENABLED': True, 'TIMEOUT': 5, 'LOCK_FILE': None,
+        }
+        monkeypatch.setattr(write_queue_module, '_write_queue', None)
+        return write_queue_module.get_write_queue()
+
+    def test_01_review_through_queue(self, enabled_queue, user_client):
+        from titles.models import Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+
+        response = user_client.post(url, data={'text': 'Текст', 'score': 5})
+        assert response.status_code == HTTPStatus.CREATED
+        response = user_client.post(url, data={'text': 'Текст', 'score': 5})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        assert enabled_queue.stats()['acquired'] == 2
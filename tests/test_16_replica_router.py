@@ -0,0 +1,102 @@
+import sqlite3
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from api_yamdb import routers
+from api_yamdb.routers import (ReplicaRouter, is_primary_sticky,
+                               replica_reads)
+
+
+class Test16ReplicaRouter:
+
+    def test_01_routing(self, settings):
+        settings.DATABASE_REPLICA_ALIASES = ['replica_0']
+        router = ReplicaRouter()
+
+        assert router.db_for_read(None) == 'default', (
+            'Без явного разрешения чтение должно идти в основную базу.'
+        )
+        with replica_reads():
+            assert router.db_for_read(None) == 'replica_0'
+            assert router.db_for_write(None) == 'default'
+        assert router.db_for_read(None) == 'default'
+        assert router.allow_migrate('replica_0', 'titles') is False
+
+    def test_02_replication(self, tmp_path):
+        source = str(tmp_path / 'primary.sqlite3')
+        target = str(tmp_path / 'replica.sqlite3')
+        with sqlite3.connect(source) as primary:
+            primary.execute('CREATE TABLE item (name TEXT)')
+            primary.execute("INSERT INTO item VALUES ('первый')")
+        primary.close()
+
+        call_command('replicate_db', '--source', source, '--target', target,
+                     '--once')
+        with sqlite3.connect(source) as primary:
+            primary.execute("INSERT INTO item VALUES ('второй')")
+        primary.close()
+        replica = sqlite3.connect(target)
+        assert replica.execute('SELECT count(*) FROM item').fetchone() == (1,)
+
+        call_command('replicate_db', '--source', source, '--target', target,
+                     '--once')
+        assert replica.execute('SELECT count(*) FROM item').fetchone() == (2,)
+        replica.close()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16ReadYourWrites:
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    @pytest.fixture
+    def replica_flags(self, settings, monkeypatch):
+        # Реплика указывает на ту же базу, проверяется только выбор базы.
+        settings.DATABASE_REPLICA_ALIASES = ['default']
+        flags = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            flags.append(routers._use_replicas.get())
+            return db_for_read(router, model, **hints)
+
+        monkeypatch.setattr(ReplicaRouter, 'db_for_read', spy)
+        return flags
+
+    def test_01_reads_stick_to_primary_after_write(self, replica_flags,
+                                                   user, user_client,
+                                                   settings):
+        from titles.models import Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+
+        replica_flags.clear()
+        assert user_client.get(url).status_code == HTTPStatus.OK
+        # Пользователь загружается при аутентификации из основной базы,
+        # запросы самого представления идут на реплику.
+        assert not replica_flags[0] and replica_flags[-1], (
+            'Чтение без недавних изменений должно идти на реплику.'
+        )
+
+        response = user_client.post(url, data={'text': 'Текст', 'score': 5})
+        assert response.status_code == HTTPStatus.CREATED
+        assert is_primary_sticky(user.id)
+
+        replica_flags.clear()
+        response = user_client.get(url)
+        assert response.json()['count'] == 1
+        assert replica_flags and not any(replica_flags), (
+            'После записи пользователь должен читать из основной базы.'
+        )
+        assert not routers._use_replicas.get()
+
+    def test_02_failed_write_is_not_sticky(self, replica_flags, user,
+                                           user_client):
+        response = user_client.post(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=404),
+            data={'text': 'Текст', 'score': 5},
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert not is_primary_sticky(user.id)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import threading
+from http import HTTPStatus
+
+import pytest
+
+from api.views import TitleViewSet
+from api_yamdb.handlers import RouteScopedASGIHandler
+
+
+async def call_asgi(application, method, path, body=b'', headers=()):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'root_path': '',
+        'query_string': b'',
+        'headers': [
+            (b'host', b'testserver'),
+            (b'content-length', str(len(body)).encode()),
+            *headers,
+        ],
+        'client': ('127.0.0.1', 10000),
+        'server': ('testserver', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    start, *chunks = messages
+    headers = {
+        name.decode(): value.decode() for name, value in start['headers']
+    }
+    content = b''.join(chunk.get('body', b'') for chunk in chunks)
+    return start['status'], headers, content
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ASGI:
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_read_through_lean_chain(self):
+        from titles.models import Title
+
+        Title.objects.create(name='Произведение', year=2000)
+        status, headers, content = asyncio.run(
+            call_asgi(RouteScopedASGIHandler(), 'GET', self.TITLES_URL)
+        )
+
+        assert status == HTTPStatus.OK
+        assert json.loads(content)['count'] == 1
+        assert 'X-Frame-Options' not in headers
+
+    def test_02_reads_run_concurrently(self, monkeypatch):
+        # Оба запроса дойдут до барьера, только если выполняются
+        # одновременно в разных потоках.
+        barrier = threading.Barrier(2, timeout=5)
+        list_view = TitleViewSet.list
+
+        def waiting_list(viewset, request, *args, **kwargs):
+            barrier.wait()
+            return list_view(viewset, request, *args, **kwargs)
+
+        monkeypatch.setattr(TitleViewSet, 'list', waiting_list)
+        application = RouteScopedASGIHandler()
+
+        async def run():
+            return await asyncio.gather(
+                call_asgi(application, 'GET', self.TITLES_URL),
+                call_asgi(application, 'GET', self.TITLES_URL),
+            )
+
+        for status, _, _ in asyncio.run(run()):
+            assert status == HTTPStatus.OK
+
+    def test_03_write(self, token_admin):
+        body = json.dumps({'name': 'Фильм', 'slug': 'movie'}).encode()
+        status, _, _ = asyncio.run(call_asgi(
+            RouteScopedASGIHandler(), 'POST', '/api/v1/categories/',
+            body=body,
+            headers=[
+                (b'content-type', b'application/json'),
+                (b'authorization',
+                 f'Bearer {token_admin["access"]}'.encode()),
+            ],
+        ))
+
+        assert status == HTTPStatus.CREATED
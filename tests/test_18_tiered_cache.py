@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+
+from api_yamdb import cache as cache_module
+from api_yamdb.cache import TieredCache
+
+
+def make_cache(monkeypatch, **options):
+    """Кеш отдельного процесса: своя память перед общим кешем."""
+    monkeypatch.setattr(cache_module, '_local_tiers', {})
+    options.setdefault('SYNC_INTERVAL', 0)
+    return TieredCache('shared', {'OPTIONS': options})
+
+
+class Test18TieredCache:
+
+    def test_01_local_hits(self, monkeypatch):
+        cache = make_cache(monkeypatch)
+        cache.set('genres', ['drama', 'comedy'])
+
+        assert cache.get('genres') == ['drama', 'comedy']
+        assert cache.get('missing') is None
+
+        stats = cache.stats()
+        assert stats['local'] == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+        assert stats['shared'] == {'hits': 0, 'misses': 1, 'hit_ratio': 0.0}
+
+    def test_02_shared_fill(self, monkeypatch):
+        first, second = make_cache(monkeypatch), make_cache(monkeypatch)
+        first.set('title:1', {'name': 'Произведение'})
+
+        assert second.get('title:1') == {'name': 'Произведение'}
+        assert second.get('title:1') == {'name': 'Произведение'}
+        stats = second.stats()
+        assert stats['shared']['hits'] == 1
+        assert stats['local']['hits'] == 1
+
+    def test_03_invalidation_between_processes(self, monkeypatch):
+        first, second = make_cache(monkeypatch), make_cache(monkeypatch)
+        first.set('title:1', 'старое')
+        assert second.get('title:1') == 'старое'
+
+        first.set('title:1', 'новое')
+        assert second.get('title:1') == 'новое', (
+            'Изменение ключа должно удалять его из памяти других процессов.'
+        )
+        first.delete('title:1')
+        assert second.get('title:1') is None
+        assert second.stats()['invalidations'] == 2
+
+    def test_04_cleared_shared_cache_drops_local_tier(self, monkeypatch):
+        first, second = make_cache(monkeypatch), make_cache(monkeypatch)
+        first.set('title:1', 'значение')
+        assert second.get('title:1') == 'значение'
+
+        first.clear()
+        first.set('title:2', 'значение')
+        assert second.get('title:1') is None
+
+    def test_05_size_and_ttl_bounds(self, monkeypatch):
+        cache = make_cache(monkeypatch, MAX_ENTRIES=2, MAX_VALUE_SIZE=100,
+                           LOCAL_TIMEOUT=0.05)
+        for number in range(3):
+            cache.set(f'key:{number}', number)
+        cache.set('large', 'x' * 1000)
+        assert cache.stats()['entries'] == 2
+        assert cache.stats()['evictions'] == 1
+
+        assert cache.get('key:0') == 0
+        assert cache.get('large') == 'x' * 1000
+        time.sleep(0.06)
+        assert cache.get('key:2') == 2
+        assert cache.stats()['local']['hits'] == 0
+
+    def test_06_timeout(self, monkeypatch):
+        cache = make_cache(monkeypatch)
+        cache.set('short', 'значение', timeout=0.05)
+        assert cache.get('short') == 'значение'
+        time.sleep(0.06)
+        assert cache.get('short') is None
+
+    def test_07_threads_share_local_tier(self, monkeypatch):
+        cache = make_cache(monkeypatch)
+        cache.set('genres', ['drama'])
+        thread_caches = []
+        thread = threading.Thread(target=lambda: thread_caches.append(
+            TieredCache('shared', {'OPTIONS': {'SYNC_INTERVAL': 0}})
+        ))
+        thread.start()
+        thread.join()
+
+        assert thread_caches[0].get('genres') == ['drama']
+        assert thread_caches[0].stats()['local']['hits'] == 1, (
+            'Экземпляры кеша в потоках одного процесса должны использовать '
+            'общую память процесса.'
+        )
+
+    def test_08_add_publishes_invalidation(self, monkeypatch):
+        first, second = make_cache(monkeypatch), make_cache(monkeypatch)
+        first.set('title:1', 'старое', timeout=0.05)
+        assert second.get('title:1') == 'старое'
+        time.sleep(0.06)
+
+        assert first.add('title:1', 'новое')
+        assert second.get('title:1') == 'новое'
+
+    def test_09_atomic_incr(self, monkeypatch):
+        first, second = make_cache(monkeypatch), make_cache(monkeypatch)
+        first.set('counter', 1)
+        assert second.get('counter') == 1
+
+        def increment():
+            for _ in range(20):
+                first.incr('counter')
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert second.get('counter') == 81
+        assert second.decr('counter', 10) == 71
+        first.set('name', 'значение')
+        with pytest.raises(ValueError):
+            first.incr('name')
+        with pytest.raises(ValueError):
+            first.incr('missing')
@@ -0,0 +1,75 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.serializers import TitleSerializer
+from titles import registry
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19SlugRegistry:
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture
+    def reference_data(self):
+        from titles.models import Category, Genre
+
+        return (
+            Category.objects.create(name='Фильм', slug='movie'),
+            Genre.objects.create(name='Драма', slug='drama'),
+            Genre.objects.create(name='Комедия', slug='comedy'),
+        )
+
+    def test_01_validation_without_queries(self, reference_data,
+                                           django_assert_num_queries):
+        category, drama, comedy = reference_data
+        data = {
+            'name': 'Произведение', 'year': 2000,
+            'category': 'movie', 'genre': ['drama', 'comedy'],
+        }
+        assert TitleSerializer(data=data).is_valid()
+
+        with django_assert_num_queries(0):
+            serializer = TitleSerializer(data=data)
+            assert serializer.is_valid(), serializer.errors
+        assert serializer.validated_data['category'].pk == category.pk
+        assert [genre.pk for genre in serializer.validated_data['genre']] == [
+            drama.pk, comedy.pk,
+        ]
+
+        serializer = TitleSerializer(data={**data, 'genre': ['unknown']})
+        assert not serializer.is_valid()
+        assert 'genre' in serializer.errors
+
+    def test_02_refresh_on_write(self, reference_data):
+        from titles.models import Category
+
+        category = reference_data[0]
+        assert registry.categories.get('movie').id == category.id
+
+        category.name = 'Кино'
+        category.save()
+        assert registry.categories.get('movie').name == 'Кино'
+
+        Category.objects.create(name='Книга', slug='book')
+        assert registry.categories.get('book') is not None
+
+        Category.objects.filter(slug='movie').delete()
+        assert registry.categories.get('movie') is None
+
+    def test_03_create_and_filter(self, reference_data, admin_client):
+        response = admin_client.post(self.TITLES_URL, data={
+            'name': 'Произведение', 'year': 2000,
+            'category': 'movie', 'genre': ['drama', 'comedy'],
+        })
+        assert response.status_code == HTTPStatus.CREATED, response.json()
+        assert response.json()['category'] == {
+            'name': 'Фильм', 'slug': 'movie',
+        }
+
+        for query, count in (
+            ('genre=drama', 1), ('category=movie', 1),
+            ('genre=unknown', 0), ('category=unknown', 0),
+        ):
+            response = admin_client.get(f'{self.TITLES_URL}?{query}')
+            assert response.json()['count'] == count, query
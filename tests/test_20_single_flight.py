@@ -0,0 +1,138 @@
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+
+from api_yamdb.single_flight import get_or_compute
+
+
+class Test20SingleFlight:
+
+    def test_01_concurrent_misses_compute_once(self):
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(True)
+            time.sleep(0.1)
+            return 'значение'
+
+        def worker():
+            results.append(get_or_compute('hot', compute, timeout=60))
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1, 'Значение должно считаться один раз.'
+        assert results == ['значение'] * 10
+
+    def test_02_stale_while_revalidate(self):
+        cache.set('hot', ('старое', time.time() - 1, 0.0), 60)
+        cache.add('hot:lock', 'other', 60)
+
+        assert get_or_compute('hot', lambda: 'новое', timeout=60) == (
+            'старое'
+        ), 'Пока значение пересчитывается, отдаётся прежнее.'
+
+        cache.delete('hot:lock')
+        assert get_or_compute('hot', lambda: 'новое', timeout=60) == 'новое'
+        assert get_or_compute('hot', lambda: 'другое', timeout=60) == 'новое'
+
+    def test_03_probabilistic_early_expiration(self):
+        cache.set('hot', ('старое', time.time() + 10, 1.0), 60)
+        assert get_or_compute(
+            'hot', lambda: 'новое', timeout=60, beta=1000,
+        ) == 'новое'
+
+    def test_04_lock_timeout(self):
+        cache.add('hot:lock', 'other', 60)
+        started = time.monotonic()
+        assert get_or_compute(
+            'hot', lambda: 'значение', timeout=60, lock_timeout=0.05,
+        ) == 'значение'
+        assert time.monotonic() - started < 1
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20ResponseCache:
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_cached_list_and_invalidation(self, client, user_client,
+                                             django_assert_num_queries):
+        from titles.models import Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        assert client.get(self.TITLES_URL).json()['count'] == 1
+        with django_assert_num_queries(0):
+            assert client.get(self.TITLES_URL).json()['count'] == 1
+
+        Title.objects.create(name='Другое', year=2001)
+        assert client.get(self.TITLES_URL).json()['count'] == 2
+
+        reviews_url = f'{self.TITLES_URL}{title.id}/reviews/'
+        assert client.get(reviews_url).json()['count'] == 0
+        response = user_client.post(
+            reviews_url, data={'text': 'Текст', 'score': 7},
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert client.get(reviews_url).json()['count'] == 1
+        assert client.get(
+            f'{self.TITLES_URL}{title.id}/'
+        ).json()['rating'] == 7
+
+    def test_02_review_updates_rating_in_lists(self, client, user_client,
+                                               django_assert_num_queries):
+        from titles.models import Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        other = Title.objects.create(name='Другое', year=2001)
+        other_reviews_url = f'{self.TITLES_URL}{other.id}/reviews/'
+        assert client.get(self.TITLES_URL).json()['count'] == 2
+        client.get(other_reviews_url)
+        response = user_client.post(
+            f'{self.TITLES_URL}{title.id}/reviews/',
+            data={'text': 'Текст', 'score': 7},
+        )
+        assert response.status_code == HTTPStatus.CREATED
+
+        ratings = {
+            result['id']: result['rating']
+            for result in client.get(self.TITLES_URL).json()['results']
+        }
+        assert ratings[title.id] == 7, (
+            'Отзыв должен сразу обновлять рейтинг в списке произведений.'
+        )
+        with django_assert_num_queries(0):
+            client.get(other_reviews_url)
+
+    def test_03_sticky_user_bypasses_cache(self, client, user, user_client,
+                                           settings):
+        from api_yamdb.routers import mark_primary_sticky
+        from titles.models import Title
+
+        settings.DATABASE_REPLICA_ALIASES = ['default']
+        Title.objects.create(name='Произведение', year=2000)
+        assert client.get(self.TITLES_URL).json()['count'] == 1
+        # Изменение в обход сигналов: кеш ответов его не видит.
+        Title.objects.bulk_create([Title(name='Другое', year=2001)])
+        mark_primary_sticky(user.id)
+
+        assert client.get(self.TITLES_URL).json()['count'] == 1
+        assert user_client.get(self.TITLES_URL).json()['count'] == 2, (
+            'Пользователь, недавно изменивший данные, должен читать '
+            'мимо кеша ответов.'
+        )
+
+    def test_04_default_namespace_is_basename(self):
+        from api.mixins import CachedReadMixin
+        from api.views import CategoryViewSet
+
+        view = type('View', (CachedReadMixin, CategoryViewSet), {})(
+            basename='categories',
+        )
+        assert view.get_cache_namespaces() == ('categories',)
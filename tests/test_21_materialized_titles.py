@@ -0,0 +1,142 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21MaterializedTitles:
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture(autouse=True)
+    def no_response_cache(self, settings):
+        settings.RESPONSE_CACHE = {
+            **settings.RESPONSE_CACHE, 'ENABLED': False,
+        }
+
+    @pytest.fixture
+    def titles(self, user):
+        from reviews.models import Review
+        from titles.models import Category, Genre, Title
+
+        category = Category.objects.create(name='Фильм', slug='movie')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        titles = [
+            Title.objects.create(name=f'Произведение {i}', year=2000 + i,
+                                 category=category)
+            for i in range(3)
+        ]
+        for title in titles:
+            title.genre.set([drama])
+        Review.objects.create(title=titles[0], author=user, text='Текст',
+                              score=8)
+        return titles
+
+    def get_both(self, client, url, settings):
+        settings.MATERIALIZED_TITLES = False
+        expected = client.get(url)
+        settings.MATERIALIZED_TITLES = True
+        actual = client.get(url)
+        assert actual.status_code == expected.status_code
+        assert actual['Content-Type'] == expected['Content-Type']
+        return expected.json(), actual.json()
+
+    def test_01_same_representation(self, client, titles, settings):
+        for url in (
+            self.TITLES_URL,
+            f'{self.TITLES_URL}?limit=2&offset=1',
+            f'{self.TITLES_URL}?genre=drama&ordering=-year',
+            f'{self.TITLES_URL}{titles[0].id}/',
+            f'{self.TITLES_URL}404/',
+        ):
+            expected, actual = self.get_both(client, url, settings)
+            assert actual == expected, url
+
+    def test_02_updated_on_write(self, client, admin_client, titles,
+                                 settings):
+        from titles.models import Category, Genre
+
+        title = titles[1]
+        url = f'{self.TITLES_URL}{title.id}/'
+        Genre.objects.create(name='Комедия', slug='comedy')
+        response = admin_client.patch(url, data={'genre': ['comedy']})
+        assert response.status_code == HTTPStatus.OK
+
+        Category.objects.filter(slug='movie').get().delete()
+        response = admin_client.post(f'{url}reviews/', data={
+            'text': 'Текст', 'score': 3,
+        })
+        assert response.status_code == HTTPStatus.CREATED
+
+        expected, actual = self.get_both(client, url, settings)
+        assert actual == expected
+        assert actual['genre'] == [{'name': 'Комедия', 'slug': 'comedy'}]
+        assert actual['category'] is None
+        assert actual['rating'] == 3
+
+    def test_03_consistency_check(self, client, titles):
+        from titles.models import TitleRepresentation
+
+        client.get(self.TITLES_URL)
+        call_command('check_title_representations')
+        TitleRepresentation.objects.filter(pk=titles[0].pk).update(
+            content='{}',
+        )
+        TitleRepresentation.objects.filter(pk=titles[1].pk).delete()
+        with pytest.raises(CommandError):
+            call_command('check_title_representations')
+
+        call_command('check_title_representations', '--fix')
+        call_command('check_title_representations')
+
+    def test_04_write_deletes_representation(self, client, user, titles):
+        from reviews.models import Review
+        from titles.models import TitleRepresentation
+
+        title = titles[1]
+        client.get(self.TITLES_URL)
+        assert TitleRepresentation.objects.filter(pk=title.pk).exists()
+
+        Review.objects.create(title=title, author=user, text='Текст',
+                              score=4)
+        assert not TitleRepresentation.objects.filter(pk=title.pk).exists()
+        response = client.get(f'{self.TITLES_URL}{title.pk}/')
+        assert response.json()['rating'] == 4
+        assert TitleRepresentation.objects.filter(pk=title.pk).exists()
+
+    def test_05_replica_read_does_not_write(self, titles):
+        from api.representations import get_title_fragments
+        from api_yamdb.routers import replica_reads
+        from titles.models import TitleRepresentation
+
+        with replica_reads():
+            contents = get_title_fragments([titles[0].pk])
+        assert list(contents) == [titles[0].pk]
+        assert not TitleRepresentation.objects.exists(), (
+            'Чтение с реплики не должно записывать представления.'
+        )
+
+    def test_06_rollback_drops_pending_invalidation(self, monkeypatch):
+        from django.db import transaction
+
+        from api import signals
+        from titles.models import Title
+
+        invalidated = []
+        monkeypatch.setattr(
+            signals, 'invalidate_cached_responses',
+            lambda *namespaces: invalidated.append(set(namespaces)),
+        )
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Title.objects.create(name='Откат', year=2000)
+                raise RuntimeError
+        with transaction.atomic():
+            title = Title.objects.create(name='Фиксация', year=2000)
+            title.save()
+
+        assert invalidated == [{signals.TITLES_NAMESPACE}], (
+            'Изменения откаченной транзакции не должны попадать в '
+            'следующую, а изменения одной транзакции сбрасывают кеш '
+            'одним вызовом.'
+        )
@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+import pytest
+
+from api_yamdb import constants
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22TitlesMultiGet:
+    URL = '/api/v1/titles/multi/'
+
+    @pytest.fixture
+    def titles(self, user):
+        from reviews.models import Review
+        from titles.models import Category, Genre, Title
+
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        titles = []
+        for i in range(3):
+            title = Title.objects.create(name=f'Произведение {i}',
+                                         year=2000, category=category)
+            title.genre.set([genre])
+            titles.append(title)
+        Review.objects.create(title=titles[2], author=user, text='Текст',
+                              score=6)
+        return titles
+
+    @pytest.mark.parametrize('materialized', (True, False))
+    def test_01_request_order_and_missing(self, client, titles, settings,
+                                          materialized,
+                                          django_assert_max_num_queries):
+        settings.MATERIALIZED_TITLES = materialized
+        ids = [titles[2].id, 404, titles[0].id, titles[2].id]
+        # Первое чтение сохраняет представления произведений.
+        client.get(self.URL, {'ids': ','.join(map(str, ids))})
+
+        with django_assert_max_num_queries(2):
+            response = client.get(
+                self.URL, {'ids': ','.join(map(str, ids))},
+            )
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert [title['id'] for title in data['results']] == [
+            titles[2].id, titles[0].id,
+        ]
+        assert data['missing'] == [404]
+        assert data['results'][0]['rating'] == 6
+        assert data['results'][0]['genre'] == [
+            {'name': 'Драма', 'slug': 'drama'},
+        ]
+        assert data['results'][0] == client.get(
+            f'/api/v1/titles/{titles[2].id}/'
+        ).json()
+
+    @pytest.mark.parametrize('ids', (
+        '', 'a,b', ','.join(map(str, range(constants.MULTI_GET_TITLES_LIMIT + 1))),
+        '99999999999999999999999', '1,0', '-5', str(constants.MAX_ID + 1),
+    ))
+    def test_02_bad_request(self, client, ids):
+        response = client.get(self.URL, {'ids': ids})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'ids' in response.json()
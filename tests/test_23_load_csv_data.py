@@ -0,0 +1,250 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def write_csv(directory, name, text):
+    (directory / name).write_text(text.lstrip(), encoding='utf-8')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23LoadCsvData:
+
+    @pytest.fixture
+    def data_dir(self, tmp_path):
+        write_csv(tmp_path, 'users.csv', '''
+id,username,email,role,bio,first_name,last_name
+100,Reader,reader@yamdb.fake,user,,,
+101,critic,critic@yamdb.fake,moderator,,,
+''')
+        write_csv(tmp_path, 'category.csv', '''
+id,name,slug
+1,Фильм,movie
+''')
+        write_csv(tmp_path, 'genre.csv', '''
+id,name,slug
+1,Драма,drama
+''')
+        write_csv(tmp_path, 'titles.csv', '''
+id,name,year,category
+1,Первое,2000,1
+2,Второе,2001,1
+3,Без категории,2002,7
+''')
+        write_csv(tmp_path, 'genre_title.csv', '''
+id,title_id,genre_id
+1,1,1
+2,2,1
+''')
+        write_csv(tmp_path, 'review.csv', '''
+id,title_id,text,author,score,pub_date
+1,1,Отзыв,100,8,2019-09-24T21:08:21.567Z
+2,1,Повтор,100,5,2019-09-24T21:08:21.567Z
+3,2,Отзыв,101,4,2019-09-24T21:08:21.567Z
+4,3,Отзыв,101,нет,2019-09-24T21:08:21.567Z
+''')
+        write_csv(tmp_path, 'comments.csv', '''
+id,review_id,text,author,pub_date
+1,1,Комментарий,101,2019-09-24T21:08:21.567Z
+2,9,Нет отзыва,101,2019-09-24T21:08:21.567Z
+''')
+        return tmp_path
+
+    def load(self, directory, **options):
+        out, err = StringIO(), StringIO()
+        call_command('load_csv_data', directory=str(directory),
+                     stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_01_loads_in_dependency_order(self, data_dir):
+        from reviews.models import Comment, Review
+        from titles.models import Title
+        from users.models import User
+
+        out, err = self.load(data_dir, batch_size=2)
+
+        assert User.objects.search_username('read').count() == 1
+        assert sorted(Title.objects.values_list('pk', flat=True)) == [1, 2]
+        assert list(Title.objects.get(pk=1).genre.values_list(
+            'slug', flat=True
+        )) == ['drama']
+        assert sorted(Review.objects.values_list('pk', flat=True)) == [1, 3]
+        assert list(Comment.objects.values_list('pk', flat=True)) == [1]
+        assert 'строк/с' in out
+        assert 'Category с id 7 не найден' in err
+        assert 'Review с id 9 не найден' in err
+        assert 'score' in err
+
+    def test_02_second_run_skips_loaded_rows(self, data_dir):
+        from titles.models import Title
+
+        self.load(data_dir)
+        out, _ = self.load(data_dir)
+        assert Title.objects.count() == 2
+        assert 'titles.csv: создано 0 Title объектов из 3 строк, ' \
+               'пропущено 2' in out
+
+    def test_03_invalidates_title_caches(self, data_dir, client):
+        from titles.models import Category
+
+        Category.objects.create(id=1, name='Фильм', slug='movie')
+        assert client.get('/api/v1/titles/').json()['count'] == 0
+        assert client.get(
+            '/api/v1/titles/', {'category': 'movie'}
+        ).json()['count'] == 0
+
+        self.load(data_dir)
+        assert client.get('/api/v1/titles/').json()['count'] == 2
+        response = client.get('/api/v1/titles/1/')
+        assert response.json()['rating'] == 8
+        assert response.json()['genre'] == [{'name': 'Драма',
+                                             'slug': 'drama'}]
+
+    def test_04_loads_shipped_data(self, settings):
+        from reviews.models import Comment
+        from titles.models import Title
+
+        out, err = self.load(settings.BASE_DIR / 'static' / 'data')
+        assert Title.objects.exists()
+        assert Comment.objects.exists()
+        assert 'Ошибок: 0,' in out
+        assert not err
+
+    def test_05_parallel_parsing_matches_serial(self, data_dir):
+        from reviews.models import Comment, Review
+        from titles.models import Title
+
+        out, err = self.load(data_dir, workers=2, batch_size=1)
+
+        assert sorted(Title.objects.values_list('pk', flat=True)) == [1, 2]
+        assert sorted(Review.objects.values_list('pk', flat=True)) == [1, 3]
+        assert Comment.objects.count() == 1
+        assert 'Процессов разбора: 2' in out
+        assert 'Category с id 7 не найден' in err
+        assert 'score' in err
+
+    @pytest.fixture
+    def clean_dir(self, data_dir):
+        write_csv(data_dir, 'titles.csv', '''
+id,name,year,category
+1,Первое,2000,1
+2,Второе,2001,1
+3,Третье,2002,1
+''')
+        write_csv(data_dir, 'review.csv', '''
+id,title_id,text,author,score,pub_date
+1,1,Отзыв,100,8,2019-09-24T21:08:21.567Z
+3,2,Отзыв,101,4,2019-09-24T21:08:21.567Z
+''')
+        write_csv(data_dir, 'comments.csv', '''
+id,review_id,text,author,pub_date
+1,1,Комментарий,101,2019-09-24T21:08:21.567Z
+''')
+        return data_dir
+
+    def test_06_incremental_skips_unchanged_files(self, clean_dir):
+        self.load(clean_dir, incremental=True)
+        out, err = self.load(clean_dir, incremental=True)
+        assert out.count('файл не изменился, пропущен') == 7
+        assert 'Создано: 0, Обновлено: 0, Удалено: 0, Ошибок: 0' in out
+        assert not err
+
+    def test_07_incremental_upserts_and_deletes(self, clean_dir, client):
+        from reviews.models import Review
+        from titles.models import Title
+
+        self.load(clean_dir, incremental=True)
+        assert client.get('/api/v1/titles/1/').json()['name'] == 'Первое'
+        write_csv(clean_dir, 'titles.csv', '''
+id,name,year,category
+1,Первое (новое),2000,1
+3,Третье,2002,1
+4,Четвёртое,2003,1
+''')
+        out, _ = self.load(clean_dir, incremental=True, delete=True)
+
+        assert 'titles.csv: создано 1 Title объектов из 3 строк, ' \
+               'пропущено 1, обновлено 1, удалено 1' in out
+        assert sorted(Title.objects.values_list('pk', flat=True)) == [1, 3, 4]
+        assert not Review.objects.filter(title_id=2).exists()
+        assert client.get('/api/v1/titles/1/').json()['name'] == (
+            'Первое (новое)'
+        )
+
+    def test_08_chunk_checksums(self, clean_dir):
+        from titles.models import Title
+
+        self.load(clean_dir, incremental=True, chunk_checksums=True,
+                  batch_size=1)
+        write_csv(clean_dir, 'titles.csv', '''
+id,name,year,category
+1,Первое,2000,1
+2,Второе,1999,1
+3,Третье,2002,1
+''')
+        out, _ = self.load(clean_dir, incremental=True,
+                           chunk_checksums=True, batch_size=1)
+        assert 'titles.csv: создано 0 Title объектов из 1 строк, ' \
+               'пропущено 0, обновлено 1, удалено 0, ' \
+               'без изменений 2' in out
+        assert Title.objects.get(pk=2).year == 1999
+
+    def test_09_role_change_revokes_tokens(self, clean_dir):
+        from users.models import User
+
+        self.load(clean_dir, incremental=True)
+        version = User.objects.get(pk=100).token_version
+        write_csv(clean_dir, 'users.csv', '''
+id,username,email,role,bio,first_name,last_name
+100,Reader,reader@yamdb.fake,admin,,,
+101,critic,critic@yamdb.fake,moderator,Критик,,
+''')
+        self.load(clean_dir, incremental=True)
+        assert User.objects.get(pk=100).token_version == version + 1
+        critic = User.objects.get(pk=101)
+        assert critic.bio == 'Критик'
+        assert critic.token_version == 0
+
+    def test_10_files_with_errors_are_reloaded(self, data_dir):
+        self.load(data_dir, incremental=True)
+        out, _ = self.load(data_dir, incremental=True)
+        assert 'titles.csv: файл не изменился' not in out
+        assert 'category.csv: файл не изменился' in out
+
+    def test_11_delete_requires_incremental(self, data_dir):
+        from django.core.management import CommandError
+
+        with pytest.raises(CommandError):
+            self.load(data_dir, delete=True)
+
+    def test_12_large_load_clears_representations(self, data_dir, client,
+                                                  monkeypatch):
+        from api import signals
+        from titles import csv_loader
+        from titles.models import Category, Title, TitleRepresentation
+
+        category = Category.objects.create(id=1, name='Фильм', slug='movie')
+        for pk in (1, 2):
+            Title.objects.create(id=pk, name=f'Произведение {pk}', year=2000,
+                                 category=category)
+        client.get('/api/v1/titles/')
+        assert TitleRepresentation.objects.count() == 2
+        invalidated = []
+        invalidate = signals.invalidate_cached_responses
+
+        def spy(*namespaces):
+            invalidated.append(namespaces)
+            invalidate(*namespaces)
+
+        monkeypatch.setattr(signals, 'invalidate_cached_responses', spy)
+        monkeypatch.setattr(csv_loader, 'MAX_TRACKED_TITLE_IDS', 1)
+
+        self.load(data_dir)
+
+        assert [set(namespaces) for namespaces in invalidated] == [{
+            signals.TITLES_NAMESPACE, signals.REVIEWS_NAMESPACE,
+        }], 'Массовая загрузка должна сбрасывать кеш ответов одним вызовом.'
+        assert not TitleRepresentation.objects.exists()
+        assert client.get('/api/v1/titles/1/').json()['rating'] == 8
+        assert client.get('/api/v1/titles/1/reviews/').json()['count'] == 1
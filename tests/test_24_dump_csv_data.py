@@ -0,0 +1,133 @@
+import csv
+import gzip
+
+import pytest
+from django.core.management import call_command
+
+from tests.test_14_sqlite_backend import get_connection
+
+
+def read_rows(path):
+    """Строки CSV без даты публикации: её задаёт auto_now_add."""
+    opener = gzip.open if path.suffix == '.gz' else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as csv_file:
+        reader = csv.DictReader(csv_file)
+        return reader.fieldnames, sorted(
+            tuple(value for key, value in row.items() if key != 'pub_date')
+            for row in reader
+        )
+
+
+@pytest.fixture
+def production_db(tmp_path, settings, monkeypatch):
+    """Файловая база с профилем SQLITE_PRODUCTION под псевдонимом export."""
+    from django.apps import apps
+    from django.db import connections
+
+    monkeypatch.setitem(connections.settings, 'export', {
+        'ENGINE': 'api_yamdb.backends.sqlite3',
+        'NAME': str(tmp_path / 'db.sqlite3'),
+        'OPTIONS': {
+            'init_command': ';'.join(
+                f'PRAGMA {name}={value}'
+                for name, value in settings.SQLITE_PRAGMAS.items()
+            ),
+            'transaction_mode': 'IMMEDIATE',
+        },
+    })
+    connection = connections['export']
+    with connection.schema_editor() as editor:
+        for model in apps.get_models():
+            editor.create_model(model)
+    yield connection
+    connection.close()
+    del connections['export']
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24DumpCsvData:
+    FILES = ('users.csv', 'category.csv', 'genre.csv', 'titles.csv',
+             'genre_title.csv', 'review.csv', 'comments.csv')
+
+    @pytest.fixture
+    def data_dir(self, settings):
+        call_command('load_csv_data', stdout=None)
+        return settings.BASE_DIR / 'static' / 'data'
+
+    def assert_same(self, data_dir, export_dir, suffix=''):
+        for name in self.FILES:
+            assert read_rows(export_dir / f'{name}{suffix}') == read_rows(
+                data_dir / name
+            ), name
+
+    def test_01_export_matches_loaded_files(self, data_dir, tmp_path):
+        call_command('dump_csv_data', str(tmp_path), chunk_size=7,
+                     stdout=None)
+        self.assert_same(data_dir, tmp_path)
+
+    def test_02_gzip_round_trip(self, data_dir, tmp_path):
+        from titles.models import Category, Genre, Title
+        from users.models import User
+
+        call_command('dump_csv_data', str(tmp_path), gzip=True, stdout=None)
+        self.assert_same(data_dir, tmp_path, '.gz')
+
+        for model in (User, Title, Category, Genre):
+            model.objects.all().delete()
+        call_command('load_csv_data', directory=str(tmp_path), stdout=None)
+
+        call_command('dump_csv_data', str(tmp_path), stdout=None)
+        self.assert_same(data_dir, tmp_path)
+        assert not list(tmp_path.glob('*.gz'))
+
+    def test_03_failed_export_removes_part_file(self, data_dir, tmp_path,
+                                                monkeypatch):
+        from titles import csv_export
+
+        def fail(value):
+            raise RuntimeError('Сбой выгрузки')
+
+        monkeypatch.setattr(csv_export, 'format_value', fail)
+        with pytest.raises(RuntimeError):
+            call_command('dump_csv_data', str(tmp_path), stdout=None)
+        assert not list(tmp_path.iterdir()), (
+            'После ошибки выгрузки временный файл должен удаляться.'
+        )
+
+    def test_04_export_does_not_block_writers(self, production_db, tmp_path,
+                                              monkeypatch):
+        from titles import csv_export
+        from titles.models import Category
+
+        Category.objects.using('export').create(name='Фильм', slug='films')
+        writer = get_connection(tmp_path, timeout=0)
+        format_value = csv_export.format_value
+        written = []
+
+        def write_during_export(value):
+            if not written:
+                # timeout=0: занятая блокировка записи — сразу ошибка.
+                with writer.cursor() as cursor:
+                    cursor.execute(
+                        "INSERT INTO titles_category (name, slug) "
+                        "VALUES ('Книга', 'books')"
+                    )
+                written.append(True)
+            return format_value(value)
+
+        monkeypatch.setattr(csv_export, 'format_value', write_during_export)
+        export_dir = tmp_path / 'export'
+        try:
+            call_command('dump_csv_data', str(export_dir), database='export',
+                         stdout=None)
+        finally:
+            writer.close()
+
+        assert Category.objects.using('export').filter(
+            slug='books',
+        ).exists()
+        _, rows = read_rows(export_dir / 'category.csv')
+        assert [row[1] for row in rows] == ['Фильм'], (
+            'Выгрузка должна читать один снимок базы и не держать '
+            'блокировку записи.'
+        )
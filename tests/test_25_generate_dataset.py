@@ -0,0 +1,90 @@
+from collections import Counter
+
+import pytest
+from django.core.management import call_command
+
+
+def snapshot():
+    from reviews.models import Comment, Review
+    from titles.models import GenreTitle, Title
+
+    return (
+        list(Title.objects.order_by('pk').values_list('name', 'year')),
+        list(GenreTitle.objects.order_by('pk').values_list(
+            'title_id', 'genre__slug',
+        )),
+        list(Review.objects.order_by('pk').values_list(
+            'title_id', 'author__username', 'score', 'text', 'pub_date',
+        )),
+        list(Comment.objects.order_by('pk').values_list(
+            'review_id', 'author__username',
+        )),
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25GenerateDataset:
+    OPTIONS = {'scale': 0.05, 'batch_size': 300, 'stdout': None}
+
+    def test_01_sizes_and_skew(self, client):
+        from reviews.models import Comment, Review
+        from titles.models import Title
+        from users.models import User
+
+        call_command('generate_dataset', seed=1, **self.OPTIONS)
+
+        assert Title.objects.count() == 50
+        assert User.objects.count() == 250
+        assert Review.objects.count() == 5000
+        assert Comment.objects.count() == 1000
+        per_title = sorted(
+            Counter(Review.objects.values_list('title_id', flat=True))
+            .values(),
+            reverse=True,
+        )
+        assert per_title[0] > 3 * per_title[len(per_title) // 2]
+        # Отзывов у пользователя не больше, чем произведений, поэтому
+        # активность видна по комментариям.
+        per_user = sorted(
+            Counter(Comment.objects.values_list('author_id', flat=True))
+            .values(),
+            reverse=True,
+        )
+        assert per_user[0] > 10 * per_user[len(per_user) // 2]
+
+        response = client.get('/api/v1/titles/', {'genre': 'drama'})
+        assert response.json()['count'] > 0
+
+    def test_02_same_seed_same_dataset(self):
+        from titles.models import Category, Genre, Title
+        from users.models import User
+
+        call_command('generate_dataset', seed=7, **self.OPTIONS)
+        first = snapshot()
+        for model in (User, Title, Category, Genre):
+            model.objects.all().delete()
+        call_command('generate_dataset', seed=7, **self.OPTIONS)
+        assert snapshot() == first
+
+        call_command('generate_dataset', seed=8, **self.OPTIONS)
+        assert Title.objects.count() == 100
+
+    def test_03_generate_runs_in_one_transaction(self, monkeypatch):
+        from django.db import connection
+
+        from titles import dataset
+
+        insert_rows = dataset.insert_rows
+        in_transaction = []
+
+        def check_insert_rows(*args, **kwargs):
+            in_transaction.append(connection.in_atomic_block)
+            return insert_rows(*args, **kwargs)
+
+        monkeypatch.setattr(dataset, 'insert_rows', check_insert_rows)
+        dataset.DatasetGenerator(scale=0.01, seed=1).generate()
+
+        assert in_transaction and all(in_transaction), (
+            'DatasetGenerator.generate() должен вставлять строки в одной '
+            'транзакции и без команды generate_dataset.'
+        )
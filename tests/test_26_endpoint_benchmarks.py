@@ -0,0 +1,42 @@
+import pytest
+
+from benchmarks import endpoints
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26EndpointBenchmarks:
+
+    def test_01_suite_covers_key_endpoints(self):
+        from titles.dataset import DatasetGenerator
+
+        DatasetGenerator(scale=0.01, seed=3).generate()
+        results = endpoints.run_suite(iterations=1, warmup=0)
+
+        assert set(results) == {
+            'titles_list', 'titles_filter_category', 'titles_filter_genre',
+            'titles_filter_name', 'titles_filter_year',
+            'titles_ordering_year', 'titles_ordering_rating',
+            'title_detail', 'reviews_list', 'comments_list', 'review_post',
+            'signup', 'token',
+        }
+        for metrics in results.values():
+            assert metrics['queries'] > 0
+            assert metrics['alloc_peak_kb'] > 0
+            assert metrics['p99_us'] >= metrics['p50_us'] > 0
+
+    def test_02_compare_flags_regressions(self):
+        baseline = {
+            'title_detail': {'p50_us': 100.0, 'p99_us': 200.0,
+                             'queries': 2, 'alloc_peak_kb': 10.0},
+            'removed': {'p50_us': 1.0},
+        }
+        results = {
+            'title_detail': {'p50_us': 115.0, 'p99_us': 300.0,
+                             'queries': 3, 'alloc_peak_kb': 10.0},
+            'added': {'p50_us': 1000.0},
+        }
+        regressions = endpoints.compare(baseline, results, threshold=0.2)
+        assert [
+            (regression['scenario'], regression['metric'])
+            for regression in regressions
+        ] == [('title_detail', 'p99_us'), ('title_detail', 'queries')]
@@ -0,0 +1,38 @@
+from argparse import Namespace
+
+import pytest
+
+from benchmarks import contention
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Contention:
+
+    def test_01_review_race_reports_statuses(self):
+        args = Namespace(mode='threads', workers=4, requests=2,
+                         duplicates=2, write_ratio=0.5)
+        data = contention.seed(args.workers, args.requests, scale=0.01)
+        recorder, elapsed = contention.run_scenario('review_race', data, args)
+        result = contention.summarize_scenario(recorder, elapsed)
+
+        assert result['requests'] == args.workers * args.requests
+        assert result['write']['count'] == result['requests']
+        # Исход гонки зависит от планировщика: проверяются инварианты.
+        reviews = contention.check_reviews(data, args)
+        assert reviews['expected_reviews'] == 4
+        assert result['statuses'].get('201', 0) <= reviews['created_reviews']
+        assert reviews['created_reviews'] <= reviews['expected_reviews']
+        assert sum(result['errors'].values()) == (
+            result['statuses'].get('500', 0)
+        )
+
+    def test_02_mixed_splits_readers_and_writers(self):
+        args = Namespace(mode='threads', workers=4, requests=4,
+                         duplicates=2, write_ratio=0.5)
+        data = contention.seed(args.workers, args.requests, scale=0.01)
+        plans = [
+            contention.mixed(data, worker, args)
+            for worker in range(args.workers)
+        ]
+        kinds = [{kind for kind, _ in plan} for plan in plans]
+        assert kinds == [{'write'}, {'write'}, {'read'}, {'read'}]
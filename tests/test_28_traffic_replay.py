@@ -0,0 +1,153 @@
+import json
+import sys
+
+import pytest
+from django.test import override_settings
+
+from api_yamdb.handlers import RouteScopedWSGIHandler
+from benchmarks import replay
+
+
+def read_trace(path):
+    return [
+        json.loads(line)
+        for line in path.read_text(encoding='utf-8').splitlines()
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28TrafficReplay:
+
+    @pytest.fixture
+    def capture(self, tmp_path, settings):
+        path = tmp_path / 'capture-{pid}.jsonl'
+        settings.TRAFFIC_CAPTURE = {
+            **settings.TRAFFIC_CAPTURE,
+            'ENABLED': True,
+            'PATH': str(path),
+        }
+        return tmp_path
+
+    def test_01_capture_is_sanitized(self, capture, admin_client):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.post('/api/v1/auth/signup/', {
+            'username': 'captured', 'email': 'captured@yamdb.fake',
+        }, format='json')
+        client.post('/api/v1/auth/token/', {
+            'username': 'captured', 'confirmation_code': 'secret-code',
+        }, format='json')
+        admin_client.get('/api/v1/users/', {'search': 'captured'})
+
+        trace_files = list(capture.glob('capture-*.jsonl'))
+        assert len(trace_files) == 1
+        records = read_trace(trace_files[0])
+        assert [
+            (record['method'], record['path'], record['status'])
+            for record in records
+        ] == [
+            ('POST', '/api/v1/auth/signup/', 200),
+            ('POST', '/api/v1/auth/token/', 400),
+            ('GET', '/api/v1/users/', 200),
+        ]
+        text = trace_files[0].read_text(encoding='utf-8')
+        assert 'captured@yamdb.fake' not in text
+        assert 'secret-code' not in text
+        assert 'Bearer' not in text
+        assert records[0]['body']['email'].endswith('@capture.invalid')
+        assert records[1]['body']['confirmation_code'] == '***'
+        assert records[0]['auth'] is None
+        assert records[0]['body']['username'] != 'captured'
+        assert records[2]['auth'] and records[2]['query'] == (
+            f'search={records[0]["body"]["username"]}'
+        )
+        assert all(record['duration_ms'] > 0 for record in records)
+
+    def test_02_replay_reports_routes_and_status_changes(
+        self, capture, admin_client,
+    ):
+        for path in ('/api/v1/categories/', '/api/v1/titles/1/',
+                     '/api/v1/titles/2/', '/api/v1/users/'):
+            admin_client.get(path)
+        records = replay.load_trace(capture.glob('capture-*.jsonl'))
+
+        with override_settings(TRAFFIC_CAPTURE={'ENABLED': False}):
+            send = replay.wsgi_sender(RouteScopedWSGIHandler())
+            results = replay.summarize_replay(
+                replay.replay(records, send, speed=0, concurrency=2)
+            )
+
+        assert set(results) == {
+            'GET /api/v1/categories/', 'GET /api/v1/titles/{id}/',
+            'GET /api/v1/users/',
+        }
+        assert results['GET /api/v1/titles/{id}/']['count'] == 2
+        assert results['GET /api/v1/categories/']['status_mismatches'] == 0
+        # Без --authorization список пользователей недоступен.
+        assert results['GET /api/v1/users/']['statuses'] == {'401': 1}
+        assert results['GET /api/v1/users/']['status_mismatches'] == 1
+
+        baseline = {
+            route: {**metrics, 'statuses': dict(metrics['statuses'])}
+            for route, metrics in results.items()
+        }
+        baseline['GET /api/v1/users/']['statuses'] = {'200': 1}
+        regressions = replay.compare(baseline, results, threshold=100)
+        assert [
+            (regression['route'], regression['metric'])
+            for regression in regressions
+        ] == [('GET /api/v1/users/', 'statuses')]
+
+    def test_03_profile_fields_are_pseudonymized(self):
+        from api_yamdb.traffic import sanitize
+
+        data = sanitize({
+            'username': 'captured', 'first_name': 'Иван',
+            'last_name': 'Петров', 'bio': 'Люблю кино',
+        })
+        for field, value in (('username', 'captured'),
+                             ('first_name', 'Иван'),
+                             ('last_name', 'Петров'), ('bio', 'Люблю кино')):
+            assert data[field] and data[field] != value, field
+
+    def test_04_saved_results_omit_authorization(self, capture, tmp_path,
+                                                 admin_client, monkeypatch):
+        admin_client.get('/api/v1/categories/')
+        trace = next(capture.glob('capture-*.jsonl'))
+        saved = tmp_path / 'replay.json'
+        monkeypatch.setattr(sys, 'argv', [
+            'replay', str(trace), '--speed', '0',
+            '--authorization', 'Bearer secret-token', '--save', str(saved),
+        ])
+
+        with override_settings(TRAFFIC_CAPTURE={'ENABLED': False}):
+            replay.main()
+
+        text = saved.read_text(encoding='utf-8')
+        assert 'secret-token' not in text
+        assert 'authorization' not in json.loads(text)['args']
+
+    def test_05_username_in_path_uses_body_pseudonym(self, capture,
+                                                     admin_client, user):
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', {'username': user.username},
+            format='json',
+        )
+        admin_client.get('/api/v1/users/me/')
+
+        records = read_trace(next(capture.glob('capture-*.jsonl')))
+        pseudonym = records[0]['body']['username']
+        assert pseudonym != user.username
+        assert records[0]['path'] == f'/api/v1/users/{pseudonym}/'
+        assert records[1]['path'] == '/api/v1/users/me/'
+
+    def test_06_malformed_content_length(self, capture, client):
+        response = client.post(
+            '/api/v1/auth/signup/', data='{}',
+            content_type='application/json', CONTENT_LENGTH='abc',
+        )
+
+        assert response.status_code != 500
+        record = read_trace(next(capture.glob('capture-*.jsonl')))[0]
+        assert record['body_size'] == 0 and record['body'] is None
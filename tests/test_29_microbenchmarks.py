@@ -0,0 +1,26 @@
+import pytest
+
+from benchmarks import micro
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29Microbenchmarks:
+
+    def test_01_suite_reports_ns_and_allocations(self):
+        from titles.dataset import DatasetGenerator
+
+        DatasetGenerator(scale=0.01, seed=5).generate()
+        results = micro.run_suite(iterations=2, warmup=0)
+
+        assert {
+            'title_get_serializer', 'review_serializer', 'comment_serializer',
+            'title_filter_queryset', 'permission_is_admin',
+            'permission_author_object', 'validate_year',
+            'signup_validate_existing',
+        } <= set(results)
+        assert results['title_get_serializer']['ops'] == (
+            micro.SERIALIZED_OBJECTS
+        )
+        for metrics in results.values():
+            assert metrics['ns_per_op'] > 0
+            assert metrics['alloc_bytes_per_op'] >= 0
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import multiprocessing
+
+import pytest
+from rest_framework.test import APIClient
+
+from api_yamdb import metrics
+
+
+def record_request(store):
+    store.request_started()
+    store.request_finished('titles-list', 'GET', 200, 0.02, 3, 0.004)
+    store.flush(force=True)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30Metrics:
+
+    @pytest.fixture
+    def store_dir(self, tmp_path, settings, monkeypatch):
+        settings.METRICS = {
+            'ENABLED': True,
+            'DIRECTORY': str(tmp_path),
+            'FLUSH_INTERVAL': 60.0,
+            'ALLOWED_IPS': ['127.0.0.1'],
+        }
+        monkeypatch.setattr(metrics, '_store', None)
+        return tmp_path
+
+    def test_01_endpoint_exposes_request_metrics(self, store_dir):
+        client = APIClient()
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/titles/999999/')
+        response = client.get('/metrics')
+
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        text = response.content.decode()
+        assert '# TYPE yamdb_http_requests_total counter' in text
+        assert (
+            'yamdb_http_requests_total{view="api:categories-list",method="GET",'
+            'status="200"} 2'
+        ) in text
+        assert 'status="404"} 1' in text
+        assert (
+            'yamdb_http_request_duration_seconds_count'
+            '{view="api:categories-list",method="GET"} 2'
+        ) in text
+        assert (
+            'yamdb_http_request_duration_seconds_bucket'
+            '{view="api:categories-list",method="GET",le="+Inf"} 2'
+        ) in text
+        assert 'yamdb_db_queries_per_request_bucket{view=' in text
+        # Запрос к /metrics сам находится в обработке.
+        assert 'yamdb_http_requests_in_flight 1' in text
+
+    def test_02_metrics_are_summed_across_processes(self, store_dir):
+        store = metrics.get_store()
+        record_request(store)
+        process = multiprocessing.get_context('fork').Process(
+            target=record_request, args=(store,),
+        )
+        process.start()
+        process.join()
+        assert len(list(store_dir.glob('*.json'))) == 2
+
+        counters, histograms, _ = store.collect()
+        key = (
+            'yamdb_http_requests_total',
+            (('view', 'titles-list'), ('method', 'GET'), ('status', 200)),
+        )
+        assert counters[key] == 2
+        duration = histograms[(
+            'yamdb_http_request_duration_seconds',
+            (('view', 'titles-list'), ('method', 'GET')),
+        )]
+        assert sum(duration[:-1]) == 2
+
+        # Файл завершившегося процесса перенесён в aggregate.json.
+        assert not list(store_dir.glob(f'{process.pid}-*.json'))
+        counters, _, gauges = store.collect()
+        aggregate = json.loads((store_dir / 'aggregate.json').read_text())
+        assert aggregate['folded'] == []
+        assert counters[key] == 2, (
+            'Счётчики завершившегося процесса должны учитываться и после '
+            'удаления его файла.'
+        )
+        assert gauges[('yamdb_http_requests_in_flight', ())] == 0
+
+    def test_03_render_histogram_is_cumulative(self):
+        name = 'yamdb_db_queries_per_request'
+        values = [0] * (len(metrics.QUERY_COUNT_BUCKETS) + 1) + [0.0]
+        values[1] = 2
+        values[3] = 1
+        values[-1] = 4.0
+        text = metrics.render({}, {(name, (('view', 'a'),)): values}, {})
+
+        assert f'{name}_bucket{{view="a",le="0"}} 0' in text
+        assert f'{name}_bucket{{view="a",le="1"}} 2' in text
+        assert f'{name}_bucket{{view="a",le="3"}} 3' in text
+        assert f'{name}_bucket{{view="a",le="+Inf"}} 3' in text
+        assert f'{name}_sum{{view="a"}} 4' in text
+        assert f'{name}_count{{view="a"}} 3' in text
+
+    def test_04_disabled_metrics(self, settings, monkeypatch):
+        settings.METRICS = {**settings.METRICS, 'ENABLED': False}
+        monkeypatch.setattr(metrics, '_store', None)
+        assert APIClient().get('/metrics').status_code == 404
+
+    def test_05_reused_pid_does_not_reset_counters(self, store_dir,
+                                                   monkeypatch):
+        store = metrics.get_store()
+        record_request(store)
+        # Процесс с тем же pid после перезапуска пишет в другой файл.
+        monkeypatch.setattr(store, '_pid', None)
+        record_request(store)
+        assert len(list(store_dir.glob('*.json'))) == 2
+
+        counters = store.collect()[0]
+        assert counters[(
+            'yamdb_http_requests_total',
+            (('view', 'titles-list'), ('method', 'GET'), ('status', 200)),
+        )] == 2, 'Счётчики не должны уменьшаться при повторе pid.'
+
+    def test_06_endpoint_allowed_ips(self, store_dir):
+        response = APIClient(REMOTE_ADDR='10.0.0.1').get('/metrics')
+        assert response.status_code == 403
+        assert APIClient().get('/metrics').status_code == 200
+
+    def test_07_queries_in_asgi_read_pool(self, store_dir):
+        from api_yamdb.handlers import RouteScopedASGIHandler
+        from tests.test_17_asgi import call_asgi
+
+        status, _, _ = asyncio.run(call_asgi(
+            RouteScopedASGIHandler(), 'GET', '/api/v1/titles/',
+        ))
+        assert status == 200
+        histograms = metrics.get_store().collect()[1]
+        queries = histograms[(
+            'yamdb_db_queries_per_request', (('view', 'api:titles-list'),),
+        )]
+        assert queries[-1] > 0, (
+            'Запросы к базе в потоках пула ASGI должны учитываться.'
+        )